@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from app.config import (
+    ARCHIVE_CLOSED_AFTER_DAYS, ARCHIVE_OPEN_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL_S
+)
+from app.memory import (
+    find_archivable, archive_commitments, count_commitments, count_archived_commitments,
+    get_query_cache, use_workspace
+)
+from app.metrics import timed
+from app.risk_engine import refresh_archive_risks
+from app.workspaces import list_workspaces, open_workspace
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Archive Compaction ───────────────────────────────────────
+# Keeps the live tier — the commitments table, the MinHash index and
+# the live Chroma collection — down to recent and open work. Closed
+# commitments older than ARCHIVE_CLOSED_AFTER_DAYS (and, if set, open
+# ones older than ARCHIVE_OPEN_AFTER_DAYS) move to the archive tier,
+# which only opt-in searches and listings read. An age of None
+# disables that kind; 0 archives all of it now.
+
+def _cutoff(days: float | None) -> str | None:
+    if days is None:
+        return None
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+def compact_workspace(
+    closed_after_days: float | None = ARCHIVE_CLOSED_AFTER_DAYS,
+    open_after_days: float | None = ARCHIVE_OPEN_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> dict:
+    """
+    Archives everything due in the current workspace, batch_size rows
+    per transaction. Returns counts of what moved and what is left.
+    """
+    started = time.perf_counter()
+    closed_before = _cutoff(closed_after_days)
+    open_before = _cutoff(open_after_days)
+    archived, owners = [], set()
+
+    while True:
+        with timed("archive_find"):
+            ids = find_archivable(closed_before, open_before, limit=batch_size)
+        if not ids:
+            break
+        with timed("archive_move"):
+            rows = archive_commitments(ids)
+        get_query_cache().invalidate_ids([row["id"] for row in rows])
+        with timed("archive_refresh_risks"):
+            owners.update(refresh_archive_risks(rows))
+        archived.extend(rows)
+        if len(ids) < batch_size:
+            break
+
+    return {
+        "archived": len(archived),
+        "archived_closed": sum(1 for row in archived if row["status"] != "open"),
+        "archived_open": sum(1 for row in archived if row["status"] == "open"),
+        "owners_refreshed": sorted(owners),
+        "live_commitments": count_commitments(),
+        "archived_commitments": count_archived_commitments(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+class Compactor:
+    """Runs compact_workspace over every workspace every interval_s, in a background thread."""
+
+    def __init__(self, interval_s: float = ARCHIVE_INTERVAL_S):
+        self.interval_s = interval_s
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.last_run_at: str | None = None
+        self.last_error: str | None = None
+
+    def start(self):
+        if self.interval_s <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="archive-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.run_once()
+
+    def run_once(self) -> dict[str, dict]:
+        """Compacts every workspace on disk. Returns compact_workspace's result per workspace."""
+        results = {}
+        for workspace_id in list_workspaces():
+            if self._stop.is_set():
+                break
+            try:
+                open_workspace(workspace_id)
+                with use_workspace(workspace_id):
+                    results[workspace_id] = compact_workspace()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Archive compaction failed for workspace %s", workspace_id)
+        self.runs += 1
+        self.last_run_at = datetime.now().isoformat()
+        return results
+
+    def status(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_s": self.interval_s,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error
+        }
+
+
+archive_compactor = Compactor()
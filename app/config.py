@@ -7,4 +7,127 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = "gpt-4o-mini"
 DB_PATH = "commitiq.db"
 CHROMA_PATH = "chroma_store"
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
\ No newline at end of file
+
+# Workspaces: one SQLite file and Chroma collection per workspace.
+# The default workspace keeps DB_PATH and the original collection.
+DEFAULT_WORKSPACE = os.getenv("DEFAULT_WORKSPACE", "default")
+WORKSPACES_DIR = os.getenv("WORKSPACES_DIR", "workspaces")
+# Open workspace stores kept in the LRU handle cache
+WORKSPACE_CACHE_SIZE = int(os.getenv("WORKSPACE_CACHE_SIZE", "32"))
+
+# SQLite connection pool
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Async ingest jobs
+INGEST_QUEUE_MAX_DEPTH = int(os.getenv("INGEST_QUEUE_MAX_DEPTH", "100"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", "1000"))
+
+# Chunked extraction for long transcripts
+EXTRACTION_CHUNK_CHARS = int(os.getenv("EXTRACTION_CHUNK_CHARS", "6000"))
+EXTRACTION_CHUNK_OVERLAP = int(os.getenv("EXTRACTION_CHUNK_OVERLAP", "600"))
+EXTRACTION_MAX_CONCURRENCY = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", "4"))
+EXTRACTION_MAX_RETRIES = int(os.getenv("EXTRACTION_MAX_RETRIES", "2"))
+EXTRACTION_DEDUPE_THRESHOLD = float(os.getenv("EXTRACTION_DEDUPE_THRESHOLD", "0.8"))
+# hybrid: rules claim explicit commitments, the LLM reads the rest | rules | llm
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "hybrid")
+
+# Preprocessing before extraction: timestamps, filler and boilerplate
+# stripped, turns with no action language dropped (see app.preprocess)
+EXTRACTION_PREPROCESS = os.getenv("EXTRACTION_PREPROCESS", "true").lower() in ("1", "true", "yes")
+# Turns kept either side of one with action language ("Sure." after an ask)
+PREPROCESS_CONTEXT_TURNS = int(os.getenv("PREPROCESS_CONTEXT_TURNS", "1"))
+# Most transcript tokens extracted per ingest after preprocessing; 0 = no limit.
+# Long transcripts are chunked, so this is a cost cap, off by default
+EXTRACTION_TOKEN_BUDGET = int(os.getenv("EXTRACTION_TOKEN_BUDGET", "0"))
+# Over budget, only context turns are dropped unless this allows action
+# turns (the ones carrying commitments) to go too
+EXTRACTION_BUDGET_DROP_ACTION = os.getenv("EXTRACTION_BUDGET_DROP_ACTION", "false").lower() in ("1", "true", "yes")
+
+# Extraction cache
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+EXTRACTION_CACHE_MAX_AGE_S = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_S", str(7 * 24 * 3600)))
+
+# Bulk ingest
+BATCH_INGEST_MAX_ITEMS = int(os.getenv("BATCH_INGEST_MAX_ITEMS", "500"))
+BATCH_EXTRACTION_CONCURRENCY = int(os.getenv("BATCH_EXTRACTION_CONCURRENCY", "4"))
+
+# /query answer cache
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.95"))
+
+# /query planner: filterable questions answered from SQL, without the LLM
+QUERY_PLANNER_ENABLED = os.getenv("QUERY_PLANNER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Most commitments listed in one planned answer (the total is always given)
+QUERY_PLANNER_MAX_ROWS = int(os.getenv("QUERY_PLANNER_MAX_ROWS", "500"))
+
+# /commitments pagination
+COMMITMENTS_PAGE_SIZE = int(os.getenv("COMMITMENTS_PAGE_SIZE", "100"))
+COMMITMENTS_MAX_PAGE_SIZE = int(os.getenv("COMMITMENTS_MAX_PAGE_SIZE", "1000"))
+# /risks pagination
+RISKS_PAGE_SIZE = int(os.getenv("RISKS_PAGE_SIZE", "100"))
+RISKS_MAX_PAGE_SIZE = int(os.getenv("RISKS_MAX_PAGE_SIZE", "1000"))
+
+# Status updates
+STATUS_BATCH_MAX_ITEMS = int(os.getenv("STATUS_BATCH_MAX_ITEMS", "1000"))
+
+# Embeddings
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "default")   # default | openai | hash
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_LRU_SIZE = int(os.getenv("EMBEDDING_LRU_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+HASH_EMBEDDING_DIM = int(os.getenv("HASH_EMBEDDING_DIM", "384"))
+
+# Repeated-topic detection: MinHash/LSH near-duplicate index over tasks
+REPEATED_TOPIC_SOURCE = os.getenv("REPEATED_TOPIC_SOURCE", "minhash")   # minhash | chroma
+MINHASH_PERMUTATIONS = int(os.getenv("MINHASH_PERMUTATIONS", "48"))
+MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "16"))
+MINHASH_SHINGLE_SIZE = int(os.getenv("MINHASH_SHINGLE_SIZE", "4"))
+MINHASH_MAX_CANDIDATES = int(os.getenv("MINHASH_MAX_CANDIDATES", "64"))
+# Estimated Jaccard at or above this is a repeat outright;
+# between CONFIRM_JACCARD and this, embedding similarity must confirm it
+REPEATED_TOPIC_JACCARD = float(os.getenv("REPEATED_TOPIC_JACCARD", "0.6"))
+REPEATED_TOPIC_CONFIRM_JACCARD = float(os.getenv("REPEATED_TOPIC_CONFIRM_JACCARD", "0.35"))
+REPEATED_TOPIC_CONFIRM_COSINE = float(os.getenv("REPEATED_TOPIC_CONFIRM_COSINE", "0.85"))
+
+# Vector outbox: commitments reach Chroma through a background indexer
+VECTOR_INDEX_BATCH_SIZE = int(os.getenv("VECTOR_INDEX_BATCH_SIZE", "256"))
+VECTOR_INDEX_POLL_S = float(os.getenv("VECTOR_INDEX_POLL_S", "1.0"))
+VECTOR_INDEX_MAX_BACKOFF_S = float(os.getenv("VECTOR_INDEX_MAX_BACKOFF_S", "60"))
+# Most un-indexed rows searches merge in from the outbox (newest first)
+VECTOR_READ_THROUGH_MAX = int(os.getenv("VECTOR_READ_THROUGH_MAX", "2000"))
+
+# Hot/cold tiering: compaction moves commitments to the archive tier
+# (commitments_archive + an archive Chroma collection)
+# (empty disables it; 0 archives every closed commitment)
+ARCHIVE_CLOSED_AFTER_DAYS = float(v) if (v := os.getenv("ARCHIVE_CLOSED_AFTER_DAYS", "30")) else None
+# Open commitments older than this are archived too; unset keeps them live
+ARCHIVE_OPEN_AFTER_DAYS = float(v) if (v := os.getenv("ARCHIVE_OPEN_AFTER_DAYS")) else None
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# Seconds between background compactions of every workspace; 0 disables them
+ARCHIVE_INTERVAL_S = float(os.getenv("ARCHIVE_INTERVAL_S", "21600"))
+
+# LLM call scheduler shared by extraction and /query: identical in-flight
+# calls are merged, and calls are paced to the provider's rate limits
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+# Token-bucket limits; 0 disables that bucket
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+# Expected completion length, added to each call's prompt tokens
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "512"))
+# A call that would wait longer than this for its turn fails fast with 429
+LLM_MAX_QUEUE_WAIT_S = float(os.getenv("LLM_MAX_QUEUE_WAIT_S", "30"))
+# Retries of a call the provider rejected with 429 (extraction chunks retry on their own)
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "3"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "1.0"))
+LLM_MAX_BACKOFF_S = float(os.getenv("LLM_MAX_BACKOFF_S", "60"))
+
+# Stage timings, /metrics and the Server-Timing header
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Warm LLM clients, Chroma and the embedder in the background at startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,125 @@
+import calendar
+import re
+from datetime import date, datetime, timedelta
+
+# ─── Due Date Resolution ──────────────────────────────────────
+# Deadlines are extracted as free text ("next Friday", "end of the
+# month", "Q3"). They are resolved once, at ingest, against the meeting's
+# created_at into an ISO date stored in commitments.due_date, so range
+# filters and the overdue check are plain indexed comparisons.
+# Anything not recognised resolves to None — the text deadline is kept.
+# Periods resolve to their last day; a week ends on Friday.
+
+# Bump whenever resolution changes — existing rows are re-resolved
+DEADLINES_VERSION = "1"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+WORK_WEEK_END = 4   # Friday
+
+PREFIX = re.compile(r"^(?:by|before|until|till|on|due|no later than|latest by)\s+")
+RELATIVE = re.compile(r"^in (?P<n>\d{1,3}|a|an|one|two|three|four) (?P<unit>days?|weeks?|months?)$")
+WEEKDAY = re.compile(rf"^(?:(?P<which>this|next|coming|this coming) )?(?P<day>{'|'.join(WEEKDAYS)})$")
+PERIOD = re.compile(
+    r"^(?:(?:the )?end of (?:the )?|(?P<which>this|next|coming) )?(?P<period>day|week|month|quarter|year)(?: end)?$"
+)
+QUARTER = re.compile(r"^(?:end of )?q(?P<q>[1-4])(?: (?P<year>\d{4}))?$")
+MONTH_DAY = re.compile(rf"^(?P<month>{'|'.join(MONTHS)})[a-z]*\.? (?P<day>\d{{1,2}})(?:st|nd|rd|th)?(?:,? (?P<year>\d{{4}}))?$")
+DAY_MONTH = re.compile(rf"^(?P<day>\d{{1,2}})(?:st|nd|rd|th)? (?:of )?(?P<month>{'|'.join(MONTHS)})[a-z]*(?:,? (?P<year>\d{{4}}))?$")
+NUMERIC = re.compile(r"^(?P<month>\d{1,2})/(?P<day>\d{1,2})(?:/(?P<year>\d{2}|\d{4}))?$")
+ISO = re.compile(r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})$")
+
+ABBREVIATIONS = {"eod": "end of day", "cob": "end of day", "eow": "end of week", "eom": "end of month"}
+COUNTS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4}
+
+
+def _normalize(deadline: str) -> str:
+    text = re.sub(r"[^\w/\- ]", " ", deadline.lower())
+    text = re.sub(r"\s+", " ", text).strip()
+    text = PREFIX.sub("", text)
+    # "friday morning", "tomorrow evening" — the time of day doesn't move the date
+    text = re.sub(r" (?:morning|afternoon|evening|night|eod)$", "", text)
+    return ABBREVIATIONS.get(text, text)
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _upcoming(year: int | None, month: int, day: int, today: date) -> date | None:
+    """The date, in the given year or else the first one on or after today."""
+    try:
+        resolved = date(year or today.year, month, day)
+        if year is None and resolved < today:
+            resolved = date(today.year + 1, month, day)
+    except ValueError:
+        return None
+    return resolved
+
+
+def _period_end(period: str, which: str | None, today: date) -> date:
+    ahead = 1 if which in ("next", "coming") else 0
+    if period == "day":
+        return today + timedelta(days=ahead)
+    if period == "week":
+        # Said on a weekend, "this week" can only mean today
+        return max(today, today + timedelta(days=WORK_WEEK_END - today.weekday() + 7 * ahead))
+    if period == "month":
+        month = today.month - 1 + ahead
+        return _month_end(today.year + month // 12, month % 12 + 1)
+    if period == "quarter":
+        quarter = (today.month - 1) // 3 + ahead
+        year = today.year + quarter // 4
+        return _month_end(year, (quarter % 4) * 3 + 3)
+    return date(today.year + ahead, 12, 31)
+
+
+def resolve_due_date(deadline: str | None, reference: datetime | str) -> str | None:
+    """
+    The ISO date (YYYY-MM-DD) a free-text deadline refers to, counted
+    from reference (the meeting's created_at), or None if it isn't one
+    we recognise.
+    """
+    if not deadline:
+        return None
+    if isinstance(reference, str):
+        reference = datetime.fromisoformat(reference)
+    today = reference.date()
+    text = _normalize(deadline)
+
+    resolved = None
+    if text in ("today", "tonight", "now", "asap"):
+        resolved = today
+    elif text == "tomorrow":
+        resolved = today + timedelta(days=1)
+    elif match := RELATIVE.match(text):
+        n = COUNTS.get(match.group("n")) or int(match.group("n"))
+        days = {"day": 1, "week": 7, "month": 30}[match.group("unit").rstrip("s")]
+        resolved = today + timedelta(days=n * days)
+    elif match := WEEKDAY.match(text):
+        ahead = (WEEKDAYS.index(match.group("day")) - today.weekday()) % 7
+        if match.group("which") == "next":
+            # "next Friday" — the Friday of next week
+            ahead = WEEKDAYS.index(match.group("day")) - today.weekday() + 7
+        resolved = today + timedelta(days=ahead)
+    elif match := PERIOD.match(text):
+        resolved = _period_end(match.group("period"), match.group("which"), today)
+    elif match := QUARTER.match(text):
+        quarter = int(match.group("q"))
+        year = int(match.group("year") or today.year)
+        resolved = _month_end(year, quarter * 3)
+        if not match.group("year") and resolved < today:
+            resolved = _month_end(year + 1, quarter * 3)
+    elif match := (MONTH_DAY.match(text) or DAY_MONTH.match(text)):
+        month = MONTHS.index(match.group("month")[:3]) + 1
+        year = int(match.group("year")) if match.group("year") else None
+        resolved = _upcoming(year, month, int(match.group("day")), today)
+    elif match := NUMERIC.match(text):
+        year = match.group("year")
+        if year and len(year) == 2:
+            year = "20" + year
+        resolved = _upcoming(int(year) if year else None, int(match.group("month")), int(match.group("day")), today)
+    elif match := ISO.match(text):
+        resolved = _upcoming(int(match.group("year")), int(match.group("month")), int(match.group("day")), today)
+
+    return resolved.isoformat() if resolved else None
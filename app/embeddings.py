@@ -0,0 +1,239 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
+from app.config import (
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE,
+    EMBEDDING_LRU_SIZE, EMBEDDING_CACHE_PATH, HASH_EMBEDDING_DIM
+)
+
+
+# ─── Base Embedders ───────────────────────────────────────────
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """
+    Deterministic local embedder: hashed word unigrams + bigrams, L2-normalized.
+    No model download, no network — for offline benchmarks and tests.
+    """
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = []
+        for text in input:
+            words = re.findall(r"[a-z0-9]+", text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            v = np.zeros(self.dim, dtype=np.float32)
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                h = int.from_bytes(digest, "little")
+                v[h % self.dim] += 1.0 if (h >> 63) else -1.0
+            norm = np.linalg.norm(v)
+            vectors.append(v / norm if norm else v)
+        return vectors
+
+    def name(self) -> str:
+        return "commitiq_hashing"
+
+    def get_config(self) -> dict:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(config.get("dim", HASH_EMBEDDING_DIM))
+
+
+class OpenAIEmbeddingFunction(EmbeddingFunction):
+    """OpenAI embeddings through LangChain — EMBEDDING_MODEL, e.g. text-embedding-3-small."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        from langchain_openai import OpenAIEmbeddings
+        self.model = model
+        self._client = OpenAIEmbeddings(model=model)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [np.asarray(v, dtype=np.float32) for v in self._client.embed_documents(list(input))]
+
+    def name(self) -> str:
+        return "commitiq_openai"
+
+    def get_config(self) -> dict:
+        return {"model": self.model}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "OpenAIEmbeddingFunction":
+        return OpenAIEmbeddingFunction(config.get("model", EMBEDDING_MODEL))
+
+
+def build_base_embedder(backend: str = EMBEDDING_BACKEND) -> tuple[EmbeddingFunction, str]:
+    """Returns (embedder, model_id). model_id is part of every cache key."""
+    if backend == "hash":
+        return HashingEmbeddingFunction(), f"hash-{HASH_EMBEDDING_DIM}"
+    if backend == "openai":
+        return OpenAIEmbeddingFunction(), f"openai-{EMBEDDING_MODEL}"
+    if backend == "default":
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        return DefaultEmbeddingFunction(), "chroma-default-all-MiniLM-L6-v2"
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+
+# ─── On-disk Store ────────────────────────────────────────────
+
+class EmbeddingStore:
+    """Embeddings on disk in their own SQLite file, keyed by text hash + model."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: dict[str, np.ndarray]):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(v, dtype=np.float32).tobytes()) for key, v in items.items()]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ─── Cached Embedding Function ────────────────────────────────
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Wraps an embedder with an in-memory LRU in front of the on-disk store.
+    Misses are de-duplicated and embedded in batches of batch_size.
+    Vectors are identical to the wrapped embedder's, so the wrapper reports
+    its name/config — collections created with the plain embedder accept it.
+    """
+
+    def __init__(self, base: EmbeddingFunction, model_id: str, store: EmbeddingStore = None,
+                 lru_size: int = EMBEDDING_LRU_SIZE, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.base = base
+        self.model_id = model_id
+        self.store = store
+        self.lru_size = lru_size
+        self.batch_size = batch_size
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "batches": 0}
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        keys = [self._key(t) for t in texts]
+        vectors: dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    vectors[key] = self._lru[key]
+            self.stats["memory_hits"] += sum(1 for k in keys if k in vectors)
+
+        pending = [k for k in dict.fromkeys(keys) if k not in vectors]
+        if pending and self.store is not None:
+            from_disk = self.store.get_many(pending)
+            vectors.update(from_disk)
+            self._count(disk_hits=len(from_disk))
+            self._remember(from_disk)
+
+        # Embed each missing text once, batch_size texts per call
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        items = list(missing.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            embedded = self.base([text for _, text in batch])
+            fresh = {key: np.asarray(v, dtype=np.float32) for (key, _), v in zip(batch, embedded)}
+            vectors.update(fresh)
+            self._remember(fresh)
+            if self.store is not None:
+                self.store.put_many(fresh)
+            self._count(misses=len(fresh), batches=1)
+
+        return [vectors[key] for key in keys]
+
+    def _remember(self, items: dict[str, np.ndarray]):
+        with self._lock:
+            for key, vector in items.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def name(self) -> str:
+        return self.base.name()
+
+    def get_config(self) -> dict:
+        return self.base.get_config()
+
+    def default_space(self):
+        return self.base.default_space()
+
+    def supported_spaces(self):
+        return self.base.supported_spaces()
+
+    @staticmethod
+    def build_from_config(config: dict) -> "CachedEmbeddingFunction":
+        return get_embedding_function()
+
+
+# ─── Process-wide Instance ────────────────────────────────────
+
+_embedding_function: CachedEmbeddingFunction | None = None
+_embedding_lock = threading.Lock()
+
+
+def get_embedding_function() -> CachedEmbeddingFunction:
+    """The cached embedder for EMBEDDING_BACKEND — built once per process."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _embedding_lock:
+            if _embedding_function is None:
+                base, model_id = build_base_embedder()
+                store = EmbeddingStore() if EMBEDDING_CACHE_PATH else None
+                _embedding_function = CachedEmbeddingFunction(base, model_id, store)
+    return _embedding_function
+
+
+def collection_name(base_name: str = "commitments", backend: str = EMBEDDING_BACKEND) -> str:
+    """Each non-default backend gets its own collection — vector spaces never mix."""
+    return base_name if backend == "default" else f"{base_name}_{backend}"
@@ -1,22 +1,34 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from app.config import MODEL_NAME
-from app.schemas import ExtractionResult, Commitment
-from typing import List
-
-# No api_key parameter — reads from environment variable automatically
-llm = ChatOpenAI(
-    model=MODEL_NAME,
-    temperature=0
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+from app.config import (
+    MODEL_NAME,
+    EXTRACTION_CHUNK_CHARS, EXTRACTION_CHUNK_OVERLAP,
+    EXTRACTION_MAX_CONCURRENCY, EXTRACTION_MAX_RETRIES,
+    EXTRACTION_DEDUPE_THRESHOLD, EXTRACTION_MODE,
+    EXTRACTION_CACHE_MAX_ENTRIES, EXTRACTION_CACHE_MAX_AGE_S,
+    EXTRACTION_PREPROCESS, EXTRACTION_TOKEN_BUDGET, EXTRACTION_BUDGET_DROP_ACTION, PREPROCESS_CONTEXT_TURNS,
+    LLM_COMPLETION_TOKENS_ESTIMATE
 )
+from app.schemas import ExtractionResult, ExtractionReport, Commitment
+from app.memory import get_cached_extraction, put_cached_extraction
+from app.metrics import llm_callbacks, extraction_tokens
+from app.rules import extract_explicit, RULES_VERSION
+from app.preprocess import preprocess_transcript, count_tokens, PREPROCESS_VERSION
+from app.llm_scheduler import llm_scheduler, call_key
+from typing import AsyncIterator, List
 
-parser = JsonOutputParser(pydantic_object=ExtractionResult)
+logger = logging.getLogger(__name__)
 
-prompt = ChatPromptTemplate.from_messages([
-    (
-        "system",
-        """You are an expert at extracting commitments from meeting transcripts.
+# Bump whenever the prompt below changes — invalidates cached extractions
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = """You are an expert at extracting commitments from meeting transcripts.
 
 Return ONLY valid JSON matching this format:
 {{
@@ -30,17 +42,557 @@ Return ONLY valid JSON matching this format:
     }}
   ]
 }}"""
-    ),
-    (
-        "human",
-        "Extract all commitments from this meeting transcript:\n\n{transcript}"
+
+HUMAN_PROMPT = "Extract all commitments from this meeting transcript:\n\n{transcript}"
+
+
+# ─── Lazy Chain ───────────────────────────────────────────────
+# LangChain + the OpenAI client cost seconds to import. They are built on
+# first use (or by /warmup) so a cold start doesn't pay for them.
+
+_llm = None
+_extraction_chain = None
+_chain_lock = threading.Lock()
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _chain_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                # No api_key parameter — reads from environment variable automatically
+                _llm = ChatOpenAI(
+                    model=MODEL_NAME,
+                    temperature=0,
+                    callbacks=llm_callbacks("extraction")
+                )
+    return _llm
+
+
+def get_extraction_chain():
+    """prompt | llm | parser, built once on first use."""
+    global _extraction_chain
+    if _extraction_chain is None:
+        llm = get_llm()
+        with _chain_lock:
+            if _extraction_chain is None:
+                from langchain_core.prompts import ChatPromptTemplate
+                from langchain_core.output_parsers import JsonOutputParser
+
+                parser = JsonOutputParser(pydantic_object=ExtractionResult)
+                prompt = ChatPromptTemplate.from_messages([
+                    ("system", SYSTEM_PROMPT),
+                    ("human", HUMAN_PROMPT)
+                ])
+                _extraction_chain = prompt | llm | parser
+    return _extraction_chain
+
+
+def set_extraction_chain(chain):
+    """Swaps in another runnable (e.g. a fake model for offline benchmarks)."""
+    global _extraction_chain
+    _extraction_chain = chain
+
+
+# ─── Chunking ─────────────────────────────────────────────────
+
+def split_transcript(
+    transcript: str,
+    max_chars: int = EXTRACTION_CHUNK_CHARS,
+    overlap: int = EXTRACTION_CHUNK_OVERLAP
+) -> List[str]:
+    """
+    Splits a transcript into windows of at most max_chars.
+    Cuts only between lines (speaker turns / paragraphs), and each window
+    repeats up to `overlap` chars of trailing lines from the previous one
+    so a commitment spanning a boundary is seen whole at least once.
+    """
+    if len(transcript) <= max_chars:
+        return [transcript]
+
+    units = []
+    for line in transcript.splitlines(keepends=True):
+        # A single turn longer than a window is cut on sentence ends, then hard
+        while len(line) > max_chars:
+            cut = line.rfind(". ", 0, max_chars) + 1 or max_chars
+            units.append(line[:cut])
+            line = line[cut:]
+        units.append(line)
+
+    chunks = []
+    current: list[str] = []
+    size = 0
+    for unit in units:
+        if current and size + len(unit) > max_chars:
+            chunks.append("".join(current))
+
+            # Carry trailing lines into the next window as overlap
+            carried: list[str] = []
+            carried_size = 0
+            for prev in reversed(current):
+                if carried_size + len(prev) > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_size += len(prev)
+            current, size = carried, carried_size
+
+        current.append(unit)
+        size += len(unit)
+
+    if current:
+        chunks.append("".join(current))
+
+    return [c for c in chunks if c.strip()]
+
+
+# ─── Merging ──────────────────────────────────────────────────
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+_STOPWORDS = {"the", "a", "an", "to", "of", "for", "on", "with", "and"}
+
+
+def _task_tokens(task: str) -> set[str]:
+    words = re.findall(r"[a-z0-9]+", task.lower())
+    return {w for w in words if w not in _STOPWORDS}
+
+
+def _is_same_commitment(a: Commitment, b: Commitment) -> bool:
+    if a.owner and b.owner and a.owner.lower() != b.owner.lower():
+        return False
+    tokens_a, tokens_b = _task_tokens(a.task), _task_tokens(b.task)
+    if not tokens_a or not tokens_b:
+        return a.task.strip().lower() == b.task.strip().lower()
+    similarity = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    return similarity >= EXTRACTION_DEDUPE_THRESHOLD
+
+
+def _merge_into(kept: Commitment, dup: Commitment):
+    """Keeps the most specific fields of two sightings of one commitment."""
+    kept.owner = kept.owner or dup.owner
+    kept.deadline = kept.deadline or dup.deadline
+    if PRIORITY_RANK.get(dup.priority, 1) > PRIORITY_RANK.get(kept.priority, 1):
+        kept.priority = dup.priority
+    kept.is_vague = kept.is_vague and dup.is_vague
+
+
+class ChunkMerger:
+    """
+    Accumulates per-chunk results, in any order.
+    A commitment is dropped as a duplicate only when it matches one
+    from a DIFFERENT chunk — i.e. it was seen twice because windows overlap.
+    """
+
+    def __init__(self):
+        self._merged: list[tuple[int, Commitment]] = []
+
+    def add(self, chunk_index: int, commitments: List[Commitment]) -> List[Commitment]:
+        """Merges one chunk's results. Returns the commitments not seen before."""
+        new = []
+        for commitment in commitments:
+            duplicate_of = next(
+                (kept for index, kept in self._merged
+                 if index != chunk_index and _is_same_commitment(kept, commitment)),
+                None
+            )
+            if duplicate_of is not None:
+                _merge_into(duplicate_of, commitment)
+            else:
+                self._merged.append((chunk_index, commitment))
+                new.append(commitment)
+        return new
+
+    def result(self) -> List[Commitment]:
+        """All merged commitments in transcript order."""
+        ordered = sorted(enumerate(self._merged), key=lambda item: (item[1][0], item[0]))
+        return [commitment for _, (_, commitment) in ordered]
+
+
+def merge_chunk_commitments(per_chunk: List[List[Commitment]]) -> List[Commitment]:
+    """Flattens per-chunk results in transcript order, dropping overlap duplicates."""
+    merger = ChunkMerger()
+    for chunk_index, commitments in enumerate(per_chunk):
+        merger.add(chunk_index, commitments)
+    return merger.result()
+
+
+def _collect_results(
+    chunks: List[str],
+    results: list,
+    known: List[Commitment] = ()
+) -> tuple[List[Commitment], int]:
+    """
+    Turns batch results into merged commitments + the number of failed chunks.
+    `known` (the rule pass's commitments) are merged in first.
+    Failed chunks are logged and skipped; only if every chunk failed
+    and nothing else was found is the error raised.
+    """
+    per_chunk = [list(known)] if known else []
+    errors = []
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            errors.append(result)
+            logger.warning("Extraction failed for chunk %d/%d: %s", index + 1, len(chunks), result)
+            continue
+        per_chunk.append([Commitment(**c) for c in result["commitments"]])
+
+    if errors and not per_chunk:
+        raise errors[0]
+
+    return merge_chunk_commitments(per_chunk), len(errors)
+
+
+def _scheduled(chain):
+    """
+    chain, with each call paced and coalesced by llm_scheduler.
+    Its 429s aren't retried here — the per-chunk retries below do that,
+    after the scheduler's backoff.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def schedule(inputs: dict):
+        chunk = inputs["transcript"]
+        key = call_key("extraction", f"{PROMPT_VERSION}\n{chunk}")
+        tokens = PROMPT_TOKENS + count_tokens(chunk) + LLM_COMPLETION_TOKENS_ESTIMATE
+        return key, tokens
+
+    def run(inputs: dict, config):
+        key, tokens = schedule(inputs)
+        return llm_scheduler.call("extraction", key, lambda: chain.invoke(inputs, config), tokens, retries=0)
+
+    async def arun(inputs: dict, config):
+        key, tokens = schedule(inputs)
+        return await llm_scheduler.acall("extraction", key, lambda: chain.ainvoke(inputs, config), tokens, retries=0)
+
+    return RunnableLambda(run, afunc=arun, name="scheduled_extraction")
+
+
+def _chunk_chain():
+    """extraction_chain, scheduled, with per-chunk retries."""
+    return _scheduled(get_extraction_chain()).with_retry(
+        stop_after_attempt=EXTRACTION_MAX_RETRIES + 1,
+        wait_exponential_jitter=True
+    )
+
+
+# ─── Extraction Cache ─────────────────────────────────────────
+# Webhook retries re-send the same transcript, often re-wrapped or
+# re-indented. Results are cached under a hash of the normalized text,
+# the model and the prompt version.
+
+_cache_stats = {"hits": 0, "misses": 0}
+_cache_stats_lock = threading.Lock()
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Collapses whitespace and drops blank lines — formatting-only edits map to one key."""
+    lines = (" ".join(line.split()) for line in transcript.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extraction_cache_key(transcript: str) -> str:
+    preprocessing = (
+        f"{PREPROCESS_VERSION}:{EXTRACTION_TOKEN_BUDGET}:{EXTRACTION_BUDGET_DROP_ACTION}:{PREPROCESS_CONTEXT_TURNS}"
+        if EXTRACTION_PREPROCESS else "off"
+    )
+    payload = (
+        f"{MODEL_NAME}\n{PROMPT_VERSION}\n{EXTRACTION_MODE}\n{RULES_VERSION}\n{preprocessing}\n"
+        f"{normalize_transcript(transcript)}"
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _count(outcome: str):
+    with _cache_stats_lock:
+        _cache_stats[outcome] += 1
+
+
+def extraction_cache_stats() -> dict:
+    """Hit/miss counters since process start."""
+    with _cache_stats_lock:
+        hits, misses = _cache_stats["hits"], _cache_stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0
+    }
+
+
+def _cache_lookup(key: str) -> List[Commitment] | None:
+    cached = get_cached_extraction(key, EXTRACTION_CACHE_MAX_AGE_S)
+    if cached is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return [Commitment(**c) for c in json.loads(cached)]
+
+
+def _cache_store(key: str, commitments: List[Commitment]):
+    put_cached_extraction(
+        key,
+        json.dumps([c.model_dump() for c in commitments]),
+        max_entries=EXTRACTION_CACHE_MAX_ENTRIES,
+        max_age_s=EXTRACTION_CACHE_MAX_AGE_S
+    )
+
+
+# ─── Rule Fast Path ───────────────────────────────────────────
+# The transcript is preprocessed first (app.preprocess), then
+# EXTRACTION_MODE picks who reads it:
+#   hybrid — app.rules claims explicit commitments, the LLM gets the leftover
+#   rules  — rules only, no LLM call at all
+#   llm    — the whole transcript goes to the LLM
+# Rule savings are estimates: skipped characters ~4 per token, and
+# skipped waves of concurrent chunk calls at the observed time per wave.
+# Preprocessing savings are counted in tokens, before and after.
+
+_rules_stats = {
+    "transcripts": 0, "rule_commitments": 0, "llm_commitments": 0,
+    "llm_calls": 0, "llm_calls_saved": 0,
+    "est_prompt_tokens_saved": 0, "est_latency_saved_ms": 0.0,
+    "tokens_raw": 0, "tokens_preprocessed": 0, "tokens_to_llm": 0,
+    "turns_dropped": 0, "budget_truncated": 0
+}
+_wave_ms = {"total": 0.0, "waves": 0}
+_rules_lock = threading.Lock()
+
+CHARS_PER_TOKEN = 4
+PROMPT_TOKENS = (len(SYSTEM_PROMPT) + len(HUMAN_PROMPT)) // CHARS_PER_TOKEN
+
+
+def _waves(chunk_count: int) -> int:
+    return math.ceil(chunk_count / EXTRACTION_MAX_CONCURRENCY)
+
+
+def _preprocess(transcript: str, report: ExtractionReport) -> str:
+    """The transcript as extraction sees it, with the token counts recorded on the report."""
+    if EXTRACTION_PREPROCESS:
+        preprocessed = preprocess_transcript(transcript)
+        text = preprocessed.text
+        report.tokens_raw = preprocessed.tokens_raw
+        report.tokens_preprocessed = preprocessed.tokens
+        report.turns_dropped = preprocessed.turns_dropped
+        report.budget_truncated = preprocessed.budget_truncated
+    else:
+        text = transcript
+        report.tokens_raw = report.tokens_preprocessed = count_tokens(transcript)
+    report.preprocess_reduction = (
+        round(1 - report.tokens_preprocessed / report.tokens_raw, 3) if report.tokens_raw else 0.0
     )
-])
+    return text
+
+
+def _rule_pass(transcript: str, report: ExtractionReport) -> tuple[List[Commitment], List[str]]:
+    """
+    Preprocesses the transcript, then runs the rules per EXTRACTION_MODE.
+    Returns their commitments and the chunks left for the LLM.
+    """
+    raw_chars = len(transcript)
+    transcript = _preprocess(transcript, report)
+    if EXTRACTION_MODE == "llm":
+        rule_commitments, llm_text = [], transcript
+    else:
+        rule_commitments, llm_text = extract_explicit(transcript)
+        if EXTRACTION_MODE == "rules":
+            llm_text = ""
+
+    chunks = split_transcript(llm_text) if llm_text.strip() else []
+    full_chunks = len(split_transcript(transcript)) if llm_text != transcript else len(chunks)
+
+    report.mode = EXTRACTION_MODE
+    report.rule_commitments = len(rule_commitments)
+    report.llm_calls = len(chunks)
+    report.llm_calls_saved = full_chunks - len(chunks)
+    report.chars_total = raw_chars
+    report.chars_to_llm = len(llm_text)
+    report.tokens_to_llm = count_tokens(llm_text) if chunks else 0
+    # What the rules saved — preprocessing is counted separately
+    report.est_prompt_tokens_saved = (
+        (len(transcript) - report.chars_to_llm) // CHARS_PER_TOKEN
+        + report.llm_calls_saved * PROMPT_TOKENS
+    )
+    with _rules_lock:
+        per_wave = _wave_ms["total"] / _wave_ms["waves"] if _wave_ms["waves"] else 0.0
+    report.est_latency_saved_ms = round(per_wave * (_waves(full_chunks) - _waves(len(chunks))), 1)
+    return rule_commitments, chunks
+
+
+def _record_llm_time(elapsed_s: float, chunk_count: int):
+    with _rules_lock:
+        _wave_ms["total"] += elapsed_s * 1000
+        _wave_ms["waves"] += _waves(chunk_count)
+
+
+def _finish_report(report: ExtractionReport, commitments: List[Commitment], started: float):
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if report.cached:
+        return
+
+    # Rule commitments are merged in first, so they all survive the merge
+    report.llm_commitments = len(commitments) - report.rule_commitments
+    report.rules_fraction = report.rule_commitments / len(commitments) if commitments else 0.0
+    with _rules_lock:
+        _rules_stats["transcripts"] += 1
+        for field in ("rule_commitments", "llm_commitments", "llm_calls",
+                      "llm_calls_saved", "est_prompt_tokens_saved", "est_latency_saved_ms",
+                      "tokens_raw", "tokens_preprocessed", "tokens_to_llm", "turns_dropped",
+                      "budget_truncated"):
+            _rules_stats[field] += getattr(report, field)
+    extraction_tokens.inc(report.tokens_raw, stage="raw")
+    extraction_tokens.inc(report.tokens_preprocessed, stage="preprocessed")
+    extraction_tokens.inc(report.tokens_to_llm, stage="llm")
+
+
+def extraction_stats() -> dict:
+    """Rule fast-path and preprocessing totals since process start."""
+    with _rules_lock:
+        stats = dict(_rules_stats)
+    total = stats["rule_commitments"] + stats["llm_commitments"]
+    stats["mode"] = EXTRACTION_MODE
+    stats["preprocess"] = EXTRACTION_PREPROCESS
+    stats["rules_fraction"] = stats["rule_commitments"] / total if total else 0.0
+    stats["preprocess_reduction"] = (
+        round(1 - stats["tokens_preprocessed"] / stats["tokens_raw"], 3) if stats["tokens_raw"] else 0.0
+    )
+    stats["est_latency_saved_ms"] = round(stats["est_latency_saved_ms"], 1)
+    return stats
+
+
+# ─── Extraction ───────────────────────────────────────────────
+
+def extract_commitments(
+    transcript: str,
+    use_cache: bool = True,
+    report: ExtractionReport | None = None
+) -> List[Commitment]:
+    """
+    Extracts commitments: the rule pass first (per EXTRACTION_MODE), then
+    the leftover text chunk by chunk through the LLM.
+    Chunks run concurrently (at most EXTRACTION_MAX_CONCURRENCY at once),
+    each retried on failure, and the results are merged + deduplicated.
+    use_cache=False forces a fresh extraction (the result is still cached).
+    Pass a `report` to get what the rules resolved and what was saved.
+    """
+    started = time.perf_counter()
+    report = report if report is not None else ExtractionReport()
+    key = extraction_cache_key(transcript)
+    if use_cache:
+        cached = _cache_lookup(key)
+        if cached is not None:
+            report.cached = True
+            _finish_report(report, cached, started)
+            return cached
+
+    rule_commitments, chunks = _rule_pass(transcript, report)
+    results = []
+    if chunks:
+        llm_started = time.perf_counter()
+        results = _chunk_chain().batch(
+            [{"transcript": chunk} for chunk in chunks],
+            config={"max_concurrency": EXTRACTION_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        _record_llm_time(time.perf_counter() - llm_started, len(chunks))
+    commitments, failed = _collect_results(chunks, results, rule_commitments)
+    # Partial results are never cached
+    if not failed:
+        _cache_store(key, commitments)
+    _finish_report(report, commitments, started)
+    return commitments
+
+
+async def extract_commitments_async(
+    transcript: str,
+    use_cache: bool = True,
+    report: ExtractionReport | None = None
+) -> List[Commitment]:
+    """Same as extract_commitments, without blocking the event loop."""
+    started = time.perf_counter()
+    report = report if report is not None else ExtractionReport()
+    key = extraction_cache_key(transcript)
+    if use_cache:
+        cached = await asyncio.to_thread(_cache_lookup, key)
+        if cached is not None:
+            report.cached = True
+            _finish_report(report, cached, started)
+            return cached
+
+    # Preprocessing, token counting and the rules are CPU work — off the event loop
+    rule_commitments, chunks = await asyncio.to_thread(_rule_pass, transcript, report)
+    results = []
+    if chunks:
+        llm_started = time.perf_counter()
+        results = await _chunk_chain().abatch(
+            [{"transcript": chunk} for chunk in chunks],
+            config={"max_concurrency": EXTRACTION_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        _record_llm_time(time.perf_counter() - llm_started, len(chunks))
+    commitments, failed = _collect_results(chunks, results, rule_commitments)
+    if not failed:
+        await asyncio.to_thread(_cache_store, key, commitments)
+    _finish_report(report, commitments, started)
+    return commitments
+
+
+async def iter_extract_commitments(
+    transcript: str,
+    use_cache: bool = True,
+    report: ExtractionReport | None = None
+) -> AsyncIterator[List[Commitment]]:
+    """
+    Streaming extraction: yields the rule pass's commitments at once, then
+    each chunk's NEW commitments as soon as that chunk finishes
+    (completion order, not transcript order).
+    Chunks run with the same bounded fan-out and per-chunk retries.
+    Duplicates found later are merged into the already-yielded objects,
+    so the final merged list is the yielded objects themselves.
+    """
+    started = time.perf_counter()
+    report = report if report is not None else ExtractionReport()
+    key = extraction_cache_key(transcript)
+    if use_cache:
+        cached = await asyncio.to_thread(_cache_lookup, key)
+        if cached is not None:
+            report.cached = True
+            _finish_report(report, cached, started)
+            yield cached
+            return
+
+    rule_commitments, chunks = await asyncio.to_thread(_rule_pass, transcript, report)
+    merger = ChunkMerger()
+    if rule_commitments:
+        yield merger.add(-1, rule_commitments)
+
+    chain = _chunk_chain() if chunks else None
+    semaphore = asyncio.Semaphore(EXTRACTION_MAX_CONCURRENCY)
+
+    async def run(index: int, chunk: str):
+        async with semaphore:
+            try:
+                return index, await chain.ainvoke({"transcript": chunk})
+            except Exception as e:
+                return index, e
 
-extraction_chain = prompt | llm | parser
+    errors = []
+    llm_started = time.perf_counter()
+    for next_done in asyncio.as_completed([run(i, c) for i, c in enumerate(chunks)]):
+        index, result = await next_done
+        if isinstance(result, Exception):
+            errors.append(result)
+            logger.warning("Extraction failed for chunk %d/%d: %s", index + 1, len(chunks), result)
+            continue
+        new = merger.add(index, [Commitment(**c) for c in result["commitments"]])
+        if new:
+            yield new
 
+    if chunks:
+        _record_llm_time(time.perf_counter() - llm_started, len(chunks))
+    if errors and len(errors) == len(chunks) and not rule_commitments:
+        raise errors[0]
+    if not errors:
+        await asyncio.to_thread(_cache_store, key, merger.result())
+    _finish_report(report, merger.result(), started)
 
-def extract_commitments(transcript: str) -> List[Commitment]:
-    result = extraction_chain.invoke({"transcript": transcript})
-    commitments = [Commitment(**c) for c in result["commitments"]]
-    return commitments
\ No newline at end of file
@@ -0,0 +1,209 @@
+import json
+import logging
+import threading
+import time
+from app.config import VECTOR_INDEX_BATCH_SIZE, VECTOR_INDEX_POLL_S, VECTOR_INDEX_MAX_BACKOFF_S
+from app.memory import (
+    claim_outbox_batch, complete_outbox, fail_outbox, outbox_stats, outbox_signal,
+    take_dirty_workspaces, use_workspace, embed_texts, get_chroma_collection,
+    get_store, get_query_cache
+)
+from app.workspaces import list_workspaces, open_workspace
+from app.metrics import timed, vector_index_rows
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Vector Indexer ───────────────────────────────────────────
+# Drains vector_outbox into Chroma off the request path. Upserts,
+# metadata-only updates (status changes), archive moves and deletes are
+# keyed by commitment id, so re-applying a batch after a
+# crash or a failed delete is harmless. A failing batch is retried
+# with exponential backoff; the rows stay queued (and searchable
+# through the read-through) until Chroma accepts them.
+# Workspaces with queued rows are served round-robin, one batch each,
+# so one tenant's backfill doesn't hold up everyone else's indexing.
+
+class VectorIndexer:
+    def __init__(self, batch_size: int = VECTOR_INDEX_BATCH_SIZE, poll_s: float = VECTOR_INDEX_POLL_S):
+        self.batch_size = batch_size
+        self.poll_s = poll_s
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        # drain() runs from the thread and from scripts — one at a time
+        self._drain_lock = threading.Lock()
+        self.indexed = 0
+        self.failures = 0
+        self.last_error: str | None = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vector-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stops the thread; anything still queued is indexed on the next start."""
+        self._stop.set()
+        outbox_signal.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # Rows left queued by a previous run, in any workspace
+        active = set(list_workspaces())
+        while not self._stop.is_set():
+            active |= take_dirty_workspaces()
+            if not self._serve(active):
+                outbox_signal.wait(self.poll_s)
+                outbox_signal.clear()
+
+    def _serve(self, active: set[str]) -> bool:
+        """
+        One batch for each active workspace; drops the ones drained or
+        failing from `active`. Returns whether any rows were applied.
+        """
+        progressed = False
+        for workspace_id in sorted(active):
+            try:
+                # Files from an older schema are migrated first (once per process)
+                open_workspace(workspace_id)
+                with use_workspace(workspace_id):
+                    applied = self.drain_once()
+                    done = not applied and outbox_stats()["depth"] == 0
+            except Exception:
+                # Back in `active` with its next write; logging every poll would flood the log
+                logger.exception("Vector indexer iteration failed for workspace %s", workspace_id)
+                applied, done = 0, True
+            progressed = progressed or bool(applied)
+            if done:
+                active.discard(workspace_id)
+        return progressed
+
+    def drain_once(self) -> int:
+        """Applies one batch of the current workspace's due outbox rows. Returns how many it applied."""
+        with self._drain_lock:
+            rows = claim_outbox_batch(self.batch_size)
+            if not rows:
+                return 0
+
+            # Newest row per commitment carries its full current state
+            latest: dict[str, dict] = {}
+            for row in rows:
+                latest[row["commitment_id"]] = row
+            upserts = [row for row in latest.values() if row["op"] == "upsert"]
+            updates = [row for row in latest.values() if row["op"] == "update"]
+            archives = [row for row in latest.values() if row["op"] == "archive"]
+            deletes = [row["commitment_id"] for row in latest.values() if row["op"] == "delete"]
+
+            try:
+                embeddings = self._apply(upserts, updates, archives, deletes)
+            except Exception as e:
+                attempts = max(row["attempts"] for row in rows) + 1
+                backoff = min(VECTOR_INDEX_MAX_BACKOFF_S, 2 ** attempts)
+                fail_outbox([row["seq"] for row in rows], str(e), backoff)
+                self.failures += 1
+                self.last_error = str(e)
+                vector_index_rows.inc(len(rows), outcome="error")
+                logger.warning("Vector indexing of %d rows failed (retry in %ss): %s", len(rows), backoff, e)
+                return 0
+
+            complete_outbox({id_: row["seq"] for id_, row in latest.items()})
+            # Cached /query answers these commitments would now change
+            query_cache = get_query_cache()
+            query_cache.invalidate_near(embeddings)
+            query_cache.invalidate_ids([row["commitment_id"] for row in updates + archives] + deletes)
+
+            self.indexed += len(rows)
+            vector_index_rows.inc(len(rows), outcome="ok")
+            return len(rows)
+
+    def _apply(self, upserts: list[dict], updates: list[dict], archives: list[dict], deletes: list[str]) -> list:
+        collection = get_chroma_collection()
+        batch_size = get_store().chroma_batch_size()
+        embeddings = []
+        if upserts:
+            documents = [row["document"] for row in upserts]
+            with timed("vector_index_embed"):
+                embeddings = embed_texts(documents)
+            with timed("vector_index_upsert"):
+                for start in range(0, len(upserts), batch_size):
+                    end = start + batch_size
+                    collection.upsert(
+                        ids=[row["commitment_id"] for row in upserts[start:end]],
+                        documents=documents[start:end],
+                        embeddings=embeddings[start:end],
+                        metadatas=[json.loads(row["metadata"]) for row in upserts[start:end]]
+                    )
+        if updates:
+            # Metadata only — one batched update, nothing re-embedded
+            with timed("vector_index_update"):
+                for start in range(0, len(updates), batch_size):
+                    end = start + batch_size
+                    collection.update(
+                        ids=[row["commitment_id"] for row in updates[start:end]],
+                        metadatas=[json.loads(row["metadata"]) for row in updates[start:end]]
+                    )
+        if archives:
+            with timed("vector_index_archive"):
+                self._move_to_archive(collection, archives, batch_size)
+        if deletes:
+            with timed("vector_index_delete"):
+                collection.delete(ids=deletes)
+        return embeddings
+
+    def _move_to_archive(self, collection, archives: list[dict], batch_size: int):
+        """
+        Copies vectors to the archive collection, then deletes them from
+        the live one. Vectors never indexed (or already moved) are embedded
+        from the queued document.
+        """
+        ids = [row["commitment_id"] for row in archives]
+        stored = collection.get(ids=ids, include=["embeddings"])
+        vectors = dict(zip(stored["ids"], stored["embeddings"]))
+        missing = [row for row in archives if row["commitment_id"] not in vectors]
+        if missing:
+            vectors.update(zip(
+                [row["commitment_id"] for row in missing],
+                embed_texts([row["document"] for row in missing])
+            ))
+
+        archive = get_chroma_collection(archive=True)
+        for start in range(0, len(archives), batch_size):
+            chunk = archives[start:start + batch_size]
+            archive.upsert(
+                ids=[row["commitment_id"] for row in chunk],
+                documents=[row["document"] for row in chunk],
+                embeddings=[vectors[row["commitment_id"]] for row in chunk],
+                metadatas=[json.loads(row["metadata"]) for row in chunk]
+            )
+        collection.delete(ids=ids)
+
+    def drain(self, timeout: float = None) -> int:
+        """
+        Indexes everything due in the current workspace, inline. For scripts
+        and tests that run without the app, or need Chroma caught up first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        total = 0
+        while deadline is None or time.monotonic() < deadline:
+            applied = self.drain_once()
+            if not applied:
+                break
+            total += applied
+        return total
+
+    def status(self) -> dict:
+        """Process-wide counters plus the current workspace's outbox."""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "indexed": self.indexed,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            **outbox_stats()
+        }
+
+
+vector_indexer = VectorIndexer()
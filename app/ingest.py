@@ -0,0 +1,208 @@
+import asyncio
+from typing import Callable, Optional
+from app.config import BATCH_EXTRACTION_CONCURRENCY
+from app.schemas import (
+    IngestRequest, IngestResponse, Commitment, RiskFlag, ExtractionReport,
+    BatchIngestRequest, BatchIngestResponse, BatchIngestItemResult
+)
+from app.extractor import extract_commitments, extract_commitments_async, iter_extract_commitments
+from app.memory import save_meeting, save_commitments, save_meetings_batch
+from app.metrics import timed
+from app.risk_engine import (
+    assess_meeting, assess_meetings, calculate_health_score,
+    prepare_assessment, refresh_affected_risks, detect_risks, run_check, CHECKS
+)
+
+
+class NoCommitmentsError(ValueError):
+    """The transcript produced no commitments."""
+
+
+# ─── Pipeline Steps ───────────────────────────────────────────
+
+def _persist(title: str, commitments: list[Commitment]) -> str:
+    """Saves the meeting + its commitments. Returns meeting_id."""
+    with timed("save_meeting"):
+        meeting_id = save_meeting(title)
+    with timed("save_commitments"):
+        save_commitments(meeting_id, title, commitments)
+    return meeting_id
+
+
+def _build_response(
+    request: IngestRequest,
+    meeting_id: str,
+    commitments: list[Commitment],
+    flags: list[RiskFlag],
+    report: ExtractionReport | None = None
+) -> IngestResponse:
+    score, label = calculate_health_score(flags)
+    return IngestResponse(
+        meeting_id=meeting_id,
+        meeting_title=request.meeting_title,
+        commitments_extracted=len(commitments),
+        health_score=score,
+        health_label=label,
+        commitments=commitments,
+        risk_flags=flags,
+        extraction=report
+    )
+
+
+# ─── Sync Pipeline ────────────────────────────────────────────
+
+def run_ingest(request: IngestRequest) -> IngestResponse:
+    """
+    Raw transcript → extracted commitments →
+    saved to memory → risks detected → health score.
+    """
+    report = ExtractionReport()
+    with timed("extract_commitments"):
+        commitments = extract_commitments(
+            request.content, use_cache=not request.bypass_cache, report=report
+        )
+    if not commitments:
+        raise NoCommitmentsError("No commitments found in transcript")
+
+    meeting_id = _persist(request.meeting_title, commitments)
+    with timed("detect_risks"):
+        flags = assess_meeting(meeting_id, commitments)
+    return _build_response(request, meeting_id, commitments, flags, report)
+
+
+# ─── Async Pipeline ───────────────────────────────────────────
+
+async def run_ingest_async(
+    request: IngestRequest,
+    on_stage: Optional[Callable[[str, float], None]] = None
+) -> IngestResponse:
+    """
+    Same pipeline for background jobs.
+    Extraction awaits the model; the blocking SQLite/Chroma work runs in a thread.
+    on_stage(stage, progress) is called as each step starts.
+    """
+    def report(stage: str, progress: float):
+        if on_stage:
+            on_stage(stage, progress)
+
+    report("extracting", 0.1)
+    extraction = ExtractionReport()
+    with timed("extract_commitments"):
+        commitments = await extract_commitments_async(
+            request.content, use_cache=not request.bypass_cache, report=extraction
+        )
+    if not commitments:
+        raise NoCommitmentsError("No commitments found in transcript")
+
+    report("saving", 0.5)
+    meeting_id = await asyncio.to_thread(_persist, request.meeting_title, commitments)
+
+    report("detecting_risks", 0.75)
+    with timed("detect_risks"):
+        flags = await asyncio.to_thread(assess_meeting, meeting_id, commitments)
+
+    return _build_response(request, meeting_id, commitments, flags, extraction)
+
+
+# ─── Batch Pipeline ───────────────────────────────────────────
+
+async def run_batch_ingest_async(request: BatchIngestRequest) -> BatchIngestResponse:
+    """
+    Ingests many transcripts in one go.
+    Extraction runs BATCH_EXTRACTION_CONCURRENCY transcripts at a time;
+    every successful item is then saved in a single transaction and
+    risk-assessed from a single RiskContext.
+    A failed item is reported in its result and does not fail the batch.
+    """
+    semaphore = asyncio.Semaphore(BATCH_EXTRACTION_CONCURRENCY)
+
+    async def extract(item: IngestRequest) -> list[Commitment]:
+        async with semaphore:
+            return await extract_commitments_async(item.content, use_cache=not item.bypass_cache)
+
+    with timed("extract_commitments"):
+        extracted = await asyncio.gather(
+            *(extract(item) for item in request.items),
+            return_exceptions=True
+        )
+
+    results = [BatchIngestItemResult(meeting_title=item.meeting_title, status="failed")
+               for item in request.items]
+    ready = []
+    for index, commitments in enumerate(extracted):
+        if isinstance(commitments, Exception):
+            results[index].error = str(commitments)
+        elif not commitments:
+            results[index].error = "No commitments found in transcript"
+        else:
+            ready.append(index)
+
+    all_flags: list[RiskFlag] = []
+    if ready:
+        meetings = [(request.items[i].meeting_title, extracted[i]) for i in ready]
+        with timed("save_commitments"):
+            meeting_ids = await asyncio.to_thread(save_meetings_batch, meetings)
+        with timed("detect_risks"):
+            flags_per_meeting = await asyncio.to_thread(
+                assess_meetings,
+                [(meeting_id, extracted[i]) for meeting_id, i in zip(meeting_ids, ready)]
+            )
+
+        for index, meeting_id, flags in zip(ready, meeting_ids, flags_per_meeting):
+            result = results[index]
+            result.status = "ok"
+            result.meeting_id = meeting_id
+            result.commitments = extracted[index]
+            result.commitments_extracted = len(extracted[index])
+            result.risk_flags = flags
+            all_flags.extend(flags)
+
+    score, label = calculate_health_score(all_flags)
+    return BatchIngestResponse(
+        total_items=len(request.items),
+        succeeded=len(ready),
+        failed=len(request.items) - len(ready),
+        commitments_extracted=sum(r.commitments_extracted for r in results),
+        health_score=score,
+        health_label=label,
+        results=results
+    )
+
+
+# ─── Streaming Pipeline ───────────────────────────────────────
+
+async def stream_ingest(request: IngestRequest):
+    """
+    Same pipeline, yielding (event, data) as results become available:
+    accepted → commitments (per finished chunk) → meeting_saved →
+    risk_flags (per check) → done (the full IngestResponse).
+    """
+    yield "accepted", {"meeting_title": request.meeting_title}
+
+    commitments: list[Commitment] = []
+    extraction = ExtractionReport()
+    async for new in iter_extract_commitments(
+        request.content, use_cache=not request.bypass_cache, report=extraction
+    ):
+        commitments.extend(new)
+        yield "commitments", {"commitments": [c.model_dump() for c in new]}
+
+    if not commitments:
+        raise NoCommitmentsError("No commitments found in transcript")
+
+    meeting_id = await asyncio.to_thread(_persist, request.meeting_title, commitments)
+    yield "meeting_saved", {"meeting_id": meeting_id, "commitments_saved": len(commitments)}
+
+    with timed("risk_context_load"):
+        context, affected = await asyncio.to_thread(prepare_assessment, [meeting_id])
+    for name, _ in CHECKS:
+        flags = run_check(name, commitments, context, meeting_id=meeting_id)
+        yield "risk_flags", {"check": name, "risk_flags": [f.model_dump() for f in flags]}
+
+    with timed("refresh_risk_flags"):
+        await asyncio.to_thread(refresh_affected_risks, context, affected)
+
+    # Final flags in the same per-commitment order as /ingest
+    flags = detect_risks(commitments, meeting_id=meeting_id, context=context)
+    response = _build_response(request, meeting_id, commitments, flags, extraction)
+    yield "done", response.model_dump()
@@ -0,0 +1,143 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from app.config import INGEST_QUEUE_MAX_DEPTH, INGEST_WORKERS, INGEST_JOB_RETENTION
+from app.schemas import IngestRequest, IngestJobStatus
+from app.ingest import run_ingest_async
+from app.memory import current_workspace, use_workspace
+
+
+class QueueFullError(Exception):
+    """The ingest queue is at INGEST_QUEUE_MAX_DEPTH."""
+
+
+# ─── Job Record ───────────────────────────────────────────────
+
+class IngestJob:
+    def __init__(self, request: IngestRequest):
+        self.id = str(uuid.uuid4())
+        self.request = request
+        # Jobs run in, and are only visible from, the submitting workspace
+        self.workspace_id = current_workspace()
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+
+    def update(self, status: str = None, stage: str = None, progress: float = None):
+        if status is not None:
+            self.status = status
+        if stage is not None:
+            self.stage = stage
+        if progress is not None:
+            self.progress = progress
+        self.updated_at = datetime.now().isoformat()
+
+    def to_status(self) -> IngestJobStatus:
+        return IngestJobStatus(
+            job_id=self.id,
+            status=self.status,
+            stage=self.stage,
+            progress=self.progress,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            error=self.error,
+            result=self.result
+        )
+
+
+# ─── Queue + Worker Pool ──────────────────────────────────────
+
+class IngestJobQueue:
+    """
+    Bounded in-process queue drained by a fixed pool of async workers.
+    Finished jobs are kept for polling until `retention` newer jobs exist.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = INGEST_QUEUE_MAX_DEPTH,
+        workers: int = INGEST_WORKERS,
+        retention: int = INGEST_JOB_RETENTION
+    ):
+        self.max_depth = max_depth
+        self.workers = workers
+        self.retention = retention
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: IngestRequest) -> IngestJob:
+        if self._queue is None:
+            raise RuntimeError("Ingest job queue is not running")
+
+        job = IngestJob(request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Ingest queue is full ({self.max_depth} jobs waiting)")
+
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> IngestJob | None:
+        """The job, if it belongs to the current workspace."""
+        job = self._jobs.get(job_id)
+        if job is None or job.workspace_id != current_workspace():
+            return None
+        return job
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _prune(self):
+        """Drops the oldest finished jobs beyond the retention limit."""
+        excess = len(self._jobs) - self.retention
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in ("completed", "failed"):
+                del self._jobs[job_id]
+                excess -= 1
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.update(status="running")
+                with use_workspace(job.workspace_id):
+                    job.result = await run_ingest_async(
+                        job.request,
+                        on_stage=lambda stage, progress: job.update(stage=stage, progress=progress)
+                    )
+                job.update(status="completed", stage="completed", progress=1.0)
+            except asyncio.CancelledError:
+                job.error = "Cancelled on shutdown"
+                job.update(status="failed")
+                raise
+            except Exception as e:
+                job.error = str(e)
+                job.update(status="failed")
+            finally:
+                self._queue.task_done()
+
+
+ingest_jobs = IngestJobQueue()
@@ -0,0 +1,382 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable
+from app.config import (
+    MODEL_NAME, LLM_SINGLE_FLIGHT, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_QUEUE_WAIT_S, LLM_RATE_LIMIT_RETRIES, LLM_BACKOFF_BASE_S, LLM_MAX_BACKOFF_S
+)
+from app.metrics import llm_queue_wait_seconds, llm_coalesced, llm_rate_limited
+
+logger = logging.getLogger(__name__)
+
+
+# ─── LLM Call Scheduler ───────────────────────────────────────
+# Every extraction chunk and /query answer goes through one scheduler:
+# - single flight: a call identical to one already in flight (a retried
+#   webhook, a double-clicked question) waits for that call's result
+#   instead of making its own
+# - token buckets for requests and tokens per minute pace calls below
+#   the provider's limits. A call that would queue longer than
+#   LLM_MAX_QUEUE_WAIT_S fails fast with LLMRateLimitedError (a 429)
+# - a 429 from the provider halves the refill rate and pauses every call
+#   for an exponential backoff (or the provider's Retry-After); each
+#   success afterwards wins back 5% of the rate
+# Calls are plain callables, so any fake model can stand in for the real one.
+
+class LLMRateLimitedError(Exception):
+    """The provider is rate limiting us, or a call would queue too long. Retry after retry_after seconds."""
+
+    def __init__(self, retry_after: float, detail: str = None):
+        self.retry_after = max(1.0, retry_after)
+        super().__init__(detail or f"LLM rate limit reached; retry in {self.retry_after:.0f}s")
+
+
+class _FlightAbandoned(Exception):
+    """The flight's leader was cancelled before it finished; a follower runs the call instead."""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """A provider 429 — openai.RateLimitError, or anything carrying status_code 429."""
+    return (
+        getattr(error, "status_code", None) == 429
+        or getattr(getattr(error, "response", None), "status_code", None) == 429
+        or type(error).__name__ == "RateLimitError"
+    )
+
+
+def _retry_after(error: Exception) -> float | None:
+    """The provider's Retry-After header, in seconds, when it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_key(caller: str, payload: str) -> str:
+    """Single-flight key: calls with the same caller, model and payload are identical."""
+    return hashlib.sha256(f"{caller}\n{MODEL_NAME}\n{payload}".encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """Refills `per_minute` units a minute, up to a minute's worth. `waiting`: units queued for it."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.waiting = 0.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, rate_factor: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60 * rate_factor)
+        self.updated = now
+
+    def wait_for(self, amount: float, rate_factor: float, ahead: float = 0.0) -> float:
+        """Seconds until `amount` would be covered, after `ahead` units for calls queued first."""
+        shortfall = ahead + min(amount, self.capacity) - self.level
+        return max(0.0, shortfall / (self.capacity / 60 * rate_factor))
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_queue_wait_s: float = LLM_MAX_QUEUE_WAIT_S,
+        rate_limit_retries: int = LLM_RATE_LIMIT_RETRIES,
+        backoff_base_s: float = LLM_BACKOFF_BASE_S,
+        max_backoff_s: float = LLM_MAX_BACKOFF_S,
+        single_flight: bool = LLM_SINGLE_FLIGHT
+    ):
+        # (bucket, counts tokens) for each enabled limit — requests take 1 unit a call
+        self.buckets = [
+            (TokenBucket(limit), counts_tokens)
+            for limit, counts_tokens in ((requests_per_minute, False), (tokens_per_minute, True)) if limit > 0
+        ]
+        self.max_queue_wait_s = max_queue_wait_s
+        self.rate_limit_retries = rate_limit_retries
+        self.backoff_base_s = backoff_base_s
+        self.max_backoff_s = max_backoff_s
+        self.single_flight = single_flight
+
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future] = {}
+        # Adaptive pacing: fraction of the configured rate, and a global pause after a 429
+        self.rate_factor = 1.0
+        self._paused_until = 0.0
+        self._consecutive_429s = 0
+        self.in_flight: dict[str, int] = {}
+        self.queued: dict[str, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.rejected = 0
+
+    # ─── Pacing ───────────────────────────────────────────────
+
+    def _wait(self, now: float, takes: list, queued: bool) -> float:
+        """Seconds until the call may go: after any 429 pause, and (queued) behind every waiting call."""
+        for bucket, _ in takes:
+            bucket.refill(now, self.rate_factor)
+        return max(
+            [self._paused_until - now]
+            + [bucket.wait_for(amount, self.rate_factor, bucket.waiting if queued else 0.0) for bucket, amount in takes]
+        )
+
+    def _reject(self, caller: str, wait: float):
+        self.rejected += 1
+        llm_rate_limited.inc(caller=caller, reason="queue_wait")
+        raise LLMRateLimitedError(wait, f"LLM calls are queued {wait:.0f}s deep; retry later")
+
+    def _enqueue(self, caller: str, tokens: int) -> list:
+        """
+        Queues one call — one request and `tokens` tokens — and returns what it
+        takes from each bucket. Fails fast with LLMRateLimitedError if the calls
+        already queued would keep it waiting longer than max_queue_wait_s.
+        """
+        with self._lock:
+            takes = [(bucket, tokens if counts_tokens else 1) for bucket, counts_tokens in self.buckets]
+            wait = self._wait(time.monotonic(), takes, queued=True)
+            if wait > self.max_queue_wait_s:
+                self._reject(caller, wait)
+            for bucket, amount in takes:
+                bucket.waiting += amount
+            return takes
+
+    def _take(self, caller: str, takes: list, queued_at: float) -> float:
+        """
+        Takes the call's units if the buckets cover them now and returns 0;
+        otherwise returns the seconds to sleep before trying again. Rechecked
+        on every wake, so a 429 pause or rate cut applies to queued calls too.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._wait(now, takes, queued=False)
+            if wait <= 0:
+                for bucket, amount in takes:
+                    bucket.waiting -= amount
+                    # A call bigger than a minute's budget still goes, once the bucket is full
+                    bucket.level -= min(amount, bucket.capacity)
+                return 0.0
+            if now - queued_at + wait > self.max_queue_wait_s:
+                self._dequeue(takes)
+                self._reject(caller, wait)
+            return wait
+
+    def _dequeue(self, takes: list):
+        """Gives up a queued call's place. Caller holds the lock."""
+        for bucket, amount in takes:
+            bucket.waiting -= amount
+
+    def _turn(self, caller: str, tokens: int):
+        """Blocks until the call may go."""
+        with self._track(self.queued, caller):
+            takes = self._enqueue(caller, tokens)
+            queued_at = time.monotonic()
+            while wait := self._take(caller, takes, queued_at):
+                time.sleep(wait)
+        llm_queue_wait_seconds.observe(time.monotonic() - queued_at, caller=caller)
+
+    async def _aturn(self, caller: str, tokens: int):
+        """_turn without blocking the event loop."""
+        with self._track(self.queued, caller):
+            takes = self._enqueue(caller, tokens)
+            queued_at = time.monotonic()
+            try:
+                while wait := self._take(caller, takes, queued_at):
+                    await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Cancelled while queued — stop holding up the calls behind it
+                with self._lock:
+                    self._dequeue(takes)
+                raise
+        llm_queue_wait_seconds.observe(time.monotonic() - queued_at, caller=caller)
+
+    def _rate_limited(self, caller: str, error: Exception) -> float:
+        """Records a provider 429: halves the rate and pauses all calls. Returns the pause in seconds."""
+        with self._lock:
+            self.rate_limited += 1
+            now = time.monotonic()
+            if now < self._paused_until:
+                # Calls already in flight when the first 429 landed — same event, back off once
+                pause = self._paused_until - now
+            else:
+                self._consecutive_429s += 1
+                self.rate_factor = max(0.1, self.rate_factor / 2)
+                backoff = min(self.max_backoff_s, self.backoff_base_s * 2 ** (self._consecutive_429s - 1))
+                pause = max(backoff, _retry_after(error) or 0.0)
+                self._paused_until = now + pause
+        llm_rate_limited.inc(caller=caller, reason="provider")
+        logger.warning("LLM rate limited (%s); pausing %.1fs at %.0f%% rate", caller, pause, self.rate_factor * 100)
+        return pause
+
+    def _succeeded(self):
+        with self._lock:
+            self.calls += 1
+            self._consecutive_429s = 0
+            self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    @contextmanager
+    def _track(self, counts: dict, caller: str):
+        with self._lock:
+            counts[caller] = counts.get(caller, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                counts[caller] -= 1
+
+    # ─── Single Flight ────────────────────────────────────────
+
+    def _join(self, key: str | None) -> tuple[Future | None, bool]:
+        """(the flight for key, whether this caller leads it). No key: no coalescing."""
+        if key is None or not self.single_flight:
+            return None, True
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def _land(self, key: str | None, future: Future | None, result=None, error: BaseException = None):
+        if future is None:
+            return
+        with self._lock:
+            self._flights.pop(key, None)
+        if error is not None and not isinstance(error, Exception):
+            # Cancelled (a client disconnect) or interrupted: the call itself didn't fail
+            error = _FlightAbandoned()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # ─── Calls ────────────────────────────────────────────────
+
+    def call(self, caller: str, key: str | None, fn: Callable, tokens: int, retries: int = None):
+        """
+        Runs fn() — one LLM call — when the rate limits allow, retrying
+        provider 429s up to `retries` times (default LLM_RATE_LIMIT_RETRIES).
+        A call with the same key already in flight is joined instead; if
+        that call's leader is cancelled, a follower retries it as the new leader.
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            llm_coalesced.inc(caller=caller)
+            try:
+                return future.result()
+            except _FlightAbandoned:
+                continue
+        try:
+            result = self._run(caller, fn, tokens, retries)
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    def _run(self, caller: str, fn: Callable, tokens: int, retries: int | None):
+        retries = self.rate_limit_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self._turn(caller, tokens)
+            with self._track(self.in_flight, caller):
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    pause = self._rate_limited(caller, e)
+                    if attempt == retries:
+                        raise LLMRateLimitedError(pause) from e
+                    continue
+            self._succeeded()
+            return result
+
+    async def acall(self, caller: str, key: str | None, fn: Callable[[], Awaitable], tokens: int, retries: int = None):
+        """call() for coroutines: waits on the event loop instead of blocking it."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            llm_coalesced.inc(caller=caller)
+            try:
+                # Shielded: a follower's own cancellation must not cancel the shared flight
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _FlightAbandoned:
+                continue
+        try:
+            result = await self._arun(caller, fn, tokens, retries)
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    async def _arun(self, caller: str, fn: Callable[[], Awaitable], tokens: int, retries: int | None):
+        retries = self.rate_limit_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            await self._aturn(caller, tokens)
+            with self._track(self.in_flight, caller):
+                try:
+                    result = await fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    pause = self._rate_limited(caller, e)
+                    if attempt == retries:
+                        raise LLMRateLimitedError(pause) from e
+                    continue
+            self._succeeded()
+            return result
+
+    async def astream(self, caller: str, fn: Callable[[], AsyncIterator], tokens: int, retries: int = None):
+        """
+        Paces a streamed call the same way. Streams are never coalesced, and
+        a 429 is only retried before the first chunk has been yielded.
+        """
+        retries = self.rate_limit_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            await self._aturn(caller, tokens)
+            started = False
+            with self._track(self.in_flight, caller):
+                try:
+                    async for chunk in fn():
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    if started or not is_rate_limit_error(e):
+                        raise
+                    pause = self._rate_limited(caller, e)
+                    if attempt == retries:
+                        raise LLMRateLimitedError(pause) from e
+                    continue
+            self._succeeded()
+            return
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "rate_limited": self.rate_limited,
+                "rejected": self.rejected,
+                "in_flight": sum(self.in_flight.values()),
+                "queued": sum(self.queued.values()),
+                "in_flight_by_caller": dict(self.in_flight),
+                "queued_by_caller": dict(self.queued),
+                "flights": len(self._flights),
+                "rate_factor": round(self.rate_factor, 3),
+                "paused_s": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            }
+
+
+llm_scheduler = LLMScheduler()
@@ -1,21 +1,71 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from app.routes import router
-from app.memory import init_db
+from app.memory import open_store, close_store
+from app.workspaces import open_workspace
+from app.jobs import ingest_jobs
+from app.indexer import vector_indexer
+from app.archive import archive_compactor
+from app.warmup import warmup
+from app.config import DEFAULT_WORKSPACE, WARMUP_ON_STARTUP, METRICS_ENABLED
+from app.metrics import (
+    http_request_seconds, start_request_timings, finish_request_timings, server_timing_header
+)
+
+
+# Open the memory store, vector indexer, archive compactor and
+# ingest workers once per process, close them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    open_store()
+    # Other workspaces are set up the first time a request names them
+    open_workspace(DEFAULT_WORKSPACE)
+    vector_indexer.start()
+    archive_compactor.start()
+    await ingest_jobs.start()
+    if WARMUP_ON_STARTUP:
+        warmup.start()
+    yield
+    await ingest_jobs.stop()
+    archive_compactor.stop()
+    vector_indexer.stop()
+    close_store()
+
 
 app = FastAPI(
     title="CommitIQ",
     description="Cross-Meeting Execution Intelligence Engine",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize database on startup
-@app.on_event("startup")
-def startup():
-    init_db()
-
 # Register all routes
 app.include_router(router, prefix="/api/v1")
 
+
+# Per-route latency histogram + Server-Timing header listing
+# the stages (extract, save, chroma, risk checks) this request ran
+if METRICS_ENABLED:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        token = start_request_timings()
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            timings = finish_request_timings(token)
+        elapsed = time.perf_counter() - started
+
+        route = request.scope.get("route")
+        http_request_seconds.observe(
+            elapsed,
+            method=request.method,
+            route=getattr(route, "path", "unmatched")
+        )
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed * 1000)
+        return response
+
 # Health check
 @app.get("/")
 def root():
@@ -23,4 +73,4 @@ def root():
         "name": "CommitIQ",
         "status": "running",
         "message": "Cross-Meeting Execution Intelligence Engine"
-    }
\ No newline at end of file
+    }
@@ -1,59 +1,532 @@
+import base64
+import contextvars
+import json
+import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
 import uuid
-from datetime import datetime
-import chromadb
-from app.config import DB_PATH, CHROMA_PATH
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from app.config import (
+    DB_PATH, CHROMA_PATH, DEFAULT_WORKSPACE, WORKSPACES_DIR, WORKSPACE_CACHE_SIZE,
+    SQLITE_POOL_SIZE, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE,
+    MINHASH_MAX_CANDIDATES, VECTOR_READ_THROUGH_MAX
+)
 from app.schemas import Commitment
+from app.query_cache import QueryAnswerCache
+from app.query_planner import OwnerIndex
+from app.metrics import timed
+from app import minhash
+from app.deadlines import DEADLINES_VERSION, resolve_due_date
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Store ────────────────────────────────────────────────────
+
+class MemoryStore:
+    """
+    Long-lived handles to one workspace's memory, created on first use.
+    - a thread-safe pool of SQLite connections in WAL mode (one file per workspace)
+    - the workspace's live and archive Chroma collections, on the shared Chroma client
+    - the workspace's /query answer cache
+    """
+
+    def __init__(self, workspace_id: str = DEFAULT_WORKSPACE, db_path: str = None,
+                 pool_size: int = SQLITE_POOL_SIZE):
+        self.workspace_id = workspace_id
+        self.db_path = db_path or workspace_db_path(workspace_id)
+        self.pool_size = pool_size
+        self.query_cache = QueryAnswerCache()
+        # (data_version, owner names, OwnerIndex) — see get_owner_names
+        self.owner_names: tuple[int, list[str], OwnerIndex] | None = None
+        # Set by app.workspaces once schema and derived tables are ensured
+        self.ready = False
+        self.init_lock = threading.Lock()
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all_connections: list[sqlite3.Connection] = []
+        self._collections: dict[bool, object] = {}
+        self._closed = False
+        self._released = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+        conn.execute(f"PRAGMA cache_size = -{int(SQLITE_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a pooled connection for the duration of the block.
+        Blocks when all pool_size connections are in use.
+        Any transaction left open is rolled back before the connection is returned.
+        """
+        if self._closed:
+            raise RuntimeError("MemoryStore is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._all_connections) < self.pool_size:
+                    conn = self._connect()
+                    self._all_connections.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._released:
+                # Evicted from the store cache while borrowed — don't pool it
+                with self._lock:
+                    self._all_connections.remove(conn)
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def embedding_function(self):
+        """Cached embedder shared by the collection and callers that embed text directly."""
+        from app.embeddings import get_embedding_function
+        return get_embedding_function()
+
+    def collection(self, archive: bool = False):
+        """
+        This workspace's live commitments collection, or its archive
+        (cold tier) one — each handle is built on first use.
+        """
+        if archive not in self._collections:
+            with self._lock:
+                if archive not in self._collections:
+                    from app.embeddings import collection_name
+                    self._collections[archive] = get_chroma_client().get_or_create_collection(
+                        name=collection_name(workspace_collection(self.workspace_id, archive)),
+                        embedding_function=self.embedding_function()
+                    )
+        return self._collections[archive]
+
+    def chroma_batch_size(self) -> int:
+        """Largest number of records the Chroma client accepts in one call."""
+        try:
+            return get_chroma_client().get_max_batch_size()
+        except AttributeError:
+            return 5000
+
+    def release(self):
+        """
+        Frees the handles of an evicted store. Idle connections close now,
+        borrowed ones when they are returned; late callers still work.
+        """
+        self._released = True
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._all_connections.remove(conn)
+                conn.close()
+            self._collections = {}
+
+    def close(self):
+        """Closes every pooled connection and drops the collection handle."""
+        self._closed = True
+        with self._lock:
+            for conn in self._all_connections:
+                conn.close()
+            self._all_connections.clear()
+            self._idle = queue.LifoQueue()
+            self._collections = {}
+
+
+def workspace_db_path(workspace_id: str) -> str:
+    """The default workspace keeps the original DB_PATH; others get their own file."""
+    if workspace_id == DEFAULT_WORKSPACE:
+        return DB_PATH
+    return os.path.join(WORKSPACES_DIR, f"{workspace_id}.db")
+
+
+def workspace_collection(workspace_id: str, archive: bool = False) -> str:
+    """
+    Chroma collection base name — "." can't appear in a workspace id, so
+    names never collide. Archive collections get an "archive." prefix.
+    """
+    name = "commitments" if workspace_id == DEFAULT_WORKSPACE else f"commitments.{workspace_id}"
+    return f"archive.{name}" if archive else name
+
+
+_chroma_client = None
+_chroma_lock = threading.Lock()
+
+
+def get_chroma_client():
+    """One Chroma client for every workspace — chromadb is only imported here."""
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_lock:
+            if _chroma_client is None:
+                import chromadb
+                _chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return _chroma_client
+
+
+# ─── Workspaces ───────────────────────────────────────────────
+# Every read and write goes to the store of the current workspace,
+# carried in a contextvar: set per request by app.workspaces, per job
+# by the ingest queue and per batch by the vector indexer.
+
+_current_workspace: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "workspace", default=DEFAULT_WORKSPACE
+)
+
+
+def current_workspace() -> str:
+    return _current_workspace.get()
+
+
+def set_current_workspace(workspace_id: str):
+    """Selects the workspace for the rest of the current context (one request)."""
+    _current_workspace.set(workspace_id)
+
+
+@contextmanager
+def use_workspace(workspace_id: str):
+    """Runs the block against workspace_id's store."""
+    token = _current_workspace.set(workspace_id)
+    try:
+        yield
+    finally:
+        _current_workspace.reset(token)
+
+
+class StoreCache:
+    """
+    Open MemoryStores by workspace id, least recently used evicted
+    beyond max_open — a deployment with many tenants keeps only the
+    active ones' connections and collection handles open. An evicted
+    store's query cache and owner memo (for up to max_open more
+    workspaces) pass to the store that reopens it.
+    """
+
+    def __init__(self, max_open: int = WORKSPACE_CACHE_SIZE):
+        self.max_open = max_open
+        self._stores: OrderedDict[str, MemoryStore] = OrderedDict()
+        self._retained: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, workspace_id: str) -> MemoryStore:
+        with self._lock:
+            store = self._stores.get(workspace_id)
+            if store is not None:
+                self._stores.move_to_end(workspace_id)
+                return store
+
+            store = self._stores[workspace_id] = MemoryStore(workspace_id)
+            retained = self._retained.pop(workspace_id, None)
+            if retained is not None:
+                store.query_cache, store.owner_names = retained
+            evicted = []
+            while len(self._stores) > self.max_open:
+                old = self._stores.popitem(last=False)[1]
+                self._retained[old.workspace_id] = (old.query_cache, old.owner_names)
+                if len(self._retained) > self.max_open:
+                    self._retained.popitem(last=False)
+                evicted.append(old)
+                self.evictions += 1
+        for old in evicted:
+            old.release()
+        return store
+
+    def close_all(self):
+        with self._lock:
+            stores = list(self._stores.values())
+            self._stores.clear()
+            self._retained.clear()
+        for store in stores:
+            store.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._stores), "max_open": self.max_open, "evictions": self.evictions}
+
+
+_stores: StoreCache | None = None
+_store_lock = threading.Lock()
+
+
+def open_store() -> MemoryStore:
+    """Creates the store cache and returns the current workspace's store. Called from the FastAPI lifespan."""
+    global _stores
+    with _store_lock:
+        if _stores is None:
+            os.makedirs(WORKSPACES_DIR, exist_ok=True)
+            _stores = StoreCache()
+        stores = _stores
+    return stores.get(current_workspace())
+
+
+def close_store():
+    """Closes every open workspace store on shutdown."""
+    global _stores
+    with _store_lock:
+        if _stores is not None:
+            _stores.close_all()
+            _stores = None
+
+
+def get_store() -> MemoryStore:
+    """
+    The current workspace's store, opening the cache on first use
+    outside the app (scripts, tests).
+    """
+    stores = _stores
+    if stores is None:
+        return open_store()
+    return stores.get(current_workspace())
+
+
+def store_cache_stats() -> dict:
+    stores = _stores
+    return stores.stats() if stores is not None else {"open": 0, "max_open": WORKSPACE_CACHE_SIZE, "evictions": 0}
+
+
+def get_query_cache() -> QueryAnswerCache:
+    """The current workspace's /query answer cache."""
+    return get_store().query_cache
 
 
 # ─── SQLite Setup ────────────────────────────────────────────
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Borrows a pooled connection: `with get_db_connection() as conn:`"""
+    return get_store().connection()
 
 
 def init_db():
     """Creates tables if they don't exist. Runs on startup."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS meetings (
-            id TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS commitments (
-            id TEXT PRIMARY KEY,
-            meeting_id TEXT NOT NULL,
-            meeting_title TEXT NOT NULL,
-            task TEXT NOT NULL,
-            owner TEXT,
-            deadline TEXT,
-            priority TEXT,
-            is_vague INTEGER,
-            status TEXT DEFAULT 'open',
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (meeting_id) REFERENCES meetings(id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-    print("Database initialized.")
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meetings (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS commitments (
+                id TEXT PRIMARY KEY,
+                meeting_id TEXT NOT NULL,
+                meeting_title TEXT NOT NULL,
+                task TEXT NOT NULL,
+                owner TEXT,
+                deadline TEXT,
+                due_date TEXT,
+                priority TEXT,
+                is_vague INTEGER,
+                status TEXT DEFAULT 'open',
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (meeting_id) REFERENCES meetings(id)
+            )
+        """)
+
+        # Databases created before due dates existed — ensure_due_dates backfills them
+        _add_column(conn, "commitments", "due_date", "TEXT")
+
+        # Filter + keyset pagination indexes for /commitments.
+        # Each ends in (created_at, id) so filtered pages are read in index order.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_created_at
+            ON commitments (created_at, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_owner
+            ON commitments (owner, created_at, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_status
+            ON commitments (status, created_at, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_meeting
+            ON commitments (meeting_id, created_at, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_priority
+            ON commitments (priority, created_at, id)
+        """)
+
+        # Due-date range filters, and the overdue check: open rows due before today
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_due_date
+            ON commitments (due_date, id)
+        """)
+        # id too: overdue flags are paged on (due_date, id)
+        cursor.execute("DROP INDEX IF EXISTS idx_commitments_status_due_date")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_status_due_date_id
+            ON commitments (status, due_date, id)
+        """)
+
+        # Cold tier: closed or old commitments moved out by compaction.
+        # Risk checks, search and listings only read it when asked to
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS commitments_archive (
+                id TEXT PRIMARY KEY,
+                meeting_id TEXT NOT NULL,
+                meeting_title TEXT NOT NULL,
+                task TEXT NOT NULL,
+                owner TEXT,
+                deadline TEXT,
+                due_date TEXT,
+                priority TEXT,
+                is_vague INTEGER,
+                status TEXT,
+                created_at TEXT NOT NULL,
+                archived_at TEXT NOT NULL
+            )
+        """)
+
+        _add_column(conn, "commitments_archive", "due_date", "TEXT")
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_archive_created_at
+            ON commitments_archive (created_at, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_commitments_archive_owner
+            ON commitments_archive (owner, created_at, id)
+        """)
+
+        # Materialized risk flags — kept up to date on every write
+        # so /risks and /health-score never re-run the risk engine
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS risk_flags (
+                commitment_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                task TEXT,
+                owner TEXT,
+                severity TEXT NOT NULL,
+                insight TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (commitment_id, position)
+            )
+        """)
+
+        # /risks pages on (created_at, commitment_id) like /commitments
+        cursor.execute("DROP INDEX IF EXISTS idx_risk_flags_created_at")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_risk_flags_page
+            ON risk_flags (created_at DESC, commitment_id DESC, position)
+        """)
+
+        # Running flag counts per type — the health score aggregate
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS risk_totals (
+                type TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        # Extraction results keyed by normalized transcript + model + prompt version
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used
+            ON extraction_cache (last_used_at)
+        """)
+
+        # MinHash near-duplicate index over tasks — one signature per
+        # commitment plus one LSH band key per band, written with the commitment
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                commitment_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS minhash_bands (
+                key INTEGER NOT NULL,
+                commitment_id TEXT NOT NULL,
+                PRIMARY KEY (key, commitment_id)
+            ) WITHOUT ROWID
+        """)
+
+        # Chroma writes waiting for the background indexer. Written in the
+        # same transaction as the commitments; each row is a full snapshot
+        # (document + metadata), so the newest row per commitment wins
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vector_outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                commitment_id TEXT NOT NULL,
+                op TEXT NOT NULL DEFAULT 'upsert',
+                document TEXT,
+                metadata TEXT,
+                enqueued_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_vector_outbox_commitment
+            ON vector_outbox (commitment_id, seq)
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+
+        conn.commit()
+    logger.info("Database initialized: %s", get_store().db_path)
+
+
+def _add_column(conn, table: str, column: str, definition: str):
+    """ALTER TABLE ... ADD COLUMN, unless the table already has it."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 
 # ─── ChromaDB Setup ──────────────────────────────────────────
 
-def get_chroma_collection():
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    collection = client.get_or_create_collection(name="commitments")
-    return collection
+def get_chroma_collection(archive: bool = False):
+    return get_store().collection(archive)
 
 
 # ─── Save Meeting ─────────────────────────────────────────────
@@ -61,13 +534,12 @@ def get_chroma_collection():
 def save_meeting(title: str) -> str:
     """Creates a meeting record. Returns meeting_id."""
     meeting_id = str(uuid.uuid4())
-    conn = get_db_connection()
-    conn.execute(
-        "INSERT INTO meetings (id, title, created_at) VALUES (?, ?, ?)",
-        (meeting_id, title, datetime.now().isoformat())
-    )
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO meetings (id, title, created_at) VALUES (?, ?, ?)",
+            (meeting_id, title, datetime.now().isoformat())
+        )
+        conn.commit()
     return meeting_id
 
 
@@ -75,86 +547,1259 @@ def save_meeting(title: str) -> str:
 
 def save_commitments(meeting_id: str, meeting_title: str, commitments: list[Commitment]):
     """
-    Saves all commitments to SQLite and ChromaDB.
-    Both stores updated together — always in sync.
+    Saves all commitments to SQLite and queues them for ChromaDB.
+    Rows and their outbox entries commit together; the background
+    indexer embeds and adds them to Chroma afterwards.
     """
-    conn = get_db_connection()
-    collection = get_chroma_collection()
+    with get_db_connection() as conn:
+        _write_commitments(conn, [(meeting_id, meeting_title, commitments)])
+        conn.commit()
 
-    for commitment in commitments:
-        commitment_id = str(uuid.uuid4())
-        created_at = datetime.now().isoformat()
+    notify_outbox()
 
-        # Save to SQLite
-        conn.execute("""
-            INSERT INTO commitments 
-            (id, meeting_id, meeting_title, task, owner, deadline, priority, is_vague, status, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'open', ?)
-        """, (
-            commitment_id,
-            meeting_id,
-            meeting_title,
-            commitment.task,
-            commitment.owner,
-            commitment.deadline,
-            commitment.priority,
-            int(commitment.is_vague),
-            created_at
-        ))
 
-        # Save to ChromaDB
-        collection.add(
-            ids=[commitment_id],
-            documents=[commitment.task],
-            metadatas=[{
+def save_meetings_batch(meetings: list[tuple[str, list[Commitment]]]) -> list[str]:
+    """
+    Saves many (title, commitments) meetings at once — one SQLite
+    transaction with executemany, Chroma writes queued in the outbox.
+    Returns the new meeting_ids in input order.
+    """
+    now = datetime.now().isoformat()
+    meeting_ids = [str(uuid.uuid4()) for _ in meetings]
+
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO meetings (id, title, created_at) VALUES (?, ?, ?)",
+            [(meeting_id, title, now) for meeting_id, (title, _) in zip(meeting_ids, meetings)]
+        )
+        _write_commitments(conn, [
+            (meeting_id, title, commitments)
+            for meeting_id, (title, commitments) in zip(meeting_ids, meetings)
+        ])
+        conn.commit()
+
+    notify_outbox()
+    return meeting_ids
+
+
+def _write_commitments(conn, groups: list[tuple[str, str, list[Commitment]]]):
+    """
+    Inserts (meeting_id, meeting_title, commitments) groups into SQLite,
+    with one vector_outbox row each for Chroma. The caller commits —
+    commitments and their outbox rows land together or not at all.
+    """
+    rows = []
+    ids, documents, metadatas = [], [], []
+    # Relative deadlines ("next Friday") count from when the meeting was held
+    meeting_times = dict(_fetch_in(
+        conn, "SELECT id, created_at FROM meetings WHERE id IN ({})",
+        list({meeting_id for meeting_id, _, _ in groups})
+    ))
+
+    for meeting_id, meeting_title, commitments in groups:
+        for commitment in commitments:
+            commitment_id = str(uuid.uuid4())
+            created_at = datetime.now().isoformat()
+            due_date = resolve_due_date(commitment.deadline, meeting_times.get(meeting_id) or created_at)
+
+            rows.append((
+                commitment_id,
+                meeting_id,
+                meeting_title,
+                commitment.task,
+                commitment.owner,
+                commitment.deadline,
+                due_date,
+                commitment.priority,
+                int(commitment.is_vague),
+                created_at
+            ))
+
+            ids.append(commitment_id)
+            documents.append(commitment.task)
+            metadatas.append(vector_metadata({
                 "meeting_id": meeting_id,
                 "meeting_title": meeting_title,
-                "owner": commitment.owner or "unassigned",
-                "deadline": commitment.deadline or "none",
+                "owner": commitment.owner,
+                "deadline": commitment.deadline,
+                "due_date": due_date,
                 "priority": commitment.priority,
                 "status": "open",
                 "created_at": created_at
-            }]
+            }))
+
+    if not rows:
+        return
+
+    bump_data_version(conn)
+
+    # Save to SQLite
+    with timed("sqlite_write"):
+        conn.executemany("""
+            INSERT INTO commitments
+            (id, meeting_id, meeting_title, task, owner, deadline, due_date, priority, is_vague, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'open', ?)
+        """, rows)
+    with timed("minhash_index"):
+        index_near_duplicates(conn, list(zip(ids, documents)))
+    with timed("outbox_enqueue"):
+        enqueue_vectors(conn, ids, documents, metadatas)
+
+
+def vector_metadata(row: dict) -> dict:
+    """Chroma metadata for a commitment row — Chroma can't store None."""
+    return {
+        "meeting_id": row["meeting_id"],
+        "meeting_title": row["meeting_title"],
+        "owner": row["owner"] or "unassigned",
+        "deadline": row["deadline"] or "none",
+        "due_date": row["due_date"] or "none",
+        "priority": row["priority"],
+        "status": row["status"],
+        "created_at": row["created_at"]
+    }
+
+
+# ─── Update Status ────────────────────────────────────────────
+
+def update_commitment_statuses(updates: dict[str, str]) -> tuple[list[dict], list[dict], list[str]]:
+    """
+    Sets the status of many commitments in one transaction and queues
+    their new Chroma metadata as outbox "update" rows (metadata only,
+    no re-embedding). Returns (changed rows with "previous_status",
+    rows already in that status, ids not found).
+    """
+    ids = list(updates)
+    with get_db_connection() as conn:
+        rows = {
+            row["id"]: dict(row) for row in _fetch_in(
+                conn, "SELECT * FROM commitments WHERE id IN ({})", ids
+            )
+        }
+
+        changed, unchanged = [], []
+        for commitment_id, status in updates.items():
+            row = rows.get(commitment_id)
+            if row is None:
+                continue
+            if row["status"] == status:
+                unchanged.append(row)
+                continue
+            changed.append({**row, "status": status, "previous_status": row["status"]})
+
+        if changed:
+            conn.executemany(
+                "UPDATE commitments SET status = ? WHERE id = ?",
+                [(row["status"], row["id"]) for row in changed]
+            )
+            enqueue_vectors(
+                conn,
+                [row["id"] for row in changed],
+                [row["task"] for row in changed],
+                [vector_metadata(row) for row in changed],
+                op="update"
+            )
+            bump_data_version(conn)
+            conn.commit()
+
+    if changed:
+        notify_outbox()
+    return changed, unchanged, [i for i in ids if i not in rows]
+
+
+# ─── Archive ──────────────────────────────────────────────────
+# Compaction moves closed or old commitments to the cold tier: the
+# commitments_archive table and the workspace's archive collection.
+# Everything derived from the live rows (MinHash index, risk flags)
+# drops them in the same transaction; the vector moves via the outbox.
+
+def find_archivable(closed_before: str = None, open_before: str = None, limit: int = 1000) -> list[str]:
+    """
+    Ids of live commitments to archive, oldest first: closed ones created
+    before closed_before, and open ones created before open_before.
+    A cutoff of None archives nothing of that kind.
+    """
+    where, params = [], []
+    if closed_before:
+        where.append("(status != 'open' AND created_at < ?)")
+        params.append(closed_before)
+    if open_before:
+        where.append("(status = 'open' AND created_at < ?)")
+        params.append(open_before)
+    if not where:
+        return []
+    sql = f"SELECT id FROM commitments WHERE {' OR '.join(where)} ORDER BY created_at, id LIMIT ?"
+    params.append(limit)
+
+    with get_db_connection() as conn:
+        return [row[0] for row in conn.execute(sql, params).fetchall()]
+
+
+def archive_commitments(ids: list[str]) -> list[dict]:
+    """
+    Moves commitments to the archive tier in one transaction and queues
+    an outbox "archive" row each, which the indexer applies by moving the
+    vector to the archive collection. Returns the rows it moved.
+    """
+    archived_at = datetime.now().isoformat()
+    with get_db_connection() as conn:
+        rows = [dict(row) for row in _fetch_in(
+            conn, "SELECT * FROM commitments WHERE id IN ({})", list(dict.fromkeys(ids))
+        )]
+        if not rows:
+            return []
+        moved = [row["id"] for row in rows]
+
+        conn.executemany(
+            f"INSERT OR REPLACE INTO commitments_archive ({', '.join(COMMITMENT_FIELDS)}, archived_at) "
+            f"VALUES ({', '.join('?' for _ in COMMITMENT_FIELDS)}, ?)",
+            [tuple(row[f] for f in COMMITMENT_FIELDS) + (archived_at,) for row in rows]
+        )
+        _fetch_in(conn, "DELETE FROM commitments WHERE id IN ({})", moved)
+        unindex_near_duplicates(conn, moved)
+        _apply_risk_deltas(conn, _delete_risk_flags(conn, moved))
+
+        enqueue_vectors(
+            conn, moved,
+            [row["task"] for row in rows],
+            [vector_metadata(row) for row in rows],
+            op="archive"
         )
+        bump_data_version(conn)
+        conn.commit()
 
-    conn.commit()
-    conn.close()
+    notify_outbox()
+    return rows
+
+
+def count_archived_commitments() -> int:
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM commitments_archive").fetchone()[0]
 
 
 # ─── Retrieve Commitments ─────────────────────────────────────
 
 def get_all_commitments():
     """Returns all commitments from SQLite."""
-    conn = get_db_connection()
-    rows = conn.execute(
-        "SELECT * FROM commitments ORDER BY created_at DESC"
-    ).fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM commitments ORDER BY created_at DESC"
+        ).fetchall()
     return [dict(row) for row in rows]
 
 
 def get_commitments_by_owner(owner: str):
     """Returns all commitments for a specific owner."""
-    conn = get_db_connection()
-    rows = conn.execute(
-        "SELECT * FROM commitments WHERE owner = ? ORDER BY created_at DESC",
-        (owner,)
-    ).fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM commitments WHERE owner = ? ORDER BY created_at DESC",
+            (owner,)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+COMMITMENT_FIELDS = (
+    "id", "meeting_id", "meeting_title", "task", "owner", "deadline",
+    "due_date", "priority", "is_vague", "status", "created_at"
+)
+
+
+def encode_cursor(*key) -> str:
+    """An opaque cursor for a keyset position, e.g. (created_at, id)."""
+    raw = json.dumps(list(key)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, kinds: tuple = (str, str)) -> tuple:
+    """
+    The key encode_cursor packed, one value of each type in kinds.
+    Raises ValueError for anything that isn't a cursor we issued.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        valid = len(key) == len(kinds) and all(
+            isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(key, kinds)
+        )
+    except Exception:
+        valid = False
+    if not valid:
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def list_commitments(
+    owner: str = None,
+    status: str = None,
+    priority: str = None,
+    meeting_id: str = None,
+    cursor: str = None,
+    limit: int = 100,
+    fields: list[str] = None,
+    archived: bool = False,
+    due_after: str = None,
+    due_before: str = None
+) -> tuple[list[dict], str | None]:
+    """
+    One page of commitments, newest first, keyset-paginated on (created_at, id).
+    Cost depends on the page size, not the table size.
+    fields selects a subset of COMMITMENT_FIELDS.
+    archived=True pages through the archive tier instead of the live one.
+    due_after / due_before (ISO dates, inclusive) keep rows whose resolved
+    due_date falls in that range — rows without one never match.
+    Returns (rows, next_cursor) — next_cursor is None on the last page.
+    """
+    fields, after, due_after, due_before = parse_list_params(fields, cursor, due_after, due_before)
+
+    # created_at + id are always read — the next cursor is built from them
+    columns = list(dict.fromkeys(fields + ["created_at", "id"]))
+
+    where, params = [], []
+    for column, value in (("owner", owner), ("status", status),
+                          ("priority", priority), ("meeting_id", meeting_id)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if due_after is not None:
+        where.append("due_date >= ?")
+        params.append(due_after)
+    if due_before is not None:
+        where.append("due_date <= ?")
+        params.append(due_before)
+    if after:
+        where.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+
+    table = "commitments_archive" if archived else "commitments"
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    with get_db_connection() as conn:
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    return [{f: row[f] for f in fields} for row in rows], next_cursor
+
+
+def parse_list_params(
+    fields: list[str] = None,
+    cursor: str = None,
+    due_after: str = None,
+    due_before: str = None
+) -> tuple[list[str], tuple[str, str] | None, str | None, str | None]:
+    """
+    list_commitments' checked parameters: (fields, decoded cursor, due_after,
+    due_before). Raises ValueError for unknown fields, a cursor we didn't
+    issue or a due date that isn't ISO.
+    """
+    fields = list(fields or COMMITMENT_FIELDS)
+    unknown = [f for f in fields if f not in COMMITMENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return (
+        fields,
+        decode_cursor(cursor) if cursor else None,
+        _iso_date("due_after", due_after),
+        _iso_date("due_before", due_before)
+    )
+
+
+def _iso_date(name: str, value: str | None) -> str | None:
+    """value as a YYYY-MM-DD date, or ValueError if it isn't one."""
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+
+def get_commitments_by_meetings(meeting_ids: list[str]):
+    """Returns all commitments saved for any of the given meetings."""
+    return _select_in("meeting_id", meeting_ids)
+
+
+def get_commitments_by_owners(owners: list[str], status: str | None = None):
+    """Returns all commitments belonging to any of the given owners, optionally only those with status."""
+    return _select_in("owner", owners, status=status)
+
+
+def get_commitments_by_ids(ids: list[str]):
+    """Returns the commitments with the given ids."""
+    return _select_in("id", ids)
+
+
+def get_commitment(commitment_id: str) -> dict | None:
+    rows = _select_in("id", [commitment_id])
+    return rows[0] if rows else None
+
+
+def _select_in(column: str, values: list[str], chunk_size: int = 500, status: str | None = None):
+    """SELECT ... WHERE column IN (...), chunked to stay under SQLite's variable limit."""
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    status_clause = " AND status = ?" if status else ""
+    with get_db_connection() as conn:
+        rows = []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows.extend(conn.execute(
+                f"SELECT * FROM commitments WHERE {column} IN ({placeholders}){status_clause}",
+                chunk + ([status] if status else [])
+            ).fetchall())
+    return [dict(row) for row in rows]
+
+
+# ─── Structured Queries ───────────────────────────────────────
+# Filterable /query questions are answered here, from SQL, by the
+# query planner — complete results, no embedding or LLM call.
+
+def get_owner_names() -> list[str]:
+    """Every distinct owner, live or archived. Re-read only when the data version changes."""
+    store = get_store()
+    version = get_data_version()
+    memo = store.owner_names
+    if memo is None or memo[0] != version:
+        with get_db_connection() as conn:
+            names = [row[0] for row in conn.execute(
+                "SELECT owner FROM commitments WHERE owner IS NOT NULL "
+                "UNION SELECT owner FROM commitments_archive WHERE owner IS NOT NULL"
+            ).fetchall()]
+        memo = store.owner_names = (version, names, OwnerIndex(names))
+    return memo[1]
+
+
+def get_owner_index() -> OwnerIndex:
+    """get_owner_names indexed for the /query planner, rebuilt with it."""
+    get_owner_names()
+    return get_store().owner_names[2]
+
+
+def find_commitments(
+    filters: dict,
+    limit: int,
+    include_archived: bool = False
+) -> tuple[list[dict], int]:
+    """
+    Commitments matching structured filters, newest first: at most limit
+    rows, plus the total number of matches. Archived rows get "archived": 1.
+    filters (all optional): owner, status, priority — equality;
+    unassigned / has_deadline — booleans; created_after — ISO timestamp;
+    due_after / due_before — ISO dates, inclusive; due_before_excl — ISO
+    date, exclusive (overdue: open and due before today).
+    """
+    where, params = [], []
+    for column in ("owner", "status", "priority"):
+        if filters.get(column) is not None:
+            where.append(f"{column} = ?")
+            params.append(filters[column])
+    if filters.get("unassigned"):
+        where.append("(owner IS NULL OR owner = '')")
+    if filters.get("has_deadline") is not None:
+        where.append(
+            "(deadline IS NOT NULL AND deadline != '')" if filters["has_deadline"]
+            else "(deadline IS NULL OR deadline = '')"
+        )
+    if filters.get("created_after"):
+        where.append("created_at >= ?")
+        params.append(filters["created_after"])
+    for key, condition in (("due_after", "due_date >= ?"), ("due_before", "due_date <= ?"),
+                           ("due_before_excl", "due_date < ?")):
+        if filters.get(key):
+            where.append(condition)
+            params.append(filters[key])
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+    tables = ["commitments", "commitments_archive"] if include_archived else ["commitments"]
+    rows, total = [], 0
+    with get_db_connection() as conn:
+        for table in tables:
+            total += conn.execute(f"SELECT COUNT(*) FROM {table}{clause}", params).fetchone()[0]
+            rows.extend(
+                {**{f: row[f] for f in COMMITMENT_FIELDS}, "archived": int(table != "commitments")}
+                for row in conn.execute(
+                    f"SELECT * FROM {table}{clause} ORDER BY created_at DESC, id DESC LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+            )
+    rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    return rows[:limit], total
+
+
+# ─── Due Dates ────────────────────────────────────────────────
+# commitments.due_date is the deadline resolved to an ISO date at ingest
+# (see app.deadlines), NULL when the deadline isn't one we recognise.
+# ISO dates compare as strings, so ranges are plain indexed comparisons.
+
+def get_overdue_commitments(today: str, after: tuple[str, str] = None, limit: int = None) -> list[dict]:
+    """
+    Open commitments due before today (ISO date), most overdue first — one
+    range scan on (status, due_date, id). after: the (due_date, id) a
+    previous page ended on; limit: at most this many rows.
+    """
+    sql = "SELECT * FROM commitments WHERE status = 'open' AND due_date < ?"
+    params: list = [today]
+    if after:
+        sql += " AND (due_date, id) > (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY due_date, id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def count_overdue_commitments(today: str) -> int:
+    with get_db_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM commitments WHERE status = 'open' AND due_date < ?", (today,)
+        ).fetchone()[0]
+
+
+def backfill_due_dates(batch_size: int = 5000):
+    """
+    Resolves due_date for every live and archived commitment, counting from
+    its meeting's created_at. Live rows whose date changed get an outbox
+    "update" so their Chroma metadata follows.
+    """
+    with get_db_connection() as conn:
+        for table in ("commitments", "commitments_archive"):
+            rows = conn.execute(
+                f"SELECT c.*, m.created_at AS meeting_created_at FROM {table} c "
+                f"LEFT JOIN meetings m ON m.id = c.meeting_id"
+            )
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                changed = []
+                for row in batch:
+                    due_date = resolve_due_date(row["deadline"], row["meeting_created_at"] or row["created_at"])
+                    if due_date != row["due_date"]:
+                        changed.append({**dict(row), "due_date": due_date})
+                conn.executemany(
+                    f"UPDATE {table} SET due_date = ? WHERE id = ?",
+                    [(row["due_date"], row["id"]) for row in changed]
+                )
+                if changed and table == "commitments":
+                    enqueue_vectors(
+                        conn,
+                        [row["id"] for row in changed],
+                        [row["task"] for row in changed],
+                        [vector_metadata(row) for row in changed],
+                        op="update"
+                    )
+        bump_data_version(conn)
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('due_dates', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (DEADLINES_VERSION,)
+        )
+        conn.commit()
+    notify_outbox()
+
+
+def ensure_due_dates():
+    """Backfills databases created before due dates existed, or after resolution changed."""
+    if get_meta("due_dates") != DEADLINES_VERSION:
+        backfill_due_dates()
+
+
+def count_commitments() -> int:
+    """Returns the total number of stored commitments."""
+    with get_db_connection() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM commitments").fetchone()[0]
+    return count
+
+
+def get_open_counts_by_owner() -> dict[str, int]:
+    """
+    Returns open commitment counts for every owner.
+    One GROUP BY instead of fetching each owner's rows separately.
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT owner, COUNT(*) AS open_count FROM commitments "
+            "WHERE status = 'open' AND owner IS NOT NULL GROUP BY owner"
+        ).fetchall()
+    return {row["owner"]: row["open_count"] for row in rows}
+
+
+def count_commitments_by_status() -> dict[str, int]:
+    """Returns the number of commitments in each status."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) AS n FROM commitments GROUP BY status"
+        ).fetchall()
+    return {row["status"]: row["n"] for row in rows}
+
+
+# ─── Materialized Risk Flags ──────────────────────────────────
+
+def replace_risk_flags(flags_by_commitment: dict[str, tuple[str, list[dict]]]):
+    """
+    Replaces the stored flags of the given commitments and
+    applies the difference to the running risk_totals — one transaction.
+    flags_by_commitment maps commitment_id -> (created_at, [flag dicts]).
+    """
+    if not flags_by_commitment:
+        return
+
+    with get_db_connection() as conn:
+        deltas = _delete_risk_flags(conn, list(flags_by_commitment))
+
+        new_rows = []
+        for commitment_id, (created_at, flags) in flags_by_commitment.items():
+            for position, flag in enumerate(flags):
+                new_rows.append((
+                    commitment_id, position, flag["type"], flag.get("task"),
+                    flag.get("owner"), flag["severity"], flag["insight"], created_at
+                ))
+                deltas[flag["type"]] = deltas.get(flag["type"], 0) + 1
+
+        conn.executemany("""
+            INSERT INTO risk_flags
+            (commitment_id, position, type, task, owner, severity, insight, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, new_rows)
+
+        _apply_risk_deltas(conn, deltas)
+        bump_data_version(conn)
+        conn.commit()
+
+
+def _delete_risk_flags(conn, ids: list[str]) -> dict[str, int]:
+    """Deletes the stored flags of ids. Returns the change in count per flag type."""
+    deltas: dict[str, int] = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        old = conn.execute(
+            f"SELECT type, COUNT(*) AS n FROM risk_flags "
+            f"WHERE commitment_id IN ({placeholders}) GROUP BY type",
+            chunk
+        ).fetchall()
+        for row in old:
+            deltas[row["type"]] = deltas.get(row["type"], 0) - row["n"]
+        conn.execute(
+            f"DELETE FROM risk_flags WHERE commitment_id IN ({placeholders})",
+            chunk
+        )
+    return deltas
+
+
+def _apply_risk_deltas(conn, deltas: dict[str, int]):
+    conn.executemany("""
+        INSERT INTO risk_totals (type, count) VALUES (?, ?)
+        ON CONFLICT(type) DO UPDATE SET count = count + excluded.count
+    """, [(flag_type, delta) for flag_type, delta in deltas.items() if delta])
+
+
+def clear_risk_flags():
+    """Drops every materialized flag and total. Used before a full rebuild."""
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM risk_flags")
+        conn.execute("DELETE FROM risk_totals")
+        bump_data_version(conn)
+        conn.commit()
+
+
+def get_risk_flags(after: tuple[str, str, int] = None, limit: int = None) -> list[dict]:
+    """
+    Materialized flags, newest commitments first, each with the
+    (created_at, commitment_id, position) it is paged on. after: the
+    key a previous page ended on; limit: at most this many flags.
+    """
+    sql = "SELECT created_at, commitment_id, position, type, task, owner, severity, insight FROM risk_flags"
+    params: list = []
+    if after:
+        # Range seek on the index, then skip the page's end commitment's flags up to its position
+        created_at, commitment_id, position = after
+        sql += (
+            " WHERE (created_at, commitment_id) <= (?, ?)"
+            " AND NOT (created_at = ? AND commitment_id = ? AND position <= ?)"
+        )
+        params.extend([created_at, commitment_id, created_at, commitment_id, position])
+    sql += " ORDER BY created_at DESC, commitment_id DESC, position"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_risk_flags_by_commitment(ids: list[str]) -> dict[str, list[dict]]:
+    """Stored flags of the given commitments, in position order, by commitment id."""
+    with get_db_connection() as conn:
+        rows = _fetch_in(
+            conn,
+            "SELECT commitment_id, type, task, owner, severity, insight FROM risk_flags "
+            "WHERE commitment_id IN ({}) ORDER BY commitment_id, position",
+            list(dict.fromkeys(ids))
+        )
+    flags: dict[str, list[dict]] = {}
+    for row in rows:
+        flag = dict(row)
+        flags.setdefault(flag.pop("commitment_id"), []).append(flag)
+    return flags
+
+
+def get_risk_totals() -> dict[str, int]:
+    """Returns the running flag count per risk type."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT type, count FROM risk_totals WHERE count > 0"
+        ).fetchall()
+    return {row["type"]: row["count"] for row in rows}
+
+
+def get_meta(key: str) -> str | None:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def set_meta(key: str, value: str):
+    with get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+        conn.commit()
+
+
+# ─── Data Version ─────────────────────────────────────────────
+# Monotonic counter bumped inside every transaction that changes what
+# the read endpoints return. ETags are derived from it, so a read can
+# answer 304 Not Modified without touching the data itself.
+
+def bump_data_version(conn):
+    """Increments the data version. Call inside the write's transaction; the caller commits."""
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('data_version', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def get_data_version() -> int:
+    value = get_meta("data_version")
+    return int(value) if value else 0
+
+
+# ─── Near-Duplicate Index ─────────────────────────────────────
+
+def index_near_duplicates(conn, commitments: list[tuple[str, str]]):
+    """Adds (commitment_id, task) pairs to the MinHash index. The caller commits."""
+    signature_rows, band_rows = [], []
+    for commitment_id, task in commitments:
+        signature = minhash.signature(task)
+        signature_rows.append((commitment_id, minhash.to_blob(signature)))
+        band_rows.extend((key, commitment_id) for key in minhash.band_keys(signature))
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO minhash_signatures (commitment_id, signature) VALUES (?, ?)",
+        signature_rows
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO minhash_bands (key, commitment_id) VALUES (?, ?)",
+        band_rows
+    )
+
+
+def unindex_near_duplicates(conn, ids: list[str]):
+    """Removes commitments from the MinHash index. The caller commits."""
+    signatures = _fetch_in(
+        conn, "SELECT commitment_id, signature FROM minhash_signatures WHERE commitment_id IN ({})", ids
+    )
+    # Band rows are keyed (key, commitment_id) — recompute the keys instead of scanning
+    conn.executemany(
+        "DELETE FROM minhash_bands WHERE key = ? AND commitment_id = ?",
+        [
+            (key, commitment_id) for commitment_id, blob in signatures
+            for key in minhash.band_keys(minhash.from_blob(blob))
+        ]
+    )
+    _fetch_in(conn, "DELETE FROM minhash_signatures WHERE commitment_id IN ({})", ids)
+
+
+def find_near_duplicates(
+    tasks: list[str],
+    threshold: float,
+    limit: int = 5,
+    max_candidates: int = MINHASH_MAX_CANDIDATES
+) -> dict[str, list[dict]]:
+    """
+    For each task, the stored commitments whose estimated Jaccard similarity
+    is at least `threshold` — best first, at most `limit`. Each match is the
+    commitment row plus "similarity".
+    LSH narrows the search to rows sharing a band key; only the
+    max_candidates rows sharing the most bands are scored, so cost
+    doesn't grow with the table or with how often a task recurs.
+    """
+    signatures = {task: minhash.signature(task) for task in dict.fromkeys(tasks)}
+    # Recurring tasks share every band with each other — a few rows per band suffice
+    per_band = max(limit, max_candidates // 4)
+
+    with get_db_connection() as conn:
+        # Tasks in one meeting often share bands — look each key up once
+        buckets: dict[int, list[str]] = {}
+        candidates: dict[str, list[str]] = {}
+        for task, signature in signatures.items():
+            band_hits: dict[str, int] = {}
+            for key in minhash.band_keys(signature):
+                if key not in buckets:
+                    buckets[key] = [row[0] for row in conn.execute(
+                        "SELECT commitment_id FROM minhash_bands WHERE key = ? LIMIT ?",
+                        (key, per_band)
+                    ).fetchall()]
+                for commitment_id in buckets[key]:
+                    band_hits[commitment_id] = band_hits.get(commitment_id, 0) + 1
+            candidates[task] = sorted(band_hits, key=band_hits.get, reverse=True)[:max_candidates]
+
+        stored_signatures = dict(_fetch_in(
+            conn, "SELECT commitment_id, signature FROM minhash_signatures WHERE commitment_id IN ({})",
+            list({i for ids in candidates.values() for i in ids})
+        ))
+
+        scored: dict[str, list[tuple[float, str]]] = {}
+        for task, signature in signatures.items():
+            ids = [i for i in candidates[task] if i in stored_signatures]
+            similarities = minhash.estimate_jaccard_many(
+                signature, [stored_signatures[i] for i in ids]
+            )
+            hits = [(s, i) for s, i in zip(similarities, ids) if s >= threshold]
+            scored[task] = sorted(hits, reverse=True)[:limit]
+
+        rows = {
+            row["id"]: dict(row) for row in _fetch_in(
+                conn, "SELECT * FROM commitments WHERE id IN ({})",
+                list({i for hits in scored.values() for _, i in hits})
+            )
+        }
+
+    return {
+        task: [{**rows[i], "similarity": similarity} for similarity, i in hits if i in rows]
+        for task, hits in scored.items()
+    }
+
+
+def _fetch_in(conn, sql: str, values: list, chunk_size: int = 500) -> list:
+    """Runs `sql` (one `IN ({})` placeholder) over values in chunks."""
+    rows = []
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        rows.extend(conn.execute(sql.format(", ".join("?" for _ in chunk)), chunk).fetchall())
+    return rows
+
+
+def rebuild_near_duplicate_index(batch_size: int = 5000):
+    """Recomputes the whole MinHash index from the commitments table."""
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM minhash_bands")
+        conn.execute("DELETE FROM minhash_signatures")
+        rows = conn.execute("SELECT id, task FROM commitments")
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                break
+            index_near_duplicates(conn, [(row["id"], row["task"]) for row in batch])
+        conn.commit()
+    set_meta("minhash_index", minhash.index_fingerprint())
+
+
+def ensure_near_duplicate_index():
+    """Builds the index for databases created before it existed, or after its parameters changed."""
+    if get_meta("minhash_index") != minhash.index_fingerprint():
+        rebuild_near_duplicate_index()
+
+
+# ─── Extraction Cache ─────────────────────────────────────────
+
+def get_cached_extraction(key: str, max_age_s: float) -> str | None:
+    """Returns the cached extraction JSON for key, or None if missing/expired."""
+    now = time.time()
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT result FROM extraction_cache WHERE key = ? AND created_at >= ?",
+            (key, now - max_age_s)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE extraction_cache SET last_used_at = ? WHERE key = ?",
+            (now, key)
+        )
+        conn.commit()
+    return row["result"]
+
+
+def put_cached_extraction(key: str, result: str, max_entries: int, max_age_s: float):
+    """
+    Stores an extraction result, then evicts expired entries and
+    the least recently used ones beyond max_entries.
+    """
+    now = time.time()
+    with get_db_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO extraction_cache (key, result, created_at, last_used_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, result, now, now)
+        )
+        conn.execute(
+            "DELETE FROM extraction_cache WHERE created_at < ?",
+            (now - max_age_s,)
+        )
+        conn.execute("""
+            DELETE FROM extraction_cache WHERE key IN (
+                SELECT key FROM extraction_cache
+                ORDER BY last_used_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,))
+        conn.commit()
+
+
+# ─── Vector Outbox ────────────────────────────────────────────
+# Chroma is written asynchronously: writers enqueue here inside their
+# SQLite transaction, app.indexer drains the queue in batches.
+# Searches merge in rows that are still queued (read-through), so
+# results never lag the SQLite data.
+
+# Set after a commit that enqueued rows — wakes the indexer
+outbox_signal = threading.Event()
+# Workspaces with rows the indexer may not have seen yet
+_dirty_workspaces: set[str] = set()
+_dirty_lock = threading.Lock()
+
+
+def notify_outbox(workspace_id: str = None):
+    """Tells the indexer the workspace has queued rows. Call after committing them."""
+    with _dirty_lock:
+        _dirty_workspaces.add(workspace_id or current_workspace())
+    outbox_signal.set()
+
+
+def take_dirty_workspaces() -> set[str]:
+    with _dirty_lock:
+        dirty = set(_dirty_workspaces)
+        _dirty_workspaces.clear()
+    return dirty
+
+
+def enqueue_vectors(conn, ids: list[str], documents: list[str], metadatas: list[dict], op: str = "upsert"):
+    """
+    Queues Chroma writes — op "upsert" (embed + write), "update" (metadata
+    only) or "archive" (move to the archive collection). Call inside the
+    write's transaction; the caller commits.
+    """
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO vector_outbox (commitment_id, op, document, metadata, enqueued_at, available_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (commitment_id, op, document, json.dumps(metadata), now, now)
+            for commitment_id, document, metadata in zip(ids, documents, metadatas)
+        ]
+    )
+
+
+def claim_outbox_batch(limit: int) -> list[dict]:
+    """
+    The oldest outbox rows that are due (not backing off after a failure).
+    An "update" whose commitment still has an upsert queued is claimed as
+    an upsert — the vector may not be in Chroma yet, and the row carries
+    the full document and metadata anyway.
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute("""
+            SELECT seq, commitment_id, document, metadata, enqueued_at, attempts,
+                CASE WHEN op = 'update' AND EXISTS (
+                    SELECT 1 FROM vector_outbox AS earlier
+                    WHERE earlier.commitment_id = o.commitment_id
+                    AND earlier.seq < o.seq AND earlier.op = 'upsert'
+                ) THEN 'upsert' ELSE op END AS op
+            FROM vector_outbox AS o WHERE available_at <= ? ORDER BY seq LIMIT ?
+        """, (time.time(), limit)).fetchall()
     return [dict(row) for row in rows]
 
 
+def complete_outbox(applied: dict[str, int]):
+    """
+    Removes applied rows. `applied` maps commitment_id -> highest seq applied;
+    older rows for the same commitment are superseded and go too.
+    """
+    with get_db_connection() as conn:
+        conn.executemany(
+            "DELETE FROM vector_outbox WHERE commitment_id = ? AND seq <= ?",
+            list(applied.items())
+        )
+        conn.commit()
+
+
+def fail_outbox(seqs: list[int], error: str, backoff_s: float):
+    """Records a failed attempt and holds the rows back for backoff_s."""
+    with get_db_connection() as conn:
+        conn.executemany(
+            "UPDATE vector_outbox SET attempts = attempts + 1, last_error = ?, available_at = ? "
+            "WHERE seq = ?",
+            [(error, time.time() + backoff_s, seq) for seq in seqs]
+        )
+        conn.commit()
+
+
+def outbox_stats() -> dict:
+    """Queue depth, lag (age of the oldest row) and rows currently failing."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS depth, MIN(enqueued_at) AS oldest, "
+            "SUM(attempts > 0) AS failing FROM vector_outbox"
+        ).fetchone()
+    return {
+        "depth": row["depth"],
+        "lag_s": round(time.time() - row["oldest"], 3) if row["oldest"] else 0.0,
+        "failing": row["failing"] or 0
+    }
+
+
+def pending_vectors(limit: int = VECTOR_READ_THROUGH_MAX, archive: bool = False) -> dict:
+    """
+    Latest queued state of every commitment not yet in Chroma:
+    ids/documents/metadatas/embeddings of pending upserts, plus
+    the ids of pending deletes and archive moves. Embeddings come from
+    the cached embedder. archive=True: the archive collection's view —
+    pending archive moves are its upserts.
+    """
+    with get_db_connection() as conn:
+        # The indexer usually keeps up: an empty outbox needs no read or embedding
+        if conn.execute("SELECT 1 FROM vector_outbox LIMIT 1").fetchone() is None:
+            return {"ids": [], "documents": [], "metadatas": [], "embeddings": [], "deleted": set()}
+        rows = conn.execute(
+            "SELECT commitment_id, op, document, metadata FROM vector_outbox "
+            "ORDER BY seq DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+    latest: dict[str, sqlite3.Row] = {}
+    for row in rows:
+        latest.setdefault(row["commitment_id"], row)
+    # Each carries the full document + metadata snapshot
+    written = ("archive",) if archive else ("upsert", "update")
+    removed = () if archive else ("delete", "archive")
+    upserts = [row for row in latest.values() if row["op"] in written]
+
+    documents = [row["document"] for row in upserts]
+    with timed("outbox_read_through"):
+        embeddings = embed_texts(documents)
+    return {
+        "ids": [row["commitment_id"] for row in upserts],
+        "documents": documents,
+        "metadatas": [json.loads(row["metadata"]) for row in upserts],
+        "embeddings": embeddings,
+        "deleted": {row["commitment_id"] for row in latest.values() if row["op"] in removed}
+    }
+
+
+def _read_through(
+    query_embeddings: list,
+    results: dict,
+    n_results: int,
+    pending: dict = None,
+    where: dict = None
+) -> dict:
+    """
+    Merges queued rows into Chroma query results (one list per query),
+    re-ranked by cosine similarity. Queued state replaces what Chroma holds.
+    Queued rows not matching `where` are dropped, like Chroma drops stored ones.
+    """
+    pending = pending if pending is not None else pending_vectors()
+    if not pending["ids"] and not pending["deleted"]:
+        return results
+
+    replaced = set(pending["ids"]) | pending["deleted"]
+    pending_matrix = np.asarray(pending["embeddings"], dtype=np.float32).reshape(len(pending["ids"]), -1)
+    queued = [
+        c for c in zip(pending["ids"], pending["documents"], pending["metadatas"], pending_matrix)
+        if _metadata_matches(c[2], where)
+    ]
+
+    merged = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+    for i, query in enumerate(query_embeddings):
+        candidates = [c for c in _candidates(results, i) if c[0] not in replaced]
+        _append_top(merged, query, candidates + queued, n_results)
+    return merged
+
+
+def _chroma_where(where: dict = None) -> dict | None:
+    """
+    Chroma filter for a flat {field: value} dict — a value is matched
+    exactly, or {"$ne": value} excludes it. None if there is nothing to filter.
+    """
+    if not where:
+        return None
+    clauses = [{field: value} for field, value in where.items()]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _metadata_matches(metadata: dict, where: dict = None) -> bool:
+    for field, value in (where or {}).items():
+        if isinstance(value, dict):
+            if metadata.get(field) == value["$ne"]:
+                return False
+        elif metadata.get(field) != value:
+            return False
+    return True
+
+
+def _candidates(results: dict, i: int) -> list[tuple]:
+    """(id, document, metadata, embedding) of query i's results."""
+    return list(zip(
+        results["ids"][i], results["documents"][i],
+        results["metadatas"][i], results["embeddings"][i]
+    ))
+
+
+def _append_top(merged: dict, query, candidates: list[tuple], n_results: int):
+    """Appends the n_results candidates closest to query (cosine) as one result list."""
+    vectors = np.asarray([c[3] for c in candidates], dtype=np.float32).reshape(len(candidates), -1)
+    q = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(q) or 1.0)
+    scores = (vectors @ q) / np.where(norms == 0, 1.0, norms) if len(candidates) else np.array([])
+    top = [candidates[j] for j in np.argsort(-scores)[:n_results]]
+
+    merged["ids"].append([c[0] for c in top])
+    merged["documents"].append([c[1] for c in top])
+    merged["metadatas"].append([c[2] for c in top])
+    merged["embeddings"].append([c[3] for c in top])
+
+
+def _query_collection(
+    query_embeddings: list,
+    n_results: int,
+    pending: dict = None,
+    archive: bool = False,
+    where: dict = None
+) -> dict:
+    """
+    Chroma query for pre-computed embeddings, with queued rows read through.
+    where: metadata pre-filter, see _chroma_where.
+    """
+    results = get_chroma_collection(archive).query(
+        query_embeddings=query_embeddings,
+        n_results=n_results,
+        where=_chroma_where(where),
+        include=["documents", "metadatas", "embeddings"]
+    )
+    if archive:
+        pending = pending_vectors(archive=True)
+    return _read_through(query_embeddings, results, n_results, pending, where)
+
+
+def _query_tiers(
+    query_embeddings: list,
+    n_results: int,
+    pending: dict = None,
+    include_archived: bool = False,
+    where: dict = None
+) -> dict:
+    """
+    Queries the live collection, plus the archive one if include_archived —
+    the two result lists of each query are merged and re-ranked by cosine.
+    """
+    results = _query_collection(query_embeddings, n_results, pending, where=where)
+    if not include_archived:
+        return results
+
+    archived = _query_collection(query_embeddings, n_results, archive=True, where=where)
+    merged = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+    for i, query in enumerate(query_embeddings):
+        _append_top(merged, query, _candidates(results, i) + _candidates(archived, i), n_results)
+    return merged
+
+
 # ─── Semantic Search ──────────────────────────────────────────
 
-def search_similar_commitments(query: str, n_results: int = 5):
+def search_similar_commitments(query: str, n_results: int = 5, include_archived: bool = False):
     """
     Searches ChromaDB semantically.
     This is the cross-meeting memory feature.
-    Used by the /query endpoint.
+    Live commitments only, unless include_archived.
     """
-    collection = get_chroma_collection()
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_results
-    )
+    with timed("search_similar_commitments"):
+        results = _query_tiers(embed_texts([query]), n_results, include_archived=include_archived)
+    return results
+
+
+def embedding_cache_stats() -> dict:
+    """Embedding cache counters, without building the embedder just to report zeros."""
+    import sys
+    embeddings = sys.modules.get("app.embeddings")
+    if embeddings is None or embeddings._embedding_function is None:
+        return {"memory_hits": 0, "disk_hits": 0, "misses": 0, "batches": 0}
+    return dict(embeddings._embedding_function.stats)
+
+
+def embed_texts(texts: list[str]) -> list:
+    """Embeds texts with the same function the commitments collection uses."""
+    if not texts:
+        return []
+    return list(get_store().embedding_function()(texts))
+
+
+def search_by_embedding(
+    embedding,
+    n_results: int = 5,
+    pending: dict = None,
+    include_archived: bool = False,
+    where: dict = None
+):
+    """
+    Semantic search from a pre-computed query embedding.
+    Also returns the stored embeddings of the matches.
+    pending: pending_vectors() if the caller already read them.
+    include_archived: also search the archive tier.
+    where: {metadata field: value} pre-filter, e.g. {"owner": "Priya", "status": "open"}.
+    """
+    with timed("search_by_embedding"):
+        results = _query_tiers([embedding], n_results, pending, include_archived, where)
+    return results
+
+
+def get_commitment_embeddings(ids: list[str]) -> dict:
+    """Embeddings of the given commitments, by id — queued ones read through."""
+    if not ids:
+        return {}
+    wanted = set(ids)
+    pending = pending_vectors()
+    embeddings = {
+        id_: embedding for id_, embedding in zip(pending["ids"], pending["embeddings"])
+        if id_ in wanted
+    }
+    remaining = [id_ for id_ in ids if id_ not in embeddings and id_ not in pending["deleted"]]
+    if remaining:
+        results = get_chroma_collection().get(ids=remaining, include=["embeddings"])
+        embeddings.update(zip(results["ids"], results["embeddings"]))
+    return embeddings
+
+
+def search_similar_commitments_batch(queries: list[str], n_results: int = 5):
+    """
+    Searches ChromaDB for many texts in a single multi-text query.
+    Result lists are aligned with the order of queries.
+    Used by the risk engine to check a whole batch at once.
+    """
+    if not queries:
+        return {"documents": [], "metadatas": []}
+
+    with timed("search_similar_commitments_batch"):
+        results = _query_collection(embed_texts(queries), n_results)
     return results
\ No newline at end of file
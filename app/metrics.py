@@ -0,0 +1,271 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import nullcontext
+from app.config import METRICS_ENABLED
+
+# ─── Metrics ──────────────────────────────────────────────────
+# In-process counters and latency histograms, rendered as Prometheus
+# text by /metrics. Per-request stage timings are also collected into
+# a contextvar for the Server-Timing response header.
+# With METRICS_ENABLED off, timed() hands back one shared no-op
+# context manager and nothing else runs on the hot path.
+
+# Seconds — from sub-millisecond SQLite reads up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+_NOOP = nullcontext()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+# ─── Registry ─────────────────────────────────────────────────
+
+stage_seconds = Histogram(
+    "commitiq_stage_seconds",
+    "Time spent in each pipeline stage (extract, save, chroma, risk checks, ...)"
+)
+http_request_seconds = Histogram(
+    "commitiq_http_request_seconds",
+    "HTTP request latency by route"
+)
+llm_seconds = Histogram(
+    "commitiq_llm_seconds",
+    "LLM call latency by caller"
+)
+llm_calls = Counter("commitiq_llm_calls_total", "LLM calls by caller and outcome")
+llm_tokens = Counter("commitiq_llm_tokens_total", "LLM tokens by caller and kind (prompt/completion)")
+vector_index_rows = Counter("commitiq_vector_index_rows_total", "Outbox rows applied to Chroma by outcome")
+query_routes = Counter("commitiq_query_routes_total", "/query questions by planner route (sql, filtered_rag, rag)")
+extraction_tokens = Counter(
+    "commitiq_extraction_tokens_total",
+    "Transcript tokens per extraction stage (raw, preprocessed, llm)"
+)
+llm_queue_wait_seconds = Histogram(
+    "commitiq_llm_queue_wait_seconds",
+    "Time LLM calls waited for the rate limiter, by caller"
+)
+llm_coalesced = Counter("commitiq_llm_coalesced_total", "LLM calls merged into an identical in-flight call")
+llm_rate_limited = Counter(
+    "commitiq_llm_rate_limited_total",
+    "LLM calls rate limited, by caller and reason (provider 429, queue_wait)"
+)
+
+REGISTRY = [
+    stage_seconds, http_request_seconds, llm_seconds, llm_calls, llm_tokens,
+    vector_index_rows, query_routes, extraction_tokens,
+    llm_queue_wait_seconds, llm_coalesced, llm_rate_limited
+]
+
+
+def render(gauges: list[tuple[str, str, dict, float]] = ()) -> str:
+    """
+    Prometheus text exposition of every registered metric, plus
+    point-in-time gauges given as (name, help, labels, value).
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+
+    declared = set()
+    for name, help, labels, value in gauges:
+        if name not in declared:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            declared.add(name)
+        lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ─── Stage Timing ─────────────────────────────────────────────
+
+# stage -> total ms for the current request, set by the Server-Timing middleware
+_request_timings: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        stage_seconds.observe(elapsed, stage=self.stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + elapsed * 1000
+        return False
+
+
+def timed(stage: str):
+    """`with timed("save_commitments"):` — records the block's duration."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Timer(stage)
+
+
+def start_request_timings() -> contextvars.Token | None:
+    """Begins collecting stage timings for the current request."""
+    if not METRICS_ENABLED:
+        return None
+    return _request_timings.set({})
+
+
+def finish_request_timings(token: contextvars.Token | None) -> dict:
+    """Stops collecting and returns stage -> total ms."""
+    if token is None:
+        return {}
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9_\-]")
+
+
+def server_timing_header(timings: dict, total_ms: float) -> str:
+    """Server-Timing value: one `name;dur=ms` entry per stage, then the total."""
+    entries = [
+        f"{_TOKEN_UNSAFE.sub('_', stage)};dur={ms:.2f}"
+        for stage, ms in timings.items()
+    ]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries)
+
+
+# ─── LLM Usage ────────────────────────────────────────────────
+
+def llm_callbacks(caller: str) -> list:
+    """
+    LangChain callback handlers recording latency, outcome and token
+    usage for one caller ("extraction", "query"). Empty when disabled.
+    """
+    if not METRICS_ENABLED:
+        return []
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMUsageHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._started: dict = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                llm_seconds.observe(time.perf_counter() - started, caller=caller)
+            llm_calls.inc(caller=caller, outcome="ok")
+
+            prompt_tokens, completion_tokens = _token_usage(response)
+            if prompt_tokens:
+                llm_tokens.inc(prompt_tokens, caller=caller, kind="prompt")
+            if completion_tokens:
+                llm_tokens.inc(completion_tokens, caller=caller, kind="completion")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                llm_seconds.observe(time.perf_counter() - started, caller=caller)
+            llm_calls.inc(caller=caller, outcome="error")
+
+    return [LLMUsageHandler()]
+
+
+def _token_usage(response) -> tuple[int, int]:
+    """(prompt, completion) tokens from an LLMResult — usage_metadata first, then llm_output."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if prompt or completion:
+        return prompt, completion
+
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
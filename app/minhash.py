@@ -0,0 +1,78 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+from app.config import MINHASH_PERMUTATIONS, MINHASH_BANDS, MINHASH_SHINGLE_SIZE
+
+# ─── MinHash + LSH ────────────────────────────────────────────
+# Lexical near-duplicate detection for commitment tasks.
+# A task becomes a set of character shingles; its MinHash signature
+# estimates Jaccard similarity (fraction of equal slots). The signature
+# is cut into bands; two tasks sharing any band key are candidates.
+# With b bands of r rows the candidate threshold is about (1/b)^(1/r).
+
+# Universal hashing mod a prime just above 2^32; fixed seed so
+# signatures stored in SQLite stay valid across restarts
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240213)
+_A = _rng.integers(1, 2**32 - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 2**32 - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+ROWS_PER_BAND = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+
+def index_fingerprint() -> str:
+    """Changes whenever stored signatures/bands would no longer match."""
+    return f"v1:{MINHASH_PERMUTATIONS}:{MINHASH_BANDS}:{MINHASH_SHINGLE_SIZE}"
+
+
+def normalize_task(task: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", task.lower()))
+
+
+def shingles(task: str, size: int = MINHASH_SHINGLE_SIZE) -> set[str]:
+    """Character shingles of the normalized task, padded so short words count."""
+    text = f" {normalize_task(task)} "
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(task: str) -> np.ndarray:
+    """MinHash signature: MINHASH_PERMUTATIONS uint32 slots."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) & 0x7FFFFFFF for s in shingles(task)),
+        dtype=np.uint64
+    )
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> list[int]:
+    """One signed 64-bit key per band (fits an SQLite INTEGER)."""
+    keys = []
+    for band in range(MINHASH_BANDS):
+        rows = sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def to_blob(sig: np.ndarray) -> bytes:
+    return sig.tobytes()
+
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.uint32)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def estimate_jaccard_many(sig: np.ndarray, blobs: list[bytes]) -> list[float]:
+    """estimate_jaccard of sig against many stored signature blobs at once."""
+    if not blobs:
+        return []
+    stored = np.frombuffer(b"".join(blobs), dtype=np.uint32).reshape(len(blobs), -1)
+    return (stored == sig).mean(axis=1).tolist()
@@ -0,0 +1,203 @@
+import logging
+import re
+import threading
+from typing import List
+from app.config import MODEL_NAME, EXTRACTION_TOKEN_BUDGET, EXTRACTION_BUDGET_DROP_ACTION, PREPROCESS_CONTEXT_TURNS
+from app.rules import COMMITMENT_CUES, COMMITMENT_VERBS, DEADLINE_WORDS, SPEAKER
+
+logger = logging.getLogger(__name__)
+
+# ─── Transcript Preprocessing ─────────────────────────────────
+# Raw transcripts carry timestamps, filler words, greetings, call
+# chatter and email signatures. None of it holds a commitment, and every
+# token of it is paid for and waited on. Before extraction, each turn
+# (line) is cleaned, then kept only if it has action language or sits
+# next to a turn that does. "Raj: Sure." after "Can you take the deck?"
+# stays, because it says who owns the task. If EXTRACTION_TOKEN_BUDGET is
+# set, what is left is then fitted to it — by dropping context turns, and
+# action turns only if EXTRACTION_BUDGET_DROP_ACTION allows.
+
+# Bump whenever the cleaning changes — invalidates cached extractions
+PREPROCESS_VERSION = "1"
+
+CHARS_PER_TOKEN = 4
+
+# "[00:12:34]", "00:12 -", "(10:32 AM)", "00:01:02,500 --> 00:01:05,000" at the start of a turn
+TIMESTAMP = re.compile(
+    r"^[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?(?: ?[ap]\.?m\.?)?[\])]?"
+    r"(?:\s*-->\s*\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?)?\s*[-–—|:]?\s*",
+    re.IGNORECASE
+)
+# "Priya (00:01:23): ..." / "Priya [10:32 AM]: ..."
+SPEAKER_TIMESTAMP = re.compile(
+    r"^(?P<speaker>[^:\[(]{1,40}?)\s*[\[(]\d{1,2}:\d{2}(?::\d{2})?(?: ?[ap]\.?m\.?)?[\])]\s*:",
+    re.IGNORECASE
+)
+# Subtitle exports: "WEBVTT", cue numbers
+CAPTION_LINE = re.compile(r"^(?:WEBVTT.*|\d+)$")
+
+NOISE = re.compile(
+    r"[\[(](?:inaudible|crosstalk|laughs?|laughter|silence|pause|background noise|music|"
+    r"applause|coughs?|no audio|unintelligible|overlapping)[^\])]*[\])]",
+    re.IGNORECASE
+)
+FILLER = re.compile(r"(?:,\s*)?\b(?:u+[hm]+|e+r+m*|h+m+|mm+-?hmm+|uh-huh)\b[,.]?\s*", re.IGNORECASE)
+# Only when set off by commas — "I'd like to" and "you know the plan" stay
+FILLER_PHRASES = re.compile(r",\s*(?:you know|i mean|like|basically|actually|so yeah)\s*(?=,)", re.IGNORECASE)
+
+# Whole turns that never carry a commitment
+BOILERPLATE = re.compile(
+    r"^(?:(?:hi|hello|hey|good (?:morning|afternoon|evening)|morning|thanks?(?: you)?(?: so much)?|"
+    r"bye|goodbye|see you(?: (?:all|later|tomorrow|next week))?|have a good (?:one|day|weekend)|"
+    r"talk (?:to you )?(?:soon|later)|sorry|"
+    r"welcome(?: back)?|can (?:everyone|you all|you) (?:hear|see) (?:me|my screen)|"
+    r"you(?:'re| are) (?:on )?mute(?:d)?|sorry,? (?:i was|you were) (?:on )?mute(?:d)?|"
+    r"let me share my screen|is my screen visible|(?:give|bear with) (?:me|us) a (?:sec(?:ond)?|minute)|"
+    r"(?:best|kind|warm)? ?regards|best|cheers|sincerely|thanks,? all|sent from my \w+(?: \w+)?)"
+    r"(?:,? (?:all|everyone|everybody|team|guys|folks|again))?[\s,.!?-]*)+$",
+    re.IGNORECASE
+)
+SIGNATURE = re.compile(
+    r"^(?:--+|__+|[\w.+-]+@[\w-]+\.[\w.]+|(?:tel|phone|mobile|cell|fax)?:?\s*\+?[\d ()./-]{7,}|"
+    r"https?://\S+|this (?:e-?mail|message) (?:and any attachments )?(?:is|may be) confidential.*|"
+    r"confidentiality notice.*)$",
+    re.IGNORECASE
+)
+
+ACTION_LANGUAGE = re.compile(
+    rf"{COMMITMENT_CUES.pattern}|\b{COMMITMENT_VERBS}\b|\bI'?ll\b|\blet'?s\b|\bplease\b|"
+    rf"\b(?:can|could|would|will) (?:you|someone|somebody|we)\b|"
+    rf"\b(?:by|before|until|due) (?:{DEADLINE_WORDS})\b|"
+    r"\b(?:next steps?|action|assign(?:ed|ing)?|owner|blocker|waiting on|on me|on it|will do)\b",
+    re.IGNORECASE
+)
+
+
+def clean_turn(line: str) -> str:
+    """One turn without timestamps, noise markers, filler or extra whitespace."""
+    line = " ".join(line.split())
+    line = TIMESTAMP.sub("", line)
+    line = SPEAKER_TIMESTAMP.sub(r"\g<speaker>:", line)
+    if CAPTION_LINE.match(line):
+        return ""
+    line = NOISE.sub("", line)
+    line = FILLER_PHRASES.sub("", line)
+    line = FILLER.sub(" ", line)
+    line = re.sub(r"\s+([,.!?])", r"\1", " ".join(line.split()))
+    return line.strip(" ,")
+
+
+def _turn_text(line: str) -> str:
+    match = SPEAKER.match(line)
+    return match["text"] if match else line
+
+
+def _is_boilerplate(line: str) -> bool:
+    text = _turn_text(line)
+    return not text or bool(BOILERPLATE.match(text) or SIGNATURE.match(text))
+
+
+# ─── Token Counting ───────────────────────────────────────────
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The model's tiktoken encoding, or False if it can't be loaded (no tiktoken, offline)."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    try:
+                        _encoding = tiktoken.encoding_for_model(MODEL_NAME)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    logger.warning("tiktoken unavailable (%s); estimating %d chars per token", e, CHARS_PER_TOKEN)
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text for MODEL_NAME — exact with tiktoken, else estimated from its length."""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# ─── Preprocessing ────────────────────────────────────────────
+
+class PreprocessedTranscript:
+    """The text to extract from, and what preprocessing removed."""
+
+    def __init__(self, text: str, tokens_raw: int, tokens: int,
+                 turns_total: int, turns_dropped: int, budget_truncated: bool):
+        self.text = text
+        self.tokens_raw = tokens_raw
+        self.tokens = tokens
+        self.turns_total = turns_total
+        self.turns_dropped = turns_dropped
+        self.budget_truncated = budget_truncated
+
+
+def preprocess_transcript(
+    transcript: str,
+    token_budget: int = EXTRACTION_TOKEN_BUDGET,
+    context_turns: int = PREPROCESS_CONTEXT_TURNS,
+    drop_action_turns: bool = EXTRACTION_BUDGET_DROP_ACTION
+) -> PreprocessedTranscript:
+    """
+    Cleans every turn, drops boilerplate, back-to-back repeats and turns
+    with no action language (keeping context_turns either side of each turn
+    that has it), then fits the rest to token_budget (0: no budget). Over
+    budget, context turns go, last first. Action turns go only with drop_action_turns —
+    budget_truncated says so, and a warning is logged.
+    """
+    # Caption numbers and bare timestamps clean to nothing — they aren't turns
+    lines = [line for line in map(clean_turn, transcript.splitlines()) if line]
+    turns: List[str] = []
+    for line in lines:
+        # Only back-to-back repeats (caption overlap): a later "Raj: Sure." may accept another task
+        if _is_boilerplate(line) or (turns and line.lower() == turns[-1].lower()):
+            continue
+        turns.append(line)
+
+    action = [bool(ACTION_LANGUAGE.search(_turn_text(turn))) for turn in turns]
+    keep = {
+        j for i, is_action in enumerate(action) if is_action
+        for j in range(max(0, i - context_turns), min(len(turns), i + context_turns + 1))
+    }
+    kept = [(i, count_tokens(turns[i] + "\n")) for i in sorted(keep)]
+
+    budget_truncated = False
+    total = sum(tokens for _, tokens in kept)
+    if token_budget and total > token_budget:
+        # Drop context turns, last first, then (if allowed) action turns the same way
+        for drop_action in (False, True) if drop_action_turns else (False,):
+            for index in range(len(kept) - 1, -1, -1):
+                if total <= token_budget:
+                    break
+                i, tokens = kept[index]
+                if action[i] == drop_action:
+                    del kept[index]
+                    total -= tokens
+                    budget_truncated = budget_truncated or drop_action
+
+    if budget_truncated:
+        logger.warning(
+            "Token budget %d dropped %d action turns; their commitments won't be extracted",
+            token_budget, sum(action) - sum(action[i] for i, _ in kept)
+        )
+    text = "\n".join(turns[i] for i, _ in kept)
+    return PreprocessedTranscript(
+        text=text,
+        tokens_raw=count_tokens(transcript),
+        tokens=count_tokens(text),
+        turns_total=len(lines),
+        turns_dropped=len(lines) - len(kept),
+        budget_truncated=budget_truncated
+    )
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+from typing import AsyncIterator
+from app.config import MODEL_NAME, QUERY_PLANNER_ENABLED, QUERY_PLANNER_MAX_ROWS, LLM_COMPLETION_TOKENS_ESTIMATE
+from app.schemas import QueryResponse
+from app.memory import (
+    embed_texts, search_by_embedding, pending_vectors, get_query_cache,
+    get_owner_index, find_commitments
+)
+from app.query_planner import QueryPlan, plan_query, format_answer
+from app.metrics import timed, llm_callbacks, query_routes
+from app.llm_scheduler import llm_scheduler, call_key
+from app.preprocess import count_tokens
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_query_llm():
+    """The /query chat model — built on first use, not at import."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                _llm = ChatOpenAI(
+                    model=MODEL_NAME,
+                    temperature=0,
+                    stream_usage=True,
+                    callbacks=llm_callbacks("query")
+                )
+    return _llm
+
+
+def set_query_llm(llm):
+    """Swaps in another chat model (e.g. a fake one for offline benchmarks)."""
+    global _llm
+    _llm = llm
+
+N_RESULTS = 5
+NO_RESULTS_ANSWER = "No relevant commitments found in memory."
+
+
+# ─── Planning ─────────────────────────────────────────────────
+
+def plan_question(question: str) -> QueryPlan:
+    """Routes the question: sql, filtered_rag or rag (see app.query_planner)."""
+    if not QUERY_PLANNER_ENABLED:
+        plan = QueryPlan("rag")
+    else:
+        with timed("query_plan"):
+            plan = plan_query(question, get_owner_index())
+    query_routes.inc(route=plan.route)
+    return plan
+
+
+def answer_from_sql(question: str, plan: QueryPlan, include_archived: bool = False) -> QueryResponse:
+    """Complete answer to a "sql" plan, straight from SQLite — no embedding, no LLM."""
+    with timed("query_sql"):
+        rows, total = find_commitments(plan.filters, QUERY_PLANNER_MAX_ROWS, include_archived)
+    return QueryResponse(
+        question=question,
+        answer=format_answer(plan.filters, rows, total),
+        route="sql",
+        total_matches=total
+    )
+
+
+# ─── Retrieval + Prompt ───────────────────────────────────────
+
+def retrieve_context(question: str, include_archived: bool = False, where: dict = None) -> dict:
+    """
+    Embeds the question once, checks the answer cache, and on a miss
+    runs the semantic search with the same embedding.
+    Commitments still queued for Chroma are read through.
+    include_archived also searches the archive tier; where pre-filters
+    on metadata. Both bypass the cache, which only tracks unfiltered
+    searches of live commitments.
+    """
+    cacheable = not include_archived and not where
+    with timed("embed_question"):
+        question_embedding = embed_texts([question])[0]
+    # Queued commitments haven't invalidated cached answers yet — do it here
+    query_cache = get_query_cache()
+    pending = pending_vectors()
+    query_cache.invalidate_near(pending["embeddings"])
+    cached = query_cache.lookup(question_embedding) if cacheable else None
+    if cached is not None:
+        return {"embedding": question_embedding, "cached": cached}
+
+    results = search_by_embedding(
+        question_embedding, n_results=N_RESULTS, pending=pending,
+        include_archived=include_archived, where=where
+    )
+    return {
+        "embedding": question_embedding,
+        "cached": None,
+        "cacheable": cacheable,
+        "ids": results.get("ids", [[]])[0],
+        "documents": results.get("documents", [[]])[0],
+        "metadatas": results.get("metadatas", [[]])[0],
+        "embeddings": list(results.get("embeddings", [[]])[0]),
+    }
+
+
+def build_prompt(question: str, documents: list, metadatas: list) -> str:
+    # Build context for LLM
+    context = "\n".join([
+        f"- Task: {doc} | Owner: {meta.get('owner')} | "
+        f"Deadline: {meta.get('deadline')}"
+        + (f" ({meta['due_date']})" if meta.get("due_date", "none") != "none" else "")
+        + f" | Meeting: {meta.get('meeting_title')} | "
+        f"Status: {meta.get('status')}"
+        for doc, meta in zip(documents, metadatas)
+    ])
+
+    return f"""You are an execution intelligence assistant.
+Based on these commitments from past meetings:
+
+{context}
+
+Answer this question clearly and concisely: {question}"""
+
+
+def prompt_tokens(prompt: str) -> int:
+    """What one answer is expected to cost against the scheduler's token bucket."""
+    return count_tokens(prompt) + LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def remember_answer(question: str, retrieved: dict, answer: str):
+    if not retrieved["cacheable"]:
+        return
+    get_query_cache().store(
+        question, retrieved["embedding"], answer,
+        context_ids=retrieved["ids"],
+        context_embeddings=retrieved["embeddings"],
+        n_results=N_RESULTS
+    )
+
+
+# ─── Answering ────────────────────────────────────────────────
+
+def answer_question(question: str, include_archived: bool = False) -> QueryResponse:
+    """
+    Natural language question answered from memory: filterable questions
+    from SQL, everything else from ChromaDB + the LLM.
+    """
+    plan = plan_question(question)
+    if plan.route == "sql":
+        return answer_from_sql(question, plan, include_archived)
+
+    retrieved = retrieve_context(question, include_archived, plan.where())
+    if retrieved["cached"] is not None:
+        return QueryResponse(question=question, answer=retrieved["cached"].answer, cached=True)
+
+    if not retrieved["documents"]:
+        return QueryResponse(question=question, answer=NO_RESULTS_ANSWER, route=plan.route)
+
+    # Ask LLM to answer using context
+    prompt = build_prompt(question, retrieved["documents"], retrieved["metadatas"])
+    # Identical prompts in flight at once (same question, same context) share one call
+    with timed("llm_answer"):
+        answer = llm_scheduler.call(
+            "query", call_key("query", prompt), lambda: get_query_llm().invoke(prompt), prompt_tokens(prompt)
+        )
+
+    remember_answer(question, retrieved, answer.content)
+    return QueryResponse(question=question, answer=answer.content, route=plan.route)
+
+
+async def stream_answer(question: str, include_archived: bool = False) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Same as answer_question, yielding (event, data) as it goes:
+    one "token" event per streamed LLM chunk, then "done" with the full answer.
+    """
+    plan = await asyncio.to_thread(plan_question, question)
+    if plan.route == "sql":
+        response = await asyncio.to_thread(answer_from_sql, question, plan, include_archived)
+        yield "token", {"text": response.answer}
+        yield "done", response.dict()
+        return
+
+    retrieved = await asyncio.to_thread(retrieve_context, question, include_archived, plan.where())
+    if retrieved["cached"] is not None:
+        answer = retrieved["cached"].answer
+        yield "token", {"text": answer}
+        yield "done", {"question": question, "answer": answer, "cached": True, "route": plan.route}
+        return
+
+    if not retrieved["documents"]:
+        yield "token", {"text": NO_RESULTS_ANSWER}
+        yield "done", {"question": question, "answer": NO_RESULTS_ANSWER, "cached": False, "route": plan.route}
+        return
+
+    prompt = build_prompt(question, retrieved["documents"], retrieved["metadatas"])
+    parts = []
+    with timed("llm_answer"):
+        stream = llm_scheduler.astream("query", lambda: get_query_llm().astream(prompt), prompt_tokens(prompt))
+        async for chunk in stream:
+            if chunk.content:
+                parts.append(chunk.content)
+                yield "token", {"text": chunk.content}
+
+    answer = "".join(parts)
+    remember_answer(question, retrieved, answer)
+    yield "done", {"question": question, "answer": answer, "cached": False, "route": plan.route}
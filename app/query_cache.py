@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.config import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_SIMILARITY
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+# ─── Cache Entry ──────────────────────────────────────────────
+
+class CachedAnswer:
+    def __init__(self, question: str, embedding: np.ndarray, answer: str,
+                 context_ids: list[str], min_similarity: float, full_context: bool):
+        self.question = question
+        self.embedding = embedding
+        self.answer = answer
+        self.context_ids = set(context_ids)
+        # Weakest question↔context similarity: a new commitment at least this
+        # close to the question would have made it into the context
+        self.min_similarity = min_similarity
+        # False when search returned fewer than n_results — any new commitment enters
+        self.full_context = full_context
+
+
+# ─── Answer Cache ─────────────────────────────────────────────
+
+class QueryAnswerCache:
+    """
+    LRU cache of /query answers, matched by question embedding similarity.
+    Invalidated when a write touches a commitment the answer was built from,
+    or adds one close enough to the question to change its context.
+    One per workspace, held by its MemoryStore.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, threshold: float = QUERY_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, question_embedding) -> CachedAnswer | None:
+        """Closest cached question at or above the similarity threshold."""
+        query = _unit(question_embedding)
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for key, entry in self._entries.items():
+                score = float(np.dot(query, entry.embedding))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]
+
+    def store(self, question: str, question_embedding, answer: str,
+              context_ids: list[str], context_embeddings: list, n_results: int):
+        query = _unit(question_embedding)
+        similarities = [float(np.dot(query, _unit(e))) for e in context_embeddings]
+        entry = CachedAnswer(
+            question=question,
+            embedding=query,
+            answer=answer,
+            context_ids=context_ids,
+            min_similarity=min(similarities) if similarities else -1.0,
+            full_context=len(context_ids) >= n_results
+        )
+        with self._lock:
+            self._entries[self._next_key] = entry
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_ids(self, commitment_ids):
+        """Drops answers whose context included any of these commitments."""
+        ids = set(commitment_ids)
+        if not ids:
+            return
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.context_ids & ids]:
+                del self._entries[key]
+
+    def invalidate_near(self, embeddings):
+        """Drops answers whose context the newly added commitments would have entered."""
+        if not embeddings:
+            return
+        with self._lock:
+            if not self._entries:
+                return
+            new = np.stack([_unit(e) for e in embeddings])
+            stale = [
+                key for key, entry in self._entries.items()
+                if not entry.full_context
+                or float(np.max(new @ entry.embedding)) >= entry.min_similarity
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
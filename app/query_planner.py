@@ -0,0 +1,305 @@
+import re
+from datetime import datetime, timedelta
+from typing import List
+
+# ─── Query Planning ───────────────────────────────────────────
+# Many /query questions are really filters: "which commitments have no
+# owner?", "what are the high priority tasks?", "what has Abhishek
+# committed to?". A top-5 semantic search silently truncates those, and
+# the LLM call is pure latency. The planner recognises owner, priority,
+# status, unassigned, deadline, due-date, overdue and time-window intents:
+# - filters and nothing else  -> "sql": complete answer from SQLite, no LLM
+# - filters plus a topic      -> "filtered_rag": Chroma search pre-filtered
+#                                on metadata, then the LLM
+# - no filters                -> "rag": the semantic path as before
+
+UNASSIGNED = re.compile(
+    r"\b(?:(?:with )?no owners?|without (?:an? )?owners?|(?:missing|lack(?:ing)?) (?:an? )?owners?|"
+    r"un-?assigned|not assigned(?: to anyone)?|ownerless|no assignees?|"
+    r"(?:nobody|no one|no-one) (?:owns|is assigned|has been assigned))\b",
+    re.IGNORECASE
+)
+NO_DEADLINE = re.compile(
+    r"\b(?:(?:with )?no (?:deadlines?|due dates?)|without (?:an? )?(?:deadlines?|due dates?)|"
+    r"(?:missing|lack(?:ing)?) (?:an? )?(?:deadlines?|due dates?)|undated)\b",
+    re.IGNORECASE
+)
+HAS_DEADLINE = re.compile(
+    r"\b(?:with (?:an? )?(?:deadlines?|due dates?)|(?:have|has) (?:an? )?(?:deadlines?|due dates?)(?: set)?|"
+    r"(?:deadlines?|due dates?) set)\b",
+    re.IGNORECASE
+)
+PRIORITY = re.compile(
+    r"\b(?:(?P<level>high|medium|low)[- ]priority|priority (?:is )?(?P<level2>high|medium|low)|"
+    r"(?P<urgent>urgent|critical))\b",
+    re.IGNORECASE
+)
+# Checked in order — "not done" is open, not done
+STATUSES = [
+    ("open", re.compile(
+        r"\b(?:open|pending|outstanding|unfinished|incomplete|not (?:yet )?(?:done|finished|completed))\b",
+        re.IGNORECASE
+    )),
+    ("cancelled", re.compile(r"\b(?:cancell?ed|dropped|abandoned)\b", re.IGNORECASE)),
+    ("done", re.compile(r"\b(?:done|completed?|finished|closed|resolved)\b", re.IGNORECASE)),
+]
+OVERDUE = re.compile(
+    r"\b(?:overdue|past due|(?:past|missed) (?:their |the |its )?(?:due dates?|deadlines?))\b",
+    re.IGNORECASE
+)
+DUE = re.compile(
+    r"\bdue (?:(?:by|before|within) )?(?P<range>today|tomorrow|this week|next week|this month|next month)\b",
+    re.IGNORECASE
+)
+WINDOW = re.compile(
+    r"\b(?:(?P<named>today|this week|this month)|"
+    r"(?:in )?(?:the )?(?:last|past) (?:(?P<n>\d{1,3}) )?(?P<unit>days?|weeks?|months?))\b",
+    re.IGNORECASE
+)
+
+# Only list-style questions are pre-filtered around a topic — "is the
+# budget report done?" must see the report whatever its status
+LIST_QUESTION = re.compile(r"^\s*(?:which|what|list|show|find|give|get|who|how many|tell me)\b", re.IGNORECASE)
+
+# Words that only phrase the request. Anything else left over is a topic
+FILLER = set("""
+    a about above across after all also am an and any anyone anything are as at be been being
+    by can could currently did do does each every far find for from get give got had has have
+    he her his how i in is it its just know let list many me meeting meetings more most my now
+    number of on or our please right see she show so still tell that the their them there these
+    they this those to up us was we were what whats what's which who whom whose will with would yet you
+    commitment commitments task tasks item items action actions work todo todos thing things stuff
+    assigned assignment assignments committed commit owns own owned owner owners owes owe
+    responsible working promised agreed deadline deadlines due count total doing deliver
+    delivering handle handling take taking going need needs plate
+    """.split())
+WORD = re.compile(r"[a-z0-9']+")
+# Words of an owner name — "Priya's", "O'Brien" and "Jean-Luc" are one word each
+NAME_WORD = re.compile(r"\w+(?:['’.-]\w+)*")
+# Names that are also everyday words — only matched when capitalised
+WORD_NAMES = FILLER | set("may mark bill june april august grace hope joy rose frank".split())
+
+
+class QueryPlan:
+    """How one /query question is answered: route, SQL filters and the leftover topic."""
+
+    def __init__(self, route: str, filters: dict = None, topic: List[str] = None):
+        self.route = route
+        self.filters = filters or {}
+        self.topic = topic or []
+
+    def where(self) -> dict:
+        """The filters as Chroma metadata conditions (see memory.vector_metadata)."""
+        where = {}
+        for field in ("owner", "status", "priority"):
+            if self.filters.get(field):
+                where[field] = self.filters[field]
+        if self.filters.get("unassigned"):
+            where["owner"] = "unassigned"
+        if self.filters.get("has_deadline") is not None:
+            where["deadline"] = {"$ne": "none"} if self.filters["has_deadline"] else "none"
+        return where
+
+
+def _window_start(match: re.Match, now: datetime) -> str:
+    named = (match.group("named") or "").lower()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if named == "today":
+        start = today
+    elif named == "this week":
+        start = today - timedelta(days=today.weekday())
+    elif named == "this month":
+        start = today.replace(day=1)
+    else:
+        days = {"day": 1, "week": 7, "month": 30}[match.group("unit").lower().rstrip("s")]
+        start = now - timedelta(days=days * int(match.group("n") or 1))
+    return start.isoformat()
+
+
+def _due_range(match: re.Match, now: datetime) -> tuple[str, str]:
+    """(due_after, due_before) ISO dates, inclusive, for "due this week" and the like."""
+    named = match.group("range").lower()
+    today = now.date()
+    if named in ("today", "tomorrow"):
+        day = today + timedelta(days=int(named == "tomorrow"))
+        return day.isoformat(), day.isoformat()
+    if named.endswith("week"):
+        start = today - timedelta(days=today.weekday()) + timedelta(weeks=int(named == "next week"))
+        return start.isoformat(), (start + timedelta(days=6)).isoformat()
+    start = today.replace(day=1)
+    if named == "next month":
+        start = (start + timedelta(days=32)).replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+class OwnerIndex:
+    """
+    A workspace's owner names keyed by their lowercased words, so the
+    question's word n-grams are looked up instead of a regex per owner.
+    """
+
+    def __init__(self, owners: List[str]):
+        self.by_name: dict[str, str] = {}
+        self.max_words = 0
+        for owner in owners:
+            words = tuple(word.lower() for word in NAME_WORD.findall(owner))
+            if words:
+                self.by_name.setdefault(" ".join(words), owner)
+                self.max_words = max(self.max_words, len(words))
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+
+def _mentioned_owner(question: str, index: OwnerIndex) -> tuple[str | None, List[tuple[int, int]]]:
+    """The one known owner named in the question, and where. Two or more: none."""
+    words = list(NAME_WORD.finditer(question))
+    found: dict[str, List[tuple[int, int]]] = {}
+    for i in range(len(words)):
+        for n in range(1, min(index.max_words, len(words) - i) + 1):
+            name = " ".join(match.group(0).lower() for match in words[i:i + n])
+            owner = index.by_name.get(name) or (name.endswith(("'s", "’s")) and index.by_name.get(name[:-2]))
+            if not owner:
+                continue
+            # An owner called "Will" or "May" must not match the ordinary word
+            if owner.lower() in WORD_NAMES and not words[i].group(0)[0].isupper():
+                continue
+            found.setdefault(owner, []).append((words[i].start(), words[i + n - 1].end()))
+
+    # "Priya" and "Priya Shah" both match "Priya Shah" — keep the longest
+    def inside(span, other_owner):
+        return any(start <= span[0] and span[1] <= end and (start, end) != span for start, end in found[other_owner])
+
+    names = [
+        owner for owner, spans in found.items()
+        if not all(any(inside(span, other) for other in found if other != owner) for span in spans)
+    ]
+    if len(names) != 1:
+        return None, []
+    return names[0], found[names[0]]
+
+
+def plan_query(question: str, owners: OwnerIndex | List[str], now: datetime = None) -> QueryPlan:
+    """
+    Plans one question. owners: the workspace's known owner names (ideally
+    a memoized OwnerIndex) — only those are recognised, so a capitalised
+    word is never mistaken for one.
+    """
+    now = now or datetime.now()
+    if not isinstance(owners, OwnerIndex):
+        owners = OwnerIndex(owners)
+    filters = {}
+    text = question
+
+    def strip(pattern: re.Pattern) -> re.Match | None:
+        nonlocal text
+        match = pattern.search(text)
+        if match:
+            text = pattern.sub(" ", text)
+        return match
+
+    if strip(UNASSIGNED):
+        filters["unassigned"] = True
+    if strip(NO_DEADLINE):
+        filters["has_deadline"] = False
+    elif strip(HAS_DEADLINE):
+        filters["has_deadline"] = True
+
+    if strip(OVERDUE):
+        filters["status"] = "open"
+        filters["due_before_excl"] = now.date().isoformat()
+    else:
+        match = strip(DUE)
+        if match:
+            filters["due_after"], filters["due_before"] = _due_range(match, now)
+
+    match = strip(PRIORITY)
+    if match:
+        filters["priority"] = (match.group("level") or match.group("level2") or "high").lower()
+
+    overdue = "due_before_excl" in filters
+    for status, pattern in STATUSES:
+        if strip(pattern):
+            filters["status"] = status
+            break
+    if overdue and filters["status"] != "open":
+        # "overdue tasks that are done" — nothing closed is overdue; let the LLM say so
+        return QueryPlan("rag")
+    if "status" in filters and any(pattern.search(text) for _, pattern in STATUSES):
+        # "open or done" — not a single filter; let the semantic path handle it
+        return QueryPlan("rag")
+
+    match = strip(WINDOW)
+    if match:
+        filters["created_after"] = _window_start(match, now)
+
+    if not filters.get("unassigned"):
+        owner, spans = _mentioned_owner(text, owners)
+        if owner:
+            filters["owner"] = owner
+            for start, end in reversed(spans):
+                text = text[:start] + " " + text[end:]
+
+    if not filters:
+        return QueryPlan("rag")
+
+    topic = [word for word in WORD.findall(text.lower()) if word not in FILLER and not word.isdigit()]
+    if topic:
+        # Chroma can't range-filter date strings, and yes/no questions
+        # must see matches in any state — the LLM gets the question as is
+        ranged = any(k in filters for k in ("created_after", "due_after", "due_before_excl"))
+        if ranged or not LIST_QUESTION.match(question):
+            return QueryPlan("rag")
+        return QueryPlan("filtered_rag", filters, topic)
+    return QueryPlan("sql", filters)
+
+
+def describe(filters: dict) -> str:
+    """ "open high-priority commitments owned by Priya" for a filter set."""
+    words = []
+    if filters.get("due_before_excl"):
+        words.append("overdue")
+    elif filters.get("status"):
+        words.append(filters["status"])
+    if filters.get("priority"):
+        words.append(f"{filters['priority']}-priority")
+    words.append("commitments")
+    if filters.get("owner"):
+        words.append(f"owned by {filters['owner']}")
+    if filters.get("unassigned"):
+        words.append("with no owner")
+    if filters.get("has_deadline") is not None:
+        words.append("with a deadline" if filters["has_deadline"] else "with no deadline")
+    if filters.get("due_after"):
+        if filters["due_after"] == filters["due_before"]:
+            words.append(f"due on {filters['due_after']}")
+        else:
+            words.append(f"due {filters['due_after']} to {filters['due_before']}")
+    if filters.get("created_after"):
+        words.append(f"created since {filters['created_after'][:10]}")
+    return " ".join(words)
+
+
+def format_answer(filters: dict, rows: List[dict], total: int) -> str:
+    """The complete, deterministic answer to a "sql" plan."""
+    what = describe(filters)
+    if total == 0:
+        return f"There are no {what}."
+
+    if total == 1:
+        lines = [f"There is 1 {what.replace('commitments', 'commitment', 1)}:"]
+    else:
+        lines = [f"There are {total} {what}:"]
+    for row in rows:
+        lines.append(
+            f"- {row['task']} | Owner: {row['owner'] or 'unassigned'} | "
+            f"Deadline: {row['deadline'] or 'none'}"
+            + (f" ({row['due_date']})" if row.get("due_date") else "")
+            + f" | Priority: {row['priority']} | "
+            f"Status: {row['status']} | Meeting: {row['meeting_title']}"
+            + (" | archived" if row.get("archived") else "")
+        )
+    if total > len(rows):
+        lines.append(f"...and {total - len(rows)} more. Page through GET /commitments for the rest.")
+    return "\n".join(lines)
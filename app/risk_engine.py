@@ -1,6 +1,141 @@
 from app.schemas import Commitment, RiskFlag
-from app.memory import get_commitments_by_owner, search_similar_commitments
+from app.memory import (
+    get_commitments_by_owner, search_similar_commitments,
+    get_open_counts_by_owner, search_similar_commitments_batch,
+    get_all_commitments, get_commitments_by_meetings,
+    get_commitments_by_owners, get_commitments_by_ids,
+    replace_risk_flags, clear_risk_flags, get_risk_flags, get_risk_totals,
+    get_meta, set_meta, find_near_duplicates, get_commitment_embeddings, embed_texts,
+    count_commitments_by_status, current_workspace, get_risk_flags_by_commitment,
+    get_overdue_commitments, count_overdue_commitments, encode_cursor, decode_cursor
+)
+from app.config import (
+    WORKSPACE_CACHE_SIZE, REPEATED_TOPIC_SOURCE, REPEATED_TOPIC_JACCARD,
+    REPEATED_TOPIC_CONFIRM_JACCARD, REPEATED_TOPIC_CONFIRM_COSINE
+)
+from app.metrics import timed
 from typing import List
+from collections import OrderedDict
+from datetime import date
+import threading
+import numpy as np
+
+# Health score penalty per flag type
+PENALTIES = {
+    "no_owner": 15,
+    "overdue": 12,
+    "repeated_topic": 12,
+    "no_deadline": 10,
+    "overloaded_owner": 10,
+    "vague_commitment": 8,
+}
+
+
+# ─── Batched Evaluation Context ───────────────────────────────
+
+class RiskContext:
+    """
+    Data the risk checks need for a whole batch of commitments,
+    loaded up front instead of once per commitment:
+    - open commitment counts per owner (one GROUP BY)
+    - similar past commitments per task — from the MinHash near-duplicate
+      index, or one multi-text Chroma query with REPEATED_TOPIC_SOURCE=chroma
+    """
+
+    def __init__(
+        self,
+        open_counts: dict[str, int],
+        similar: dict[str, tuple[list, list]],
+        similar_ids: dict[str, list[str]] = None
+    ):
+        self.open_counts = open_counts
+        self.similar = similar
+        self.similar_ids = similar_ids or {}
+
+    @classmethod
+    def load(cls, commitments: List[Commitment]) -> "RiskContext":
+        with timed("risk_open_counts"):
+            open_counts = get_open_counts_by_owner()
+
+        # Identical tasks return identical matches — query each text once
+        tasks = list(dict.fromkeys(c.task for c in commitments))
+        if REPEATED_TOPIC_SOURCE == "chroma":
+            similar, similar_ids = _semantic_matches(tasks)
+        else:
+            with timed("near_duplicate_lookup"):
+                similar, similar_ids = _near_duplicate_matches(tasks)
+        return cls(open_counts, similar, similar_ids)
+
+    def open_count(self, owner: str) -> int:
+        return self.open_counts.get(owner, 0)
+
+    def similar_to(self, task: str) -> tuple[list, list]:
+        return self.similar.get(task, ([], []))
+
+    def neighbor_ids(self) -> set[str]:
+        """Ids of every stored commitment that came back as a similar match."""
+        return {i for ids in self.similar_ids.values() for i in ids}
+
+
+def _semantic_matches(tasks: List[str]) -> tuple[dict, dict]:
+    """Top-5 Chroma neighbours per task, however weak the match."""
+    results = search_similar_commitments_batch(tasks, n_results=5)
+    documents = results.get("documents") or [[] for _ in tasks]
+    metadatas = results.get("metadatas") or [[] for _ in tasks]
+    ids = results.get("ids") or [[] for _ in tasks]
+
+    similar = {
+        task: (docs, metas)
+        for task, docs, metas in zip(tasks, documents, metadatas)
+    }
+    return similar, dict(zip(tasks, ids))
+
+
+def _near_duplicate_matches(tasks: List[str]) -> tuple[dict, dict]:
+    """
+    Lexical near-duplicates per task from the MinHash index.
+    Matches at or above REPEATED_TOPIC_JACCARD count as they are; weaker
+    ones (down to REPEATED_TOPIC_CONFIRM_JACCARD) only if their stored
+    Chroma embedding is within REPEATED_TOPIC_CONFIRM_COSINE of the task.
+    """
+    threshold = min(REPEATED_TOPIC_JACCARD, REPEATED_TOPIC_CONFIRM_JACCARD or REPEATED_TOPIC_JACCARD)
+    matches = find_near_duplicates(tasks, threshold=threshold, limit=5)
+
+    unconfirmed = {
+        task: [m for m in found if m["similarity"] < REPEATED_TOPIC_JACCARD]
+        for task, found in matches.items()
+    }
+    confirmed = _confirm_semantically(unconfirmed) if any(unconfirmed.values()) else set()
+
+    similar, similar_ids = {}, {}
+    for task, found in matches.items():
+        kept = [
+            m for m in found
+            if m["similarity"] >= REPEATED_TOPIC_JACCARD or (task, m["id"]) in confirmed
+        ]
+        similar[task] = ([m["task"] for m in kept], kept)
+        similar_ids[task] = [m["id"] for m in kept]
+    return similar, similar_ids
+
+
+def _confirm_semantically(pending: dict[str, list[dict]]) -> set[tuple[str, str]]:
+    """(task, commitment_id) pairs whose embeddings are close enough to confirm."""
+    with timed("near_duplicate_confirm"):
+        tasks = [task for task, found in pending.items() if found]
+        task_vectors = dict(zip(tasks, embed_texts(tasks)))
+        stored = get_commitment_embeddings(list({m["id"] for found in pending.values() for m in found}))
+
+        confirmed = set()
+        for task in tasks:
+            a = np.asarray(task_vectors[task], dtype=np.float32)
+            for match in pending[task]:
+                if match["id"] not in stored:
+                    continue
+                b = np.asarray(stored[match["id"]], dtype=np.float32)
+                denominator = float(np.linalg.norm(a) * np.linalg.norm(b)) or 1.0
+                if float(a @ b) / denominator >= REPEATED_TOPIC_CONFIRM_COSINE:
+                    confirmed.add((task, match["id"]))
+    return confirmed
 
 
 # ─── Individual Risk Checks ───────────────────────────────────
@@ -40,11 +175,14 @@ def check_vague_commitment(commitment: Commitment) -> RiskFlag | None:
     return None
 
 
-def check_overloaded_owner(commitment: Commitment) -> RiskFlag | None:
+def check_overloaded_owner(commitment: Commitment, context: RiskContext = None) -> RiskFlag | None:
     if not commitment.owner:
         return None
-    existing = get_commitments_by_owner(commitment.owner)
-    open_count = len([c for c in existing if c["status"] == "open"])
+    if context is not None:
+        open_count = context.open_count(commitment.owner)
+    else:
+        existing = get_commitments_by_owner(commitment.owner)
+        open_count = len([c for c in existing if c["status"] == "open"])
     if open_count > 4:
         return RiskFlag(
             type="overloaded_owner",
@@ -56,21 +194,30 @@ def check_overloaded_owner(commitment: Commitment) -> RiskFlag | None:
     return None
 
 
-def check_repeated_topic(commitment: Commitment, current_meeting_id: str = None) -> RiskFlag | None:
+def check_repeated_topic(
+    commitment: Commitment,
+    current_meeting_id: str = None,
+    context: RiskContext = None
+) -> RiskFlag | None:
     """
-    Searches ChromaDB for similar past commitments.
+    Looks up similar past commitments — near-duplicates from the MinHash
+    index (or ChromaDB neighbours) loaded by the RiskContext.
     Only flags if found in a DIFFERENT meeting.
     This is the cross-meeting intelligence feature.
     """
-    results = search_similar_commitments(commitment.task, n_results=5)
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
+    if context is not None:
+        documents, metadatas = context.similar_to(commitment.task)
+    else:
+        results = search_similar_commitments(commitment.task, n_results=5)
+        documents = results.get("documents", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
 
-    # Only count results from different meetings
+    # Only count results from different meetings. Without a meeting to
+    # compare against, skip identical text — it may be this commitment itself
     different_meeting_matches = [
         doc for doc, meta in zip(documents, metadatas)
         if meta.get("meeting_id") != current_meeting_id
-        and doc.lower() != commitment.task.lower()
+        and (current_meeting_id is not None or doc.lower() != commitment.task.lower())
     ]
 
     if len(different_meeting_matches) >= 1:
@@ -86,26 +233,396 @@ def check_repeated_topic(commitment: Commitment, current_meeting_id: str = None)
 
 # ─── Run All Checks ───────────────────────────────────────────
 
-def detect_risks(commitments: List[Commitment], meeting_id: str = None) -> List[RiskFlag]:
+# Every check as (name, fn(commitment, context, meeting_id)), in flag order
+CHECKS = [
+    ("no_owner", lambda c, ctx, mid: check_no_owner(c)),
+    ("no_deadline", lambda c, ctx, mid: check_no_deadline(c)),
+    ("vague_commitment", lambda c, ctx, mid: check_vague_commitment(c)),
+    ("overloaded_owner", lambda c, ctx, mid: check_overloaded_owner(c, context=ctx)),
+    ("repeated_topic", lambda c, ctx, mid: check_repeated_topic(c, current_meeting_id=mid, context=ctx)),
+]
+
+# Stage name each check is timed under
+CHECK_STAGES = {name: f"risk_check_{name}" for name, _ in CHECKS}
+
+
+def evaluate_commitment(
+    commitment: Commitment,
+    context: RiskContext,
+    meeting_id: str = None
+) -> List[RiskFlag]:
+    """Runs every check on one commitment. Returns the flags it raised."""
+    flags = []
+    for name, check in CHECKS:
+        with timed(CHECK_STAGES[name]):
+            flag = check(commitment, context, meeting_id)
+        if flag is not None:
+            flags.append(flag)
+    return flags
+
+
+def run_check(
+    name: str,
+    commitments: List[Commitment],
+    context: RiskContext,
+    meeting_id: str = None
+) -> List[RiskFlag]:
+    """Runs a single named check over every commitment — used for streaming."""
+    check = dict(CHECKS)[name]
+    with timed(CHECK_STAGES[name]):
+        flags = [check(c, context, meeting_id) for c in commitments]
+    return [f for f in flags if f is not None]
+
+
+def detect_risks(
+    commitments: List[Commitment],
+    meeting_id: str = None,
+    context: RiskContext = None
+) -> List[RiskFlag]:
     """
     Runs all risk checks on every commitment.
+    Owner counts and similar commitments are loaded once
+    for the whole batch through a RiskContext.
     Returns list of all flags found.
     """
     flags = []
+    if not commitments:
+        return flags
+
+    if context is None:
+        context = RiskContext.load(commitments)
 
     for commitment in commitments:
-        checks = [
-            check_no_owner(commitment),
-            check_no_deadline(commitment),
-            check_vague_commitment(commitment),
-            check_overloaded_owner(commitment),
-            check_repeated_topic(commitment, current_meeting_id=meeting_id),
-        ]
-        flags.extend([f for f in checks if f is not None])
+        flags.extend(evaluate_commitment(commitment, context, meeting_id=meeting_id))
 
     return flags
 
 
+# ─── Materialized Flags ───────────────────────────────────────
+# /risks and /health-score read flags stored in SQLite.
+# Writes re-evaluate only the commitments they can affect: the new
+# rows and the stored rows that matched the new tasks in full, and
+# the overloaded_owner flag of the owners' other open commitments
+# (their open counts changed; nothing else about them did).
+
+def commitment_from_row(row: dict) -> Commitment:
+    return Commitment(
+        task=row["task"],
+        owner=row["owner"],
+        deadline=row["deadline"],
+        priority=row["priority"],
+        is_vague=bool(row["is_vague"])
+    )
+
+
+def refresh_risk_flags(rows: List[dict], context: RiskContext = None):
+    """
+    Re-evaluates stored commitments and replaces their materialized flags.
+    Each row's repeated_topic check looks at meetings other than its own.
+    Done and cancelled commitments carry no flags.
+    """
+    if not rows:
+        return
+
+    open_rows = [row for row in rows if row["status"] == "open"]
+    commitments = [commitment_from_row(row) for row in open_rows]
+    if context is None and commitments:
+        context = RiskContext.load(commitments)
+
+    flags = {row["id"]: (row["created_at"], []) for row in rows}
+    for row, commitment in zip(open_rows, commitments):
+        flags[row["id"]] = (
+            row["created_at"],
+            [f.dict() for f in evaluate_commitment(commitment, context, meeting_id=row["meeting_id"])]
+        )
+    replace_risk_flags(flags)
+
+
+def assess_meeting(meeting_id: str, commitments: List[Commitment]) -> List[RiskFlag]:
+    """
+    Risk flags for a freshly saved meeting.
+    Also refreshes the materialized flags of the stored commitments
+    the meeting can affect.
+    """
+    return assess_meetings([(meeting_id, commitments)])[0]
+
+
+def assess_meetings(meetings: List[tuple[str, List[Commitment]]]) -> List[List[RiskFlag]]:
+    """
+    assess_meeting for many freshly saved meetings at once.
+    Returns one flag list per meeting, each scoped to its own meeting_id.
+    """
+    context, affected = prepare_assessment([meeting_id for meeting_id, _ in meetings])
+    flags = [
+        detect_risks(commitments, meeting_id=meeting_id, context=context)
+        for meeting_id, commitments in meetings
+    ]
+    refresh_affected_risks(context, affected)
+    return flags
+
+
+def prepare_assessment(meeting_ids: List[str]) -> tuple[RiskContext, dict]:
+    """
+    Loads one RiskContext covering the commitments of freshly saved
+    meetings. Returns it with those new rows by id.
+    """
+    new_rows = get_commitments_by_meetings(meeting_ids)
+    affected = {row["id"]: row for row in new_rows}
+    context = RiskContext.load([commitment_from_row(row) for row in affected.values()])
+    return context, affected
+
+
+def refresh_affected_risks(context: RiskContext, affected: dict):
+    """
+    Refreshes materialized flags for the new rows and their similar
+    matches, then only overloaded_owner for their owners' other open rows.
+    """
+    missing = [i for i in context.neighbor_ids() if i not in affected]
+    neighbor_rows = get_commitments_by_ids(missing)
+
+    refresh_risk_flags(list(affected.values()), context=context)
+    # Neighbours need their own similarity lookups
+    refresh_risk_flags(neighbor_rows)
+
+    owners = sorted({row["owner"] for row in affected.values() if row["owner"]})
+    refresh_overload_flags(owners, skip_ids=set(affected) | set(missing))
+
+
+def refresh_owner_risks(owners: List[str]):
+    """Re-evaluates every commitment of the given owners from scratch."""
+    refresh_risk_flags(get_commitments_by_owners(owners))
+
+
+def refresh_status_risks(changed: List[dict]) -> List[str]:
+    """
+    Patches materialized flags after status changes. Closed commitments
+    lose their flags, reopened ones are re-evaluated in full, and only the
+    overloaded_owner flag of their owners' other open commitments is
+    recomputed — the other checks don't depend on status. Rows whose
+    flags come out the same are not rewritten. Returns the owners touched.
+    """
+    if not changed:
+        return []
+
+    owners = sorted({row["owner"] for row in changed if row["owner"]})
+    refresh_risk_flags(changed)
+    refresh_overload_flags(owners, skip_ids={row["id"] for row in changed})
+    return owners
+
+
+def refresh_archive_risks(archived: List[dict]) -> List[str]:
+    """
+    Patches materialized flags after commitments moved to the archive
+    tier: live rows that matched them as repeated topics are re-evaluated,
+    and owners who lost open commitments get overloaded_owner recomputed.
+    Returns the owners touched.
+    """
+    if not archived:
+        return []
+
+    # The archived rows are out of the near-duplicate index (and queued
+    # for removal from Chroma), so these are live matches only
+    context = RiskContext.load([commitment_from_row(row) for row in archived])
+    refresh_risk_flags(get_commitments_by_ids(list(context.neighbor_ids())))
+
+    owners = sorted({row["owner"] for row in archived if row["owner"] and row["status"] == "open"})
+    refresh_overload_flags(owners)
+    return owners
+
+
+def refresh_overload_flags(owners: List[str], skip_ids: set = frozenset()):
+    """
+    Recomputes only the overloaded_owner flag of the owners' open
+    commitments (except skip_ids); rows whose flags come out the same
+    are not rewritten.
+    """
+    others = [
+        row for row in get_commitments_by_owners(owners, status="open")
+        if row["id"] not in skip_ids
+    ]
+    if not others:
+        return
+
+    context = RiskContext(get_open_counts_by_owner(), {})
+    stored = get_risk_flags_by_commitment([row["id"] for row in others])
+    patched = {}
+    for row in others:
+        flags = stored.get(row["id"], [])
+        overloaded = check_overloaded_owner(commitment_from_row(row), context=context)
+        kept = [f for f in flags if f["type"] != "overloaded_owner"]
+        if overloaded is not None:
+            kept = _insert_in_check_order(kept, overloaded.dict())
+        if kept != flags:
+            patched[row["id"]] = (row["created_at"], kept)
+
+    replace_risk_flags(patched)
+
+
+def _insert_in_check_order(flags: List[dict], flag: dict) -> List[dict]:
+    """flags with flag added where evaluate_commitment would have put it."""
+    order = [name for name, _ in CHECKS]
+    rank = order.index(flag["type"])
+    position = next((i for i, f in enumerate(flags) if order.index(f["type"]) > rank), len(flags))
+    return flags[:position] + [flag] + flags[position:]
+
+
+def risk_flags_version() -> str:
+    """Changes whenever stored flags would be computed differently."""
+    return (
+        f"3:{REPEATED_TOPIC_SOURCE}:{REPEATED_TOPIC_JACCARD}:"
+        f"{REPEATED_TOPIC_CONFIRM_JACCARD}:{REPEATED_TOPIC_CONFIRM_COSINE}"
+    )
+
+
+def rebuild_risk_flags():
+    """Recomputes every materialized flag from scratch."""
+    clear_risk_flags()
+    refresh_risk_flags(get_all_commitments())
+    set_meta("risk_flags_ready", risk_flags_version())
+
+
+def ensure_risk_flags():
+    """
+    Backfills the materialized flags for databases created before they
+    existed, and recomputes them after the repeated-topic settings change.
+    """
+    if get_meta("risk_flags_ready") != risk_flags_version():
+        rebuild_risk_flags()
+
+
+def get_current_risks(today: str = None) -> List[RiskFlag]:
+    """Overdue flags, most overdue first, then all materialized flags, newest commitments first."""
+    return get_overdue_flags(today) + [RiskFlag(**row) for row in get_risk_flags()]
+
+
+def parse_risk_cursor(cursor: str | None) -> tuple | None:
+    """
+    A /risks cursor's key: ("overdue", due_date, id) while paging overdue
+    flags, ("flags", created_at, commitment_id, position) after them.
+    Raises ValueError for anything that isn't a cursor we issued.
+    """
+    if not cursor:
+        return None
+    for section, kinds in (("overdue", (str, str, str)), ("flags", (str, str, str, int))):
+        try:
+            key = decode_cursor(cursor, kinds)
+        except ValueError:
+            continue
+        if key[0] == section:
+            return key
+    raise ValueError("Invalid cursor")
+
+
+def get_risk_page(cursor: str = None, limit: int = 100, today: str = None) -> tuple[List[RiskFlag], str | None]:
+    """
+    One page of get_current_risks, keyset-paginated: overdue flags on
+    (due_date, id), then materialized flags on (created_at, commitment_id,
+    position). Cost depends on the page size, not the history.
+    Returns (flags, next_cursor) — next_cursor is None on the last page.
+    """
+    today = today or date.today().isoformat()
+    key = parse_risk_cursor(cursor)
+    flags = []
+    if key is None or key[0] == "overdue":
+        rows = get_overdue_commitments(today, after=key[1:] if key else None, limit=limit + 1)
+        flags = [_overdue_flag(row, today) for row in rows[:limit]]
+        if len(flags) == limit:
+            # A full page — the next one carries on after its last overdue row
+            last = rows[limit - 1]
+            return flags, encode_cursor("overdue", last["due_date"], last["id"])
+        key = None
+
+    room = limit - len(flags)
+    rows = get_risk_flags(after=key[1:] if key else None, limit=room + 1)
+    flags += [RiskFlag(**row) for row in rows[:room]]
+    if len(rows) <= room:
+        return flags, None
+    last = rows[room - 1]
+    return flags, encode_cursor("flags", last["created_at"], last["commitment_id"], last["position"])
+
+
+def get_current_health(today: str = None) -> tuple[int, str, int]:
+    """
+    Health score from the running risk_totals aggregate plus the overdue count.
+    Returns score, label and total number of flags.
+    """
+    totals = {**get_risk_totals(), "overdue": count_overdue_commitments(today or date.today().isoformat())}
+    penalty = sum(PENALTIES.get(flag_type, 0) * count for flag_type, count in totals.items())
+    score, label = score_to_label(100 - penalty)
+    return score, label, sum(totals.values())
+
+
+# ─── Overdue Check ────────────────────────────────────────────
+# Whether a commitment is overdue depends on today's date, not only on
+# the data, so it isn't materialized with the other flags: it is one
+# range query over (status, due_date) on every read.
+
+def get_overdue_flags(today: str = None) -> List[RiskFlag]:
+    """A high-severity flag for each open commitment whose due date has passed."""
+    today = today or date.today().isoformat()
+    return [_overdue_flag(row, today) for row in get_overdue_commitments(today)]
+
+
+def _overdue_flag(row: dict, today: str) -> RiskFlag:
+    days = (date.fromisoformat(today) - date.fromisoformat(row["due_date"])).days
+    return RiskFlag(
+        type="overdue",
+        task=row["task"],
+        owner=row["owner"],
+        severity="high",
+        insight=f"Overdue by {days} day{'s' if days != 1 else ''} (due {row['due_date']}): '{row['task']}'"
+    )
+
+
+# ─── Dashboard Summary ────────────────────────────────────────
+
+# workspace -> ((data_version, date), summary) of its last computation
+_summaries: OrderedDict[str, tuple[tuple[int, str], dict]] = OrderedDict()
+_summary_lock = threading.Lock()
+
+
+def get_dashboard_summary(data_version: int) -> dict:
+    """
+    Health score, risk flags and counts from one read of the materialized
+    flags. Memoized per workspace, data version and date — unchanged data
+    is never re-read on the same day; overdue flags roll over at midnight.
+    """
+    workspace_id = current_workspace()
+    key = (data_version, date.today().isoformat())
+    with _summary_lock:
+        memo = _summaries.get(workspace_id)
+        if memo is not None and memo[0] == key:
+            _summaries.move_to_end(workspace_id)
+            return memo[1]
+
+        flags = get_current_risks(key[1])
+        score, label = calculate_health_score(flags)
+        by_status = count_commitments_by_status()
+
+        by_type: dict[str, int] = {}
+        by_severity: dict[str, int] = {}
+        for flag in flags:
+            by_type[flag.type] = by_type.get(flag.type, 0) + 1
+            by_severity[flag.severity] = by_severity.get(flag.severity, 0) + 1
+
+        summary = {
+            "data_version": data_version,
+            "health_score": score,
+            "health_label": label,
+            "total_commitments": sum(by_status.values()),
+            "total_risks": len(flags),
+            "commitments_by_status": by_status,
+            "risks_by_type": by_type,
+            "risks_by_severity": by_severity,
+            "risks": [flag.dict() for flag in flags]
+        }
+        _summaries[workspace_id] = (key, summary)
+        _summaries.move_to_end(workspace_id)
+        while len(_summaries) > WORKSPACE_CACHE_SIZE:
+            _summaries.popitem(last=False)
+        return summary
+
+
 # ─── Health Score ─────────────────────────────────────────────
 
 def calculate_health_score(flags: List[RiskFlag]) -> tuple[int, str]:
@@ -116,17 +633,13 @@ def calculate_health_score(flags: List[RiskFlag]) -> tuple[int, str]:
     score = 100
 
     for flag in flags:
-        if flag.type == "no_owner":
-            score -= 15
-        elif flag.type == "repeated_topic":
-            score -= 12
-        elif flag.type == "no_deadline":
-            score -= 10
-        elif flag.type == "overloaded_owner":
-            score -= 10
-        elif flag.type == "vague_commitment":
-            score -= 8
+        score -= PENALTIES.get(flag.type, 0)
+
+    return score_to_label(score)
+
 
+def score_to_label(score: int) -> tuple[int, str]:
+    """Clamps a raw score at 0 and attaches its label."""
     score = max(score, 0)
 
     if score >= 75:
@@ -1,23 +1,88 @@
-from fastapi import APIRouter, HTTPException
+import hashlib
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, JSONResponse
 from app.schemas import (
-    IngestRequest, IngestResponse,
+    IngestRequest, IngestResponse, IngestJobStatus,
+    BatchIngestRequest, BatchIngestResponse,
     QueryRequest, QueryResponse,
-    Commitment, RiskFlag
+    StatusUpdate, BatchStatusRequest, StatusUpdateResponse
 )
-from app.extractor import extract_commitments
+from app.ingest import run_ingest, run_batch_ingest_async, stream_ingest, NoCommitmentsError
+from app.jobs import ingest_jobs, QueueFullError
 from app.memory import (
-    save_meeting, save_commitments,
-    get_all_commitments, get_commitments_by_owner,
-    search_similar_commitments, init_db
+    list_commitments, parse_list_params, count_commitments, count_archived_commitments,
+    embedding_cache_stats, get_data_version,
+    get_query_cache, current_workspace, store_cache_stats, get_commitment
 )
-from app.risk_engine import detect_risks, calculate_health_score
-from langchain_openai import ChatOpenAI
-from app.config import OPENAI_API_KEY, MODEL_NAME
-import uuid
+from app.status import apply_status_updates
+from app.workspaces import workspace_scope
+from app.query import answer_question, stream_answer
+from app.extractor import extraction_cache_stats, extraction_stats
+from app.streaming import stream_events
+from app.warmup import warmup
+from app.indexer import vector_indexer
+from app.archive import compact_workspace, archive_compactor
+from app.llm_scheduler import llm_scheduler, LLMRateLimitedError
+from app.metrics import render as render_metrics
+from app.risk_engine import get_risk_page, parse_risk_cursor, get_current_health, get_dashboard_summary
+from app.config import (
+    BATCH_INGEST_MAX_ITEMS, STATUS_BATCH_MAX_ITEMS, METRICS_ENABLED,
+    COMMITMENTS_PAGE_SIZE, COMMITMENTS_MAX_PAGE_SIZE, RISKS_PAGE_SIZE, RISKS_MAX_PAGE_SIZE
+)
+from typing import Literal
+
+# Every route runs against the workspace named by X-Workspace-ID
+router = APIRouter(dependencies=[Depends(workspace_scope)])
+
+StreamFormat = Literal["ndjson", "sse"]
+
+
+# ─── Conditional GETs ─────────────────────────────────────────
+# Read endpoints tag responses with the workspace's data version (bumped
+# on every write) plus the workspace and query string. A client sending
+# the tag back in If-None-Match gets 304 with no body until something changes.
+
+def _etag(request: Request, data_version: int) -> str:
+    digest = hashlib.blake2b(
+        f"{current_workspace()}:{request.url.path}?{request.url.query}".encode(), digest_size=6
+    ).hexdigest()
+    # Overdue flags change at midnight without a write — the date is part of the tag
+    return f'W/"{data_version}-{date.today().strftime("%Y%m%d")}-{digest}"'
+
 
-router = APIRouter()
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def conditional_response(request: Request, build) -> Response:
+    """
+    304 if the client's ETag is current, otherwise build(data_version)
+    as JSON. The version is read first, so a write racing the build
+    only makes the body newer than its tag — never staler.
+    Validate parameters before calling this: a bad request is a 400
+    whatever the client's tag.
+    """
+    data_version = get_data_version()
+    etag = _etag(request, data_version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "X-Workspace-ID"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(data_version), headers=headers)
+
+
+def _too_many_requests(error: LLMRateLimitedError) -> HTTPException:
+    """429 with Retry-After, for when the LLM scheduler can't take the call."""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(int(error.retry_after + 0.999))}
+    )
 
-llm = ChatOpenAI(model=MODEL_NAME, temperature=0)
 
 # ─── Ingest Meeting ───────────────────────────────────────────
 
@@ -29,114 +94,361 @@ def ingest_meeting(request: IngestRequest):
     saves to memory → detects risks → returns health score.
     """
     try:
-        #  Extract commitments using LangChain
-        commitments = extract_commitments(request.content)
-
-        if not commitments:
-            raise HTTPException(status_code=400, detail="No commitments found in transcript")
+        return run_ingest(request)
 
-        #  Save meeting to SQLite
-        meeting_id = save_meeting(request.meeting_title)
-
-        # Save commitments to SQLite + ChromaDB
-        save_commitments(meeting_id, request.meeting_title, commitments)
+    except NoCommitmentsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LLMRateLimitedError as e:
+        raise _too_many_requests(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Detect risks
-        flags = detect_risks(commitments, meeting_id=meeting_id)
 
-        # Calculate health score
-        score, label = calculate_health_score(flags)
+# ─── Bulk Ingest ──────────────────────────────────────────────
 
-        return IngestResponse(
-            meeting_id=meeting_id,
-            meeting_title=request.meeting_title,
-            commitments_extracted=len(commitments),
-            health_score=score,
-            health_label=label,
-            commitments=commitments,
-            risk_flags=flags
+@router.post("/ingest/batch", response_model=BatchIngestResponse)
+async def ingest_batch(request: BatchIngestRequest):
+    """
+    Backfill endpoint: many transcripts in one call.
+    Per-item results plus one combined health score.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to ingest")
+    if len(request.items) > BATCH_INGEST_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_INGEST_MAX_ITEMS} items per batch"
         )
 
+    try:
+        return await run_batch_ingest_async(request)
+    except LLMRateLimitedError as e:
+        raise _too_many_requests(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─── Async Ingest ─────────────────────────────────────────────
+
+@router.post("/ingest/async", response_model=IngestJobStatus, status_code=202)
+async def ingest_meeting_async(request: IngestRequest):
+    """
+    Queues the transcript and returns a job id immediately.
+    Runs on the event loop — submit() touches the asyncio queue.
+    Poll /jobs/{job_id} for progress and the final IngestResponse.
+    """
+    try:
+        job = ingest_jobs.submit(request)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return job.to_status()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_job(job_id: str):
+    """Progress of a background ingest job."""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job.to_status()
+
+
 # ─── Get All Commitments ──────────────────────────────────────
 
 @router.get("/commitments")
-def get_commitments(owner: str = None):
+def get_commitments(
+    request: Request,
+    owner: str = None,
+    status: str = None,
+    priority: str = None,
+    meeting_id: str = None,
+    cursor: str = None,
+    limit: int = Query(COMMITMENTS_PAGE_SIZE, ge=1, le=COMMITMENTS_MAX_PAGE_SIZE),
+    fields: str = None,
+    archived: bool = False,
+    due_after: str = None,
+    due_before: str = None
+):
+    """
+    Returns one page of commitments, newest first.
+    Optional filters: owner, status, priority, meeting_id.
+    due_after / due_before: ISO dates (inclusive) on the resolved due date.
+    fields: comma-separated projection, e.g. fields=task,owner,deadline
+    archived=true lists the archive tier instead of live commitments.
+    Pass next_cursor back as cursor to get the following page.
+    Example: /commitments?owner=Abhishek&status=open&due_before=2025-06-30&limit=50
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        parse_list_params(field_list, cursor, due_after, due_before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def build(data_version):
+        results, next_cursor = list_commitments(
+            owner=owner,
+            status=status,
+            priority=priority,
+            meeting_id=meeting_id,
+            cursor=cursor,
+            limit=limit,
+            fields=field_list,
+            archived=archived,
+            due_after=due_after,
+            due_before=due_before
+        )
+        return {"total": len(results), "next_cursor": next_cursor, "commitments": results}
+
+    return conditional_response(request, build)
+
+
+# ─── Update Status ────────────────────────────────────────────
+
+@router.patch("/commitments/{commitment_id}")
+def update_commitment_status(commitment_id: str, request: StatusUpdate):
     """
-    Returns all commitments.
-    Optional filter by owner name.
-    Example: /commitments?owner=Abhishek
+    Marks one commitment open, done or cancelled.
+    Returns the updated commitment.
     """
-    if owner:
-        results = get_commitments_by_owner(owner)
-    else:
-        results = get_all_commitments()
+    result = apply_status_updates({commitment_id: request.status})
+    if result.not_found:
+        raise HTTPException(status_code=404, detail="Commitment not found")
 
-    return {"total": len(results), "commitments": results}
+    return get_commitment(commitment_id)
+
+
+@router.post("/commitments/status:batch", response_model=StatusUpdateResponse)
+def update_commitment_statuses_batch(request: BatchStatusRequest):
+    """
+    Many status changes in one transaction.
+    If an id appears more than once, its last entry wins.
+    Returns counts, unknown ids and the new health score.
+    """
+    if not request.updates:
+        raise HTTPException(status_code=400, detail="No updates to apply")
+    if len(request.updates) > STATUS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {STATUS_BATCH_MAX_ITEMS} updates per batch"
+        )
+
+    return apply_status_updates({u.id: u.status for u in request.updates})
 
 
 # ─── Get Health Score ─────────────────────────────────────────
 
 @router.get("/health-score")
-def get_health_score():
+def get_health_score(request: Request):
     """
-    Calculates current health score across all commitments.
+    Current health score across all commitments.
+    Read from the materialized risk totals — no re-analysis.
     """
-    all_commitments = get_all_commitments()
+    def build(data_version):
+        score, label, total_risks = get_current_health()
+        return {
+            "health_score": score,
+            "health_label": label,
+            "total_commitments": count_commitments(),
+            "total_risks": total_risks
+        }
+
+    return conditional_response(request, build)
 
-    commitment_objects = [
-        Commitment(
-            task=c["task"],
-            owner=c["owner"],
-            deadline=c["deadline"],
-            priority=c["priority"],
-            is_vague=bool(c["is_vague"])
-        )
-        for c in all_commitments
-    ]
 
-    flags = detect_risks(commitment_objects)
-    score, label = calculate_health_score(flags)
+# ─── Get Risk Flags ───────────────────────────────────────────
 
+@router.get("/risks")
+def get_risks(
+    request: Request,
+    cursor: str = None,
+    limit: int = Query(RISKS_PAGE_SIZE, ge=1, le=RISKS_MAX_PAGE_SIZE)
+):
+    """
+    Returns one page of current risk flags: overdue ones first, most
+    overdue first, then the materialized flags, newest commitments first.
+    total_risks counts every flag, from the running totals.
+    Pass next_cursor back as cursor to get the following page.
+    """
+    try:
+        parse_risk_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def build(data_version):
+        flags, next_cursor = get_risk_page(cursor, limit)
+        return {
+            "total_risks": get_current_health()[2],
+            "next_cursor": next_cursor,
+            "risks": [f.dict() for f in flags]
+        }
+
+    return conditional_response(request, build)
+
+
+# ─── Dashboard Summary ────────────────────────────────────────
+
+@router.get("/dashboard/summary")
+def get_summary(request: Request):
+    """
+    Everything the dashboard's health tab shows in one response:
+    score, label, flags, and counts by status, risk type and severity.
+    Computed once per data version.
+    """
+    return conditional_response(request, get_dashboard_summary)
+
+
+# ─── Cache Stats ──────────────────────────────────────────────
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """
+    Hit rates of the extraction, /query answer and embedding caches.
+    The /query cache is the workspace's own; workspaces shows the store handle cache.
+    """
     return {
-        "health_score": score,
-        "health_label": label,
-        "total_commitments": len(all_commitments),
-        "total_risks": len(flags)
+        "extraction": extraction_cache_stats(),
+        "query": get_query_cache().stats(),
+        "embedding": embedding_cache_stats(),
+        "workspaces": store_cache_stats()
     }
 
 
-# ─── Get Risk Flags ───────────────────────────────────────────
+# ─── Extraction Stats ─────────────────────────────────────────
 
-@router.get("/risks")
-def get_risks():
+@router.get("/extraction-stats")
+def get_extraction_stats():
     """
-    Returns all current risk flags across all commitments.
+    How much of extraction the rule fast path handled without the LLM,
+    and the estimated LLM calls, prompt tokens and latency saved.
     """
-    all_commitments = get_all_commitments()
+    return extraction_stats()
 
-    commitment_objects = [
-        Commitment(
-            task=c["task"],
-            owner=c["owner"],
-            deadline=c["deadline"],
-            priority=c["priority"],
-            is_vague=bool(c["is_vague"])
-        )
-        for c in all_commitments
+
+# ─── Metrics ──────────────────────────────────────────────────
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus text format: stage/route/LLM latency histograms,
+    LLM calls and token counts, plus cache and queue gauges.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+
+    index = vector_indexer.status()
+    gauges = [
+        ("commitiq_ingest_queue_depth", "Background ingest jobs waiting", {}, ingest_jobs.depth()),
+        ("commitiq_vector_outbox_depth", "Commitments waiting to be indexed in Chroma", {}, index["depth"]),
+        ("commitiq_vector_outbox_lag_seconds", "Age of the oldest un-indexed outbox row", {}, index["lag_s"]),
+        ("commitiq_vector_outbox_failing", "Outbox rows backing off after a failed attempt", {}, index["failing"])
     ]
+    caches = {
+        "extraction": extraction_cache_stats(),
+        "query": get_query_cache().stats(),
+        "embedding": embedding_cache_stats()
+    }
+    scheduler = llm_scheduler.status()
+    for caller, count in scheduler["in_flight_by_caller"].items():
+        gauges.append(("commitiq_llm_in_flight", "LLM calls in flight, by caller", {"caller": caller}, count))
+    for caller, count in scheduler["queued_by_caller"].items():
+        gauges.append(("commitiq_llm_queued", "LLM calls waiting for the rate limiter, by caller", {"caller": caller}, count))
+    gauges.append(("commitiq_llm_rate_factor", "Share of the configured LLM rate in use after 429 backoff", {}, scheduler["rate_factor"]))
+    workspaces = store_cache_stats()
+    gauges.append(("commitiq_workspace_stores_open", "Workspace stores held in the handle cache", {}, workspaces["open"]))
+    gauges.append(("commitiq_workspace_store_evictions", "Workspace stores evicted from the handle cache", {}, workspaces["evictions"]))
+    for cache, stats in caches.items():
+        for stat, value in stats.items():
+            gauges.append((
+                f"commitiq_cache_{stat}", "Cache counters since process start",
+                {"cache": cache}, value
+            ))
+    extraction = extraction_stats()
+    for stat, value in extraction.items():
+        if stat != "mode":
+            gauges.append((
+                f"commitiq_extraction_{stat}", "Rule fast-path extraction totals since process start",
+                {"mode": extraction["mode"]}, value
+            ))
+    return PlainTextResponse(
+        render_metrics(sorted(gauges, key=lambda g: g[0])),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# ─── Vector Index ─────────────────────────────────────────────
+
+@router.get("/vector-index")
+def get_vector_index():
+    """
+    Background Chroma indexing: outbox depth, lag of the oldest
+    queued row, rows indexed and failed attempts since start.
+    """
+    return vector_indexer.status()
+
+
+# ─── LLM Scheduler ────────────────────────────────────────────
+
+@router.get("/llm-scheduler")
+def get_llm_scheduler():
+    """
+    LLM calls made, merged into an identical in-flight call and rate
+    limited since start; calls in flight and queued now; and the share
+    of the configured rate in use after 429 backoff.
+    """
+    return llm_scheduler.status()
+
+
+# ─── Archive ──────────────────────────────────────────────────
 
-    flags = detect_risks(commitment_objects)
+@router.post("/archive/compact")
+def compact_archive(
+    closed_after_days: float = Query(None, ge=0),
+    open_after_days: float = Query(None, ge=0)
+):
+    """
+    Moves this workspace's closed (and, if configured, old open) commitments
+    to the archive tier now, instead of waiting for the background compactor.
+    Query params override ARCHIVE_CLOSED_AFTER_DAYS / ARCHIVE_OPEN_AFTER_DAYS;
+    0 archives every commitment of that kind.
+    """
+    overrides = {
+        key: value for key, value in (
+            ("closed_after_days", closed_after_days), ("open_after_days", open_after_days)
+        ) if value is not None
+    }
+    return compact_workspace(**overrides)
 
+
+@router.get("/archive")
+def get_archive():
+    """Live vs archived commitment counts and the background compactor's state."""
     return {
-        "total_risks": len(flags),
-        "risks": [f.dict() for f in flags]
+        "live_commitments": count_commitments(),
+        "archived_commitments": count_archived_commitments(),
+        "compactor": archive_compactor.status()
     }
 
 
+# ─── Warmup ───────────────────────────────────────────────────
+
+@router.post("/warmup", status_code=202)
+def start_warmup():
+    """
+    Builds the LLM clients, vector store and embedder in the background.
+    Poll GET /warmup until ready.
+    """
+    started = warmup.start()
+    return {"started": started, **warmup.status()}
+
+
+@router.get("/warmup")
+def get_warmup():
+    """Readiness of each lazily-built component."""
+    return warmup.status()
+
+
 # ─── Natural Language Query ───────────────────────────────────
 
 @router.post("/query", response_model=QueryResponse)
@@ -147,40 +459,30 @@ def query_commitments(request: QueryRequest):
     Example: "What has Abhishek committed to this month?"
     """
     try:
-        # Search ChromaDB semantically
-        results = search_similar_commitments(request.question, n_results=5)
-        documents = results.get("documents", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-
-        if not documents:
-            return QueryResponse(
-                question=request.question,
-                answer="No relevant commitments found in memory."
-            )
-
-        # Build context for LLM
-        context = "\n".join([
-            f"- Task: {doc} | Owner: {meta.get('owner')} | "
-            f"Deadline: {meta.get('deadline')} | "
-            f"Meeting: {meta.get('meeting_title')} | "
-            f"Status: {meta.get('status')}"
-            for doc, meta in zip(documents, metadatas)
-        ])
-
-        # Ask LLM to answer using context
-        prompt = f"""You are an execution intelligence assistant.
-Based on these commitments from past meetings:
-
-{context}
-
-Answer this question clearly and concisely: {request.question}"""
-
-        answer = llm.invoke(prompt)
-
-        return QueryResponse(
-            question=request.question,
-            answer=answer.content
-        )
+        return answer_question(request.question, request.include_archived)
 
+    except LLMRateLimitedError as e:
+        raise _too_many_requests(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─── Streaming Variants ───────────────────────────────────────
+
+@router.post("/query/stream")
+async def query_commitments_stream(request: QueryRequest, format: StreamFormat = "ndjson"):
+    """
+    /query with the answer streamed token by token.
+    format=ndjson (default) or format=sse.
+    """
+    return stream_events(stream_answer(request.question, request.include_archived), format)
+
+
+@router.post("/ingest/stream")
+async def ingest_meeting_stream(request: IngestRequest, format: StreamFormat = "ndjson"):
+    """
+    /ingest with results streamed as they are produced:
+    commitments per extracted chunk, risk flags per check, then the full response.
+    format=ndjson (default) or format=sse.
+    """
+    return stream_events(stream_ingest(request), format)
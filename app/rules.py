@@ -0,0 +1,172 @@
+import re
+from typing import List
+from app.schemas import Commitment
+
+# ─── Rule-Based Pre-Extraction ────────────────────────────────
+# Most transcript lines are formulaic: "Priya will schedule the design
+# review by Wednesday." Those are pulled out here, deterministically and
+# for free; only the leftover, ambiguous sentences go to the LLM.
+# A sentence is only claimed when every part of it is unambiguous —
+# a named owner, an explicit commitment verb, no hedging, and a
+# deadline (if any) we recognise. Anything else is left for the model.
+
+# Bump whenever the patterns change — invalidates cached extractions
+RULES_VERSION = "1"
+
+# Names only: "Priya", "Rishabh Singh" — not "The team", "Someone", "We"
+NAME = r"[A-Z][a-z]+(?: [A-Z][a-z]+)?"
+NOT_OWNERS = {
+    "someone", "somebody", "everyone", "everybody", "nobody", "anyone",
+    "we", "they", "he", "she", "i", "you", "it", "team", "the", "no", "all", "maybe",
+    "then", "also", "and", "so", "next", "finally", "ok", "okay", "great", "sure", "yes"
+}
+
+# "<Owner> [confirmed/said] [that] [he/she/they] will <task>"
+COMMITMENT_VERBS = (
+    r"(?:will|'ll|is going to|are going to|committed to|commits to|agreed to|agrees to|"
+    r"promised to|promises to|volunteered to|is taking|took|owns|is on)"
+)
+LEADINS = r"(?:(?:confirmed|said|mentioned|noted|stated|promised|agreed)(?: that)? )?(?:(?:he|she|they) )?"
+
+DEADLINE_WORDS = (
+    r"(?:(?:this|next|coming) )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|"
+    r"week|month|quarter|sprint|year)"
+    r"|tomorrow(?: morning| afternoon| evening)?|today|tonight"
+    r"|(?:the )?end of (?:the )?(?:day|week|month|quarter|sprint|year)(?: tomorrow)?"
+    r"|(?:day|week|month) end|eod|eow|eom|cob"
+    r"|q[1-4](?: \d{4})?"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]* \d{1,2}(?:st|nd|rd|th)?"
+    r"|\d{1,2}(?:st|nd|rd|th)? (?:of )?(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+    r"|\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{4}-\d{2}-\d{2}"
+    r"|(?:the )?(?:next|following) (?:meeting|standup|sync|review)"
+)
+DEADLINE = re.compile(
+    rf"\s+(?:by|before|until|on|no later than|due)\s+(?P<deadline>(?:{DEADLINE_WORDS})(?: (?:{DEADLINE_WORDS}))?)$",
+    re.IGNORECASE
+)
+
+COMMITMENT = re.compile(
+    rf"^(?P<owner>{NAME}) {LEADINS}{COMMITMENT_VERBS} (?P<task>.+)$"
+)
+SPEAKER = re.compile(rf"^(?P<speaker>{NAME})\s*:\s*(?P<text>.+)$")
+FIRST_PERSON = re.compile(rf"^(?:I {COMMITMENT_VERBS}|I'll) (?P<task>.+)$")
+
+# Any of these means the sentence isn't an explicit commitment
+HEDGES = re.compile(
+    r"\b(?:maybe|might|may|perhaps|probably|possibly|hopefully|try(?:ing)? to|not sure|"
+    r"wasn't sure|unsure|if|unless|should|could|would|someone|somebody|no one|nobody|"
+    r"eventually|at some point|sometime|tbd|look into|think about|explore|circle back|"
+    r"not|n't)\b|\?",
+    re.IGNORECASE
+)
+
+# Sentences with none of these carry no commitment for the LLM to find either
+COMMITMENT_CUES = re.compile(
+    r"\b(?:will|'ll|going to|committed|commit|agreed|agree|promised|volunteered|assigned|"
+    r"owns?|needs? to|should|must|has to|have to|follow(?:ing)? up|take care|handle|"
+    r"responsible|action item|todo|to-do|deadline|by (?:end|next|tomorrow|monday|tuesday|"
+    r"wednesday|thursday|friday))\b",
+    re.IGNORECASE
+)
+
+HIGH_PRIORITY = re.compile(r"\b(?:urgent(?:ly)?|asap|critical|high[- ]priority|top priority|blocker)\b", re.IGNORECASE)
+LOW_PRIORITY = re.compile(r"\b(?:low[- ]priority|when (?:possible|there's time)|nice to have)\b", re.IGNORECASE)
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!;])\s+(?=[A-Z])")
+
+
+def split_sentences(transcript: str) -> List[tuple[str | None, str]]:
+    """(speaker, sentence) pairs in order; speaker comes from a `Name:` line prefix."""
+    sentences = []
+    for line in transcript.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        speaker = None
+        match = SPEAKER.match(line)
+        if match and match["speaker"].lower() not in NOT_OWNERS:
+            speaker, line = match["speaker"], match["text"]
+        for sentence in SENTENCE_BREAK.split(line):
+            sentences.append((speaker, sentence.strip()))
+    return sentences
+
+
+def _priority(sentence: str) -> str:
+    if HIGH_PRIORITY.search(sentence):
+        return "high"
+    if LOW_PRIORITY.search(sentence):
+        return "low"
+    return "medium"
+
+
+TRAILING_URGENCY = re.compile(r"(?:,?\s*(?:urgently|asap|as soon as possible))+$", re.IGNORECASE)
+
+
+def _clean_task(task: str) -> str | None:
+    task = task.strip(" ,")
+    # A task needs a verb and an object — "do it" / "handle that" are too vague
+    if len(task.split()) < 2 or re.fullmatch(r"\w+ (?:it|that|this|them)", task, re.IGNORECASE):
+        return None
+    return task[0].upper() + task[1:]
+
+
+def match_sentence(sentence: str, speaker: str | None = None) -> Commitment | None:
+    """The commitment stated by one sentence, or None if it isn't fully explicit."""
+    text = sentence.rstrip(" .!")
+    if not text or HEDGES.search(text):
+        return None
+
+    owner, task = None, None
+    match = COMMITMENT.match(text)
+    if match and match["owner"].split()[0].lower() not in NOT_OWNERS:
+        owner, task = match["owner"], match["task"]
+    elif speaker:
+        match = FIRST_PERSON.match(text)
+        if match:
+            owner, task = speaker, match["task"]
+    if owner is None:
+        return None
+
+    deadline = None
+    task = TRAILING_URGENCY.sub("", task)
+    match = DEADLINE.search(task)
+    if match:
+        deadline = match["deadline"]
+        task = task[:match.start()]
+    elif re.search(r"\b(?:by|before|until|due)\b", task, re.IGNORECASE):
+        # Some deadline we can't parse — let the model read it
+        return None
+
+    task = _clean_task(task)
+    if task is None:
+        return None
+
+    return Commitment(
+        task=task,
+        owner=owner,
+        deadline=deadline,
+        priority=_priority(sentence),
+        is_vague=False
+    )
+
+
+def extract_explicit(transcript: str) -> tuple[List[Commitment], str]:
+    """
+    Pulls every explicit commitment out of a transcript.
+    Returns the commitments and the leftover text for the LLM — the
+    unclaimed sentences, or "" if none of them could hold a commitment.
+    """
+    commitments = []
+    leftover_lines: list[str] = []
+
+    for speaker, sentence in split_sentences(transcript):
+        commitment = match_sentence(sentence, speaker)
+        if commitment is not None:
+            commitments.append(commitment)
+        else:
+            # Keep speaker labels so the model can still resolve "I"
+            leftover_lines.append(f"{speaker}: {sentence}" if speaker else sentence)
+
+    if not any(COMMITMENT_CUES.search(line) for line in leftover_lines):
+        return commitments, ""
+    return commitments, "\n".join(leftover_lines)
@@ -1,11 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 
 # What comes INTO the API
 class IngestRequest(BaseModel):
     meeting_title: str
     content: str
+    bypass_cache: bool = False   # force a fresh extraction
 
 
 # A single commitment extracted by AI
@@ -31,6 +32,29 @@ class RiskFlag(BaseModel):
     insight: str
 
 
+# How one transcript was extracted — rule fast path vs LLM
+class ExtractionReport(BaseModel):
+    mode: str = "llm"
+    cached: bool = False
+    rule_commitments: int = 0
+    llm_commitments: int = 0
+    rules_fraction: float = 0.0
+    llm_calls: int = 0
+    llm_calls_saved: int = 0
+    chars_total: int = 0
+    chars_to_llm: int = 0
+    est_prompt_tokens_saved: int = 0
+    est_latency_saved_ms: float = 0.0
+    # Preprocessing: transcript tokens before, after, and sent to the LLM
+    tokens_raw: int = 0
+    tokens_preprocessed: int = 0
+    tokens_to_llm: int = 0
+    preprocess_reduction: float = 0.0
+    turns_dropped: int = 0
+    budget_truncated: bool = False
+    elapsed_ms: float = 0.0
+
+
 # Full API response after ingesting a meeting
 class IngestResponse(BaseModel):
     meeting_id: str
@@ -40,13 +64,81 @@ class IngestResponse(BaseModel):
     health_label: str
     commitments: List[Commitment]
     risk_flags: List[RiskFlag]
+    extraction: Optional[ExtractionReport] = None
+
+
+# Many transcripts in one call (/ingest/batch)
+class BatchIngestRequest(BaseModel):
+    items: List[IngestRequest]
+
+
+class BatchIngestItemResult(BaseModel):
+    meeting_title: str
+    status: str          # ok | failed
+    meeting_id: Optional[str] = None
+    commitments_extracted: int = 0
+    commitments: List[Commitment] = []
+    risk_flags: List[RiskFlag] = []
+    error: Optional[str] = None
+
+
+class BatchIngestResponse(BaseModel):
+    total_items: int
+    succeeded: int
+    failed: int
+    commitments_extracted: int
+    health_score: int
+    health_label: str
+    results: List[BatchIngestItemResult]
+
+
+# Status of a background ingest job (/ingest/async, /jobs/{id})
+class IngestJobStatus(BaseModel):
+    job_id: str
+    status: str          # queued | running | completed | failed
+    stage: str
+    progress: float
+    created_at: str
+    updated_at: str
+    error: Optional[str] = None
+    result: Optional[IngestResponse] = None
+
+
+# Commitment status changes (PATCH /commitments/{id}, /commitments/status:batch)
+CommitmentStatus = Literal["open", "done", "cancelled"]
+
+
+class StatusUpdate(BaseModel):
+    status: CommitmentStatus
+
+
+class CommitmentStatusChange(BaseModel):
+    id: str
+    status: CommitmentStatus
+
+
+class BatchStatusRequest(BaseModel):
+    updates: List[CommitmentStatusChange]
+
+
+class StatusUpdateResponse(BaseModel):
+    updated: int
+    unchanged: int
+    not_found: List[str] = []
+    owners_refreshed: List[str] = []
+    health_score: int
+    health_label: str
 
 
 # For the /query endpoint
 class QueryRequest(BaseModel):
     question: str
+    include_archived: bool = False   # also search archived commitments
 
 
 class QueryResponse(BaseModel):
     question: str
-    answer: str
\ No newline at end of file
+    answer: str
+    cached: bool = False   # served from the answer cache, no LLM call
+    route: str = "rag"     # sql | filtered_rag | rag — see app.query_planner
+    total_matches: Optional[int] = None   # sql route: every matching commitment
\ No newline at end of file
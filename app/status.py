@@ -0,0 +1,31 @@
+from app.schemas import StatusUpdateResponse
+from app.memory import update_commitment_statuses, get_query_cache
+from app.metrics import timed
+from app.risk_engine import refresh_status_risks, get_current_health
+
+
+# ─── Status Updates ───────────────────────────────────────────
+# One transaction sets the statuses and queues the Chroma metadata
+# (applied by the vector indexer as one batched collection.update).
+# Only the risk flags and cached answers of the changed commitments
+# and their owners are touched afterwards.
+
+def apply_status_updates(updates: dict[str, str]) -> StatusUpdateResponse:
+    """Sets commitment_id -> status for every entry and refreshes what depends on it."""
+    with timed("update_statuses"):
+        changed, unchanged, not_found = update_commitment_statuses(updates)
+
+    # Cached /query answers citing these commitments quote the old status
+    get_query_cache().invalidate_ids([row["id"] for row in changed])
+    with timed("refresh_status_risks"):
+        owners = refresh_status_risks(changed)
+
+    score, label, _ = get_current_health()
+    return StatusUpdateResponse(
+        updated=len(changed),
+        unchanged=len(unchanged),
+        not_found=not_found,
+        owners_refreshed=owners,
+        health_score=score,
+        health_label=label
+    )
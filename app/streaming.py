@@ -0,0 +1,37 @@
+import json
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+
+# ?format= values accepted by the streaming endpoints
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def encode_event(event: str, data: dict, fmt: str) -> str:
+    """One event as an NDJSON line or a Server-Sent Events frame."""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+def stream_events(events: AsyncIterator[tuple[str, dict]], fmt: str) -> StreamingResponse:
+    """
+    Wraps an async (event, data) iterator in a streaming response.
+    An exception mid-stream becomes a final "error" event — the status
+    code has already been sent by then.
+    """
+    async def body():
+        try:
+            async for event, data in events:
+                yield encode_event(event, data, fmt)
+        except Exception as e:
+            yield encode_event("error", {"detail": str(e)}, fmt)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[fmt],
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Warmup ───────────────────────────────────────────────────
+# The LLM clients, Chroma and the embedder are all built lazily so the
+# process starts fast. Warmup builds them ahead of the first request,
+# in a background thread, so readiness probes can poll GET /warmup.
+
+def _warm_extraction():
+    from app.extractor import get_extraction_chain
+    get_extraction_chain()
+
+
+def _warm_tokenizer():
+    # Downloads the tiktoken encoding on first use; falls back to estimates if it can't
+    from app.preprocess import count_tokens
+    count_tokens("warmup")
+
+
+def _warm_query():
+    from app.query import get_query_llm
+    get_query_llm()
+
+
+def _warm_vector_store():
+    from app.memory import get_store
+    get_store().collection()
+
+
+def _warm_embedder():
+    from app.memory import embed_texts
+    embed_texts(["warmup"])
+
+
+COMPONENTS = [
+    ("extraction_chain", _warm_extraction),
+    ("tokenizer", _warm_tokenizer),
+    ("query_llm", _warm_query),
+    ("vector_store", _warm_vector_store),
+    ("embedder", _warm_embedder),
+]
+
+
+class Warmup:
+    """Tracks one background warmup run and the state of each component."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.components = {name: {"status": "cold"} for name, _ in COMPONENTS}
+
+    def start(self) -> bool:
+        """Starts warming in the background; False if a run is already going."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        for name, warm in COMPONENTS:
+            self.components[name] = {"status": "warming"}
+            started = time.perf_counter()
+            try:
+                warm()
+            except Exception as e:
+                logger.warning("Warmup of %s failed: %s", name, e)
+                self.components[name] = {"status": "failed", "error": str(e)}
+                continue
+            self.components[name] = {
+                "status": "ready",
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+
+    def status(self) -> dict:
+        states = {c["status"] for c in self.components.values()}
+        return {
+            "ready": states == {"ready"},
+            "running": self._thread is not None and self._thread.is_alive(),
+            "components": dict(self.components)
+        }
+
+
+warmup = Warmup()
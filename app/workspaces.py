@@ -0,0 +1,83 @@
+import asyncio
+import os
+import re
+from fastapi import Header, HTTPException
+from app.config import DB_PATH, DEFAULT_WORKSPACE, WORKSPACES_DIR
+from app.memory import (
+    MemoryStore, get_store, use_workspace, set_current_workspace,
+    init_db, ensure_near_duplicate_index, ensure_due_dates
+)
+from app.risk_engine import ensure_risk_flags
+
+# ─── Workspaces ───────────────────────────────────────────────
+# Each team gets its own SQLite file and Chroma collection, so risk
+# checks, search and health scores only ever see that team's data.
+# The workspace comes from the X-Workspace-ID header (default if absent).
+
+# Used in file and collection names: lowercase, no dots or slashes
+WORKSPACE_ID = re.compile(r"^[a-z0-9](?:[a-z0-9_-]{0,62}[a-z0-9])?$")
+
+# Database files this process has already prepared — a store reopened
+# after eviction skips straight to ready
+_prepared_paths: set[str] = set()
+
+
+def resolve_workspace_id(value: str | None) -> str:
+    """The normalized workspace id, or ValueError if it isn't a valid one."""
+    if not value:
+        return DEFAULT_WORKSPACE
+    workspace_id = value.strip().lower()
+    if not WORKSPACE_ID.match(workspace_id):
+        raise ValueError(
+            "Workspace id must be 1-64 characters: letters, digits, '-' or '_', "
+            "starting and ending with a letter or digit"
+        )
+    return workspace_id
+
+
+def open_workspace(workspace_id: str) -> MemoryStore:
+    """
+    The workspace's store, with its schema, due dates, near-duplicate index and
+    materialized risk flags ensured the first time this process opens it.
+    """
+    with use_workspace(workspace_id):
+        store = get_store()
+        if not store.ready:
+            with store.init_lock:
+                if not store.ready:
+                    if store.db_path not in _prepared_paths:
+                        init_db()
+                        ensure_near_duplicate_index()
+                        ensure_due_dates()
+                        ensure_risk_flags()
+                        _prepared_paths.add(store.db_path)
+                    store.ready = True
+        return store
+
+
+def list_workspaces() -> list[str]:
+    """Every workspace with a database on disk."""
+    workspaces = [DEFAULT_WORKSPACE] if os.path.exists(DB_PATH) else []
+    if os.path.isdir(WORKSPACES_DIR):
+        for name in sorted(os.listdir(WORKSPACES_DIR)):
+            workspace_id, ext = os.path.splitext(name)
+            if ext == ".db" and WORKSPACE_ID.match(workspace_id) and workspace_id != DEFAULT_WORKSPACE:
+                workspaces.append(workspace_id)
+    return workspaces
+
+
+async def workspace_scope(x_workspace_id: str | None = Header(None)) -> str:
+    """
+    Router dependency: selects the request's workspace. Async so the
+    contextvar is set in the request's own context, which the endpoint
+    (and any thread it hands work to) inherits.
+    """
+    try:
+        workspace_id = resolve_workspace_id(x_workspace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    set_current_workspace(workspace_id)
+    if not get_store().ready:
+        await asyncio.to_thread(open_workspace, workspace_id)
+    return workspace_id
@@ -0,0 +1,99 @@
+import asyncio
+import re
+import threading
+import time
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# ─── Fake LLM Backends ────────────────────────────────────────
+# Stand-ins for the extraction chain and the /query model so runs are
+# offline, free and repeatable. `latency_s` simulates model round trips.
+
+LINE_PATTERN = re.compile(r"^(?P<owner>[^:]+): I will (?P<task>.+?)(?: by (?P<deadline>[^.]+))?\.$")
+
+
+def fake_extraction_chain(latency_s: float = 0.0):
+    """
+    A runnable with the extraction chain's contract: {"transcript"} in,
+    {"commitments": [...]} out. Parses lines written by synthetic.to_transcript.
+    """
+    def extract(inputs: dict) -> dict:
+        if latency_s:
+            time.sleep(latency_s)
+        commitments = []
+        for line in inputs["transcript"].splitlines():
+            match = LINE_PATTERN.match(line.strip())
+            if not match:
+                continue
+            owner = match["owner"]
+            task = match["task"]
+            commitments.append({
+                "task": task[0].upper() + task[1:],
+                "owner": None if owner == "Someone" else owner,
+                "deadline": match["deadline"],
+                "priority": "medium",
+                "is_vague": False
+            })
+        return {"commitments": commitments}
+
+    return RunnableLambda(extract)
+
+
+def fake_query_llm(latency_s: float = 0.0) -> FakeListChatModel:
+    """Chat model that always answers the same sentence; streams it char by char."""
+    return FakeListChatModel(
+        responses=["Based on the meeting records, the owner has committed to this by Friday."],
+        sleep=latency_s or None
+    )
+
+
+def install(extraction_latency_s: float = 0.0, query_latency_s: float = 0.0):
+    """Swaps the fakes into the app. Import app modules only after env setup."""
+    from app.extractor import set_extraction_chain
+    from app.query import set_query_llm
+
+    set_extraction_chain(fake_extraction_chain(extraction_latency_s))
+    set_query_llm(fake_query_llm(query_latency_s))
+
+
+class FakeRateLimitError(Exception):
+    """What the provider raises over its limit — status_code 429, like openai.RateLimitError."""
+    status_code = 429
+
+
+class FakeRateLimitedModel:
+    """
+    A model endpoint that serves at most `limit` calls per `window_s` and
+    raises FakeRateLimitError beyond that. Counts calls served and rejected.
+    """
+
+    def __init__(self, limit: int, window_s: float = 60.0, latency_s: float = 0.0):
+        self.limit = limit
+        self.window_s = window_s
+        self.latency_s = latency_s
+        self.served = 0
+        self.rejected = 0
+        self._started: list[float] = []
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        now = time.monotonic()
+        with self._lock:
+            self._started = [t for t in self._started if now - t < self.window_s]
+            if len(self._started) >= self.limit:
+                self.rejected += 1
+                raise FakeRateLimitError("Rate limit reached for requests")
+            self._started.append(now)
+            self.served += 1
+
+    def __call__(self, prompt: str) -> str:
+        self._admit()
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return f"answer to: {prompt}"
+
+    async def acall(self, prompt: str) -> str:
+        self._admit()
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return f"answer to: {prompt}"
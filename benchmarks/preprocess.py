@@ -0,0 +1,123 @@
+"""
+Transcript preprocessing: token reduction vs extraction recall.
+
+Offline (default): noisy synthetic transcripts, whose commitments are
+known, are preprocessed and read by the fake extraction chain. Recall is
+the share of rendered commitments still extracted.
+
+--live: every sample_transcripts/*.txt file goes through the real
+extraction chain twice, raw and preprocessed. Recall is the share of
+commitments from the raw run that the preprocessed run also finds.
+This needs OPENAI_API_KEY.
+
+Usage:
+    python -m benchmarks.preprocess
+    python -m benchmarks.preprocess --meetings 500 --budget 2000 --drop-action
+    python -m benchmarks.preprocess --live
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _summary(rows: list[dict]) -> dict:
+    raw = sum(r["tokens_raw"] for r in rows)
+    kept = sum(r["tokens_preprocessed"] for r in rows)
+    expected = sum(r["expected"] for r in rows)
+    found = sum(r["found"] for r in rows)
+    return {
+        "transcripts": len(rows),
+        "tokens_raw": raw,
+        "tokens_preprocessed": kept,
+        "reduction": round(1 - kept / raw, 3) if raw else 0.0,
+        "recall": round(found / expected, 4) if expected else 1.0,
+        "budget_truncated": sum(r["budget_truncated"] for r in rows),
+        "preprocess_ms_mean": round(sum(r["ms"] for r in rows) / len(rows), 3) if rows else 0.0,
+    }
+
+
+def _preprocess(text: str, budget: int, drop_action: bool) -> tuple:
+    from app.preprocess import preprocess_transcript
+
+    started = time.perf_counter()
+    result = preprocess_transcript(text, token_budget=budget, drop_action_turns=drop_action)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run_offline(meetings: int, budget: int, drop_action: bool, seed: int) -> dict:
+    from app.schemas import Commitment
+    from benchmarks.fakes import fake_extraction_chain
+    from benchmarks.synthetic import SyntheticMeetings, noisy_transcript
+
+    chain = fake_extraction_chain()
+    data = SyntheticMeetings(meetings * 10, seed=seed)
+    rng = random.Random(seed)
+    rows = []
+    for index in range(meetings):
+        _, commitments = data.meeting(index)
+        expected = {(c.owner, c.task) for c in commitments}
+        result, ms = _preprocess(noisy_transcript(commitments, rng), budget, drop_action)
+        extracted = [Commitment(**c) for c in chain.invoke({"transcript": result.text})["commitments"]]
+        rows.append({
+            "tokens_raw": result.tokens_raw,
+            "tokens_preprocessed": result.tokens,
+            "budget_truncated": result.budget_truncated,
+            "expected": len(expected),
+            "found": len(expected & {(c.owner, c.task) for c in extracted}),
+            "ms": ms,
+        })
+    return _summary(rows)
+
+
+def run_live(budget: int, drop_action: bool) -> dict:
+    from app.extractor import get_extraction_chain, _is_same_commitment
+    from app.schemas import Commitment
+
+    chain = get_extraction_chain()
+    rows = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, "sample_transcripts", "*.txt"))):
+        with open(path) as f:
+            raw = f.read()
+        result, ms = _preprocess(raw, budget, drop_action)
+        before = [Commitment(**c) for c in chain.invoke({"transcript": raw})["commitments"]]
+        after = [Commitment(**c) for c in chain.invoke({"transcript": result.text})["commitments"]]
+        missed = [c.task for c in before if not any(_is_same_commitment(c, a) for a in after)]
+        rows[os.path.basename(path)] = {
+            "tokens_raw": result.tokens_raw,
+            "tokens_preprocessed": result.tokens,
+            "budget_truncated": result.budget_truncated,
+            "expected": len(before),
+            "found": len(before) - len(missed),
+            "extracted_preprocessed": len(after),
+            "missed": missed,
+            "ms": ms,
+        }
+    return {"summary": _summary(list(rows.values())), "transcripts": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing token reduction and extraction recall")
+    parser.add_argument("--meetings", type=int, default=200, help="synthetic transcripts (offline)")
+    parser.add_argument("--budget", type=int, default=None, help="token budget (default: EXTRACTION_TOKEN_BUDGET)")
+    parser.add_argument("--drop-action", action="store_true", help="let the budget drop action turns")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--live", action="store_true", help="sample transcripts through the real model")
+    args = parser.parse_args()
+
+    from app.config import EXTRACTION_TOKEN_BUDGET
+
+    budget = EXTRACTION_TOKEN_BUDGET if args.budget is None else args.budget
+    result = (
+        run_live(budget, args.drop_action) if args.live
+        else run_offline(args.meetings, budget, args.drop_action, args.seed)
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
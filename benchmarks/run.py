@@ -0,0 +1,330 @@
+"""
+Offline benchmark suite for CommitIQ.
+
+Each scale runs in a fresh process and a throwaway working directory
+(its own SQLite file, Chroma store and embedding cache), with the fake
+LLM backends from benchmarks.fakes and the local hashing embedder.
+
+Usage:
+    python -m benchmarks.run                                  # 1k and 10k
+    python -m benchmarks.run --scales 1k,10k,100k,1m --out results.json
+    python -m benchmarks.run --baseline benchmarks/results/previous.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# /risks returns every flag; above this many commitments run it only a few times
+LARGE_SCALE = 100_000
+
+
+# ─── Measurement ──────────────────────────────────────────────
+
+def summarize(samples: list[float]) -> dict:
+    """Latency percentiles (ms) and throughput for per-call timings in seconds."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_s": round(len(ordered) / total, 1) if total else None
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def measure_once(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - started, 3)
+
+
+# ─── One Scale ────────────────────────────────────────────────
+
+def run_scale(total: int, options: dict) -> dict:
+    """
+    Loads `total` synthetic commitments into an empty store and times
+    the write path, risk engine and read endpoints. Runs in a child process.
+    """
+    workdir = tempfile.mkdtemp(prefix=f"commitiq-bench-{total}-")
+    os.chdir(workdir)
+    # Config is read at import time — set it before the first app import
+    os.environ["EMBEDDING_BACKEND"] = "hash"
+    os.environ["WARMUP_ON_STARTUP"] = "false"
+    os.environ["EXTRACTION_MODE"] = options["extraction_mode"]
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.memory import save_meeting, save_commitments, save_meetings_batch, count_commitments
+    from app.risk_engine import (
+        detect_risks, calculate_health_score, rebuild_risk_flags,
+        get_current_risks, get_current_health
+    )
+    from app.schemas import IngestRequest
+    from app.indexer import vector_indexer
+    from benchmarks import fakes
+    from benchmarks.synthetic import SyntheticMeetings, to_transcript
+
+    fakes.install(options["extraction_latency_s"], options["query_latency_s"])
+    data = SyntheticMeetings(total, seed=options["seed"])
+    repeat = options["repeat"]
+    results = {"commitments": total}
+
+    try:
+        with TestClient(app) as client:
+            # Bulk load
+            def load():
+                for batch in data.batches(options["load_batch"]):
+                    save_meetings_batch(batch)
+
+            seconds = measure_once(load)
+            results["load"] = {
+                "seconds": seconds,
+                "commitments_per_s": round(total / seconds, 1) if seconds else None
+            }
+            # Whatever the background indexer hasn't reached yet
+            results["vector_index_drain"] = {"seconds": measure_once(vector_indexer.drain)}
+            results["rebuild_risk_flags"] = {"seconds": measure_once(rebuild_risk_flags)}
+
+            # Write path, one meeting per call
+            sample_meetings = [data.meeting(i) for i in range(repeat)]
+
+            def save(i):
+                title, commitments = sample_meetings[i]
+                save_commitments(save_meeting(title), title, commitments)
+
+            results["save_commitments"] = measure(save, repeat)
+
+            # Risk engine
+            fresh_meetings = [data.meeting(i) for i in range(repeat)]
+            results["detect_risks"] = measure(lambda i: detect_risks(fresh_meetings[i][1]), repeat)
+
+            flags = get_current_risks()
+            results["flags"] = len(flags)
+            results["calculate_health_score"] = measure(lambda i: calculate_health_score(flags), repeat)
+            results["get_current_health"] = measure(lambda i: get_current_health(), repeat)
+
+            # Endpoints
+            ingest_meetings = [data.meeting(i) for i in range(repeat)]
+
+            def ingest(i):
+                title, commitments = ingest_meetings[i]
+                request = IngestRequest(
+                    meeting_title=title,
+                    content=to_transcript(commitments),
+                    bypass_cache=True
+                )
+                response = client.post("/api/v1/ingest", json=request.dict())
+                response.raise_for_status()
+
+            results["POST /ingest"] = measure(ingest, repeat)
+
+            def first_page(i):
+                client.get("/api/v1/commitments").raise_for_status()
+
+            results["GET /commitments"] = measure(first_page, repeat)
+
+            cursors = [None]
+
+            def next_page(i):
+                params = {"cursor": cursors[-1]} if cursors[-1] else {}
+                response = client.get("/api/v1/commitments", params=params)
+                response.raise_for_status()
+                cursors.append(response.json()["next_cursor"])
+
+            results["GET /commitments (page walk)"] = measure(next_page, repeat)
+
+            def risks(i):
+                client.get("/api/v1/risks").raise_for_status()
+
+            results["GET /risks"] = measure(risks, repeat if total < LARGE_SCALE else min(repeat, 3))
+
+            def health(i):
+                client.get("/api/v1/health-score").raise_for_status()
+
+            results["GET /health-score"] = measure(health, repeat)
+
+            questions = data.questions(repeat)
+
+            def query(i):
+                client.post("/api/v1/query", json={"question": questions[i]}).raise_for_status()
+
+            results["POST /query (cold)"] = measure(query, repeat)
+            results["POST /query (cached)"] = measure(query, repeat)
+
+            filter_questions = data.filter_questions(repeat)
+
+            def planned_query(i):
+                client.post("/api/v1/query", json={"question": filter_questions[i]}).raise_for_status()
+
+            results["POST /query (planned, sql)"] = measure(planned_query, repeat)
+
+            results["final_commitments"] = count_commitments()
+            results["db_bytes"] = os.path.getsize("commitiq.db")
+    finally:
+        os.chdir(ROOT)
+        if not options["keep"]:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            results["workdir"] = workdir
+
+    return results
+
+
+# ─── Reporting ────────────────────────────────────────────────
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """
+    Prints p50 changes against a previous run.
+    Returns the metrics that got slower by more than `threshold`
+    and by at least `min_delta_ms` (sub-millisecond jitter isn't a regression).
+    """
+    regressions = []
+    for scale, metrics in current["results"].items():
+        previous = baseline.get("results", {}).get(scale)
+        if not previous:
+            continue
+        print(f"\n{scale} vs baseline ({baseline['meta'].get('git_revision')}):")
+        for name, stats in metrics.items():
+            before = previous.get(name)
+            if not isinstance(stats, dict) or not isinstance(before, dict):
+                continue
+            key = "p50_ms" if "p50_ms" in stats else "seconds"
+            if not before.get(key) or stats.get(key) is None:
+                continue
+            ratio = stats[key] / before[key]
+            delta_ms = (stats[key] - before[key]) * (1000 if key == "seconds" else 1)
+            marker = ""
+            if ratio > 1 + threshold and delta_ms >= min_delta_ms:
+                marker = "  REGRESSION"
+                regressions.append(f"{scale} {name}")
+            print(f"  {name:<32} {before[key]:>10.3f} -> {stats[key]:>10.3f} {key}  ({ratio:.2f}x){marker}")
+    return regressions
+
+
+def print_table(scale: str, metrics: dict):
+    print(f"\n{scale} — {metrics['commitments']} commitments, {metrics.get('flags')} flags")
+    for name, stats in metrics.items():
+        if not isinstance(stats, dict):
+            continue
+        if "p50_ms" in stats:
+            print(f"  {name:<32} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  {stats['ops_per_s']:>9} ops/s")
+        else:
+            print(f"  {name:<32} {stats['seconds']:>9.3f} s")
+
+
+def parse_scales(value: str) -> list[str]:
+    scales = [s.strip().lower() for s in value.split(",") if s.strip()]
+    for scale in scales:
+        if scale not in SCALES and not scale.isdigit():
+            raise argparse.ArgumentTypeError(f"unknown scale {scale!r} (use {', '.join(SCALES)} or a number)")
+    return scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline CommitIQ benchmarks")
+    parser.add_argument("--scales", type=parse_scales, default=["1k", "10k"],
+                        help="comma-separated: 1k,10k,100k,1m or plain numbers")
+    parser.add_argument("--repeat", type=int, default=50, help="calls per latency metric")
+    parser.add_argument("--load-batch", type=int, default=500, help="meetings per save_meetings_batch call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--extraction-latency", type=float, default=0.0, help="simulated seconds per extraction call")
+    parser.add_argument("--query-latency", type=float, default=0.0, help="simulated seconds per /query call")
+    parser.add_argument("--extraction-mode", choices=["hybrid", "rules", "llm"], default="hybrid")
+    parser.add_argument("--out", help="JSON output path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous JSON output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio reported as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="keep each scale's working directory")
+    args = parser.parse_args()
+
+    options = {
+        "repeat": args.repeat,
+        "load_batch": args.load_batch,
+        "seed": args.seed,
+        "extraction_latency_s": args.extraction_latency,
+        "query_latency_s": args.query_latency,
+        "extraction_mode": args.extraction_mode,
+        "keep": args.keep
+    }
+    started = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "started_at": started.isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": options
+        },
+        "results": {}
+    }
+
+    # A fresh interpreter per scale: no module state, caches or
+    # store handles leak from one size into the next
+    context = multiprocessing.get_context("spawn")
+    for scale in args.scales:
+        total = SCALES.get(scale) or int(scale)
+        print(f"Running {scale} ({total} commitments)...", flush=True)
+        with context.Pool(1) as pool:
+            metrics = pool.apply(run_scale, (total, options))
+        report["results"][scale] = metrics
+        print_table(scale, metrics)
+
+    out = args.out or os.path.join(RESULTS_DIR, started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+LLM call scheduler against a fake rate-limited model.
+
+duplicates: `--callers` threads ask the same question at once. With
+single flight on, the model sees one call, not one per caller.
+
+burst: `--calls` distinct calls arrive at once at a model that serves
+`--limit` calls per `--window` seconds. Runs once with the scheduler
+paced to the model's limit and once paced at `--overshoot` times it, so
+that 429s happen and the adaptive backoff has to recover from them.
+
+Everything is offline; --window scales a provider "minute" down to seconds.
+
+Usage:
+    python -m benchmarks.scheduler
+    python -m benchmarks.scheduler --calls 200 --limit 40 --window 2 --overshoot 3
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_duplicates(callers: int, latency_s: float) -> dict:
+    from app.llm_scheduler import LLMScheduler, call_key
+    from benchmarks.fakes import FakeRateLimitedModel
+
+    result = {}
+    for single_flight in (False, True):
+        model = FakeRateLimitedModel(limit=10 ** 6, latency_s=latency_s)
+        scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, single_flight=single_flight)
+        key = call_key("benchmark", "who owns the deck?")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(callers) as pool:
+            answers = list(pool.map(
+                lambda _: scheduler.call("benchmark", key, lambda: model("who owns the deck?"), tokens=100),
+                range(callers)
+            ))
+        result["single_flight" if single_flight else "no_single_flight"] = {
+            "callers": callers,
+            "model_calls": model.served,
+            "coalesced": scheduler.coalesced,
+            "same_answer": len(set(answers)) == 1,
+            "wall_s": round(time.perf_counter() - started, 3),
+        }
+    return result
+
+
+def run_burst(calls: int, limit: int, window_s: float, pace: float, latency_s: float) -> dict:
+    from app.llm_scheduler import LLMScheduler, LLMRateLimitedError
+    from benchmarks.fakes import FakeRateLimitedModel
+
+    model = FakeRateLimitedModel(limit=limit, window_s=window_s, latency_s=latency_s)
+    # The scheduler counts per minute; scale the model's window to one
+    per_minute = max(1, int(limit * pace * 60 / window_s))
+    scheduler = LLMScheduler(
+        requests_per_minute=per_minute, tokens_per_minute=0,
+        max_queue_wait_s=calls / limit * window_s * 4,
+        rate_limit_retries=8, backoff_base_s=window_s / 8, max_backoff_s=window_s
+    )
+    # A full bucket lets a minute's worth through at once — start it empty, as mid-traffic
+    for bucket, _ in scheduler.buckets:
+        bucket.level = 0.0
+    waits, failed = [], 0
+
+    def one(index: int):
+        nonlocal failed
+        started = time.perf_counter()
+        try:
+            scheduler.call("benchmark", None, lambda: model(f"chunk {index}"), tokens=100)
+        except LLMRateLimitedError:
+            failed += 1
+        waits.append(time.perf_counter() - started - latency_s)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(min(calls, 64)) as pool:
+        list(pool.map(one, range(calls)))
+    wall = time.perf_counter() - started
+    return {
+        "paced_at": pace,
+        "calls": calls,
+        "completed": calls - failed,
+        "failed": failed,
+        "rejected_queue_wait": scheduler.rejected,
+        "provider_429s": model.rejected,
+        "final_rate_factor": scheduler.status()["rate_factor"],
+        "wait_p50_s": round(_percentile(waits, 0.5), 3),
+        "wait_max_s": round(max(waits), 3),
+        "wall_s": round(wall, 3),
+        "ideal_wall_s": round(calls / limit * window_s, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM scheduler: single flight and rate-limit pacing")
+    parser.add_argument("--callers", type=int, default=32, help="concurrent identical calls")
+    parser.add_argument("--calls", type=int, default=120, help="distinct calls in the burst")
+    parser.add_argument("--limit", type=int, default=30, help="model calls served per window")
+    parser.add_argument("--window", type=float, default=1.0, help="model rate-limit window, seconds")
+    parser.add_argument("--overshoot", type=float, default=2.0, help="scheduler pace vs the model's limit")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated model latency, seconds")
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "duplicates": run_duplicates(args.callers, max(args.latency, 0.05)),
+        "burst": [
+            run_burst(args.calls, args.limit, args.window, pace, args.latency)
+            for pace in (1.0, args.overshoot)
+        ],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
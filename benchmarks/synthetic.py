@@ -0,0 +1,177 @@
+import random
+from app.schemas import Commitment
+
+# ─── Vocabulary ───────────────────────────────────────────────
+# Small on purpose: tasks recur across meetings the way real
+# follow-ups do, so repeated_topic and overloaded_owner fire.
+
+VERBS = [
+    "finalize", "review", "draft", "update", "ship", "fix", "migrate",
+    "document", "test", "deploy", "prepare", "audit", "schedule", "benchmark"
+]
+OBJECTS = [
+    "the API docs", "the onboarding flow", "the Q3 budget", "the release notes",
+    "the billing service", "the client proposal", "the design mockups",
+    "the staging cluster", "the hiring plan", "the security review",
+    "the analytics dashboard", "the mobile build", "the pricing page", "the data pipeline"
+]
+QUALIFIERS = [
+    "", "for the client", "with the platform team", "before launch",
+    "for the board meeting", "in the new region", "for enterprise customers"
+]
+VAGUE_TASKS = [
+    "look into it", "think about the roadmap", "circle back on that",
+    "see what we can do", "explore some options"
+]
+DEADLINES = ["Friday", "next week", "end of month", "tomorrow", "Monday", "Q3", "EOD"]
+FIRST_NAMES = [
+    "Priya", "Rahul", "Ananya", "Marcus", "Sofia", "Kenji", "Amara", "Lukas",
+    "Chen", "Fatima", "Diego", "Ingrid", "Tariq", "Mei", "Omar", "Elena"
+]
+MEETING_TOPICS = [
+    "Product Planning", "Sprint Review", "Client Sync", "Budget Review",
+    "Launch Readiness", "Design Critique", "Ops Standup", "Hiring Sync"
+]
+
+
+# ─── Generator ────────────────────────────────────────────────
+
+class SyntheticMeetings:
+    """
+    Deterministic meetings and commitments for a given seed.
+    Owners scale with the data set (~50 commitments each) so the
+    per-owner queries stay realistic at every size.
+    """
+
+    def __init__(self, total_commitments: int, seed: int = 7, per_meeting: int = 10):
+        self.total = total_commitments
+        self.per_meeting = per_meeting
+        self.rng = random.Random(seed)
+        n_owners = max(len(FIRST_NAMES), total_commitments // 50)
+        self.owners = [
+            f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {i // len(FIRST_NAMES)}" if i >= len(FIRST_NAMES)
+            else FIRST_NAMES[i]
+            for i in range(n_owners)
+        ]
+
+    def commitment(self) -> Commitment:
+        rng = self.rng
+        is_vague = rng.random() < 0.08
+        if is_vague:
+            task = rng.choice(VAGUE_TASKS)
+        else:
+            task = " ".join(filter(None, [
+                rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)
+            ]))
+        return Commitment(
+            task=task.capitalize(),
+            owner=None if rng.random() < 0.1 else rng.choice(self.owners),
+            deadline=None if rng.random() < 0.2 else rng.choice(DEADLINES),
+            priority=rng.choices(["high", "medium", "low"], weights=[2, 5, 3])[0],
+            is_vague=is_vague
+        )
+
+    def meeting(self, index: int) -> tuple[str, list[Commitment]]:
+        """(title, commitments) — meeting sizes vary around per_meeting."""
+        size = max(1, int(self.rng.gauss(self.per_meeting, self.per_meeting / 4)))
+        title = f"{self.rng.choice(MEETING_TOPICS)} #{index}"
+        return title, [self.commitment() for _ in range(size)]
+
+    def meetings(self):
+        """Yields meetings until `total_commitments` have been produced."""
+        produced, index = 0, 0
+        while produced < self.total:
+            title, commitments = self.meeting(index)
+            commitments = commitments[:self.total - produced]
+            produced += len(commitments)
+            index += 1
+            yield title, commitments
+
+    def batches(self, batch_size: int):
+        """meetings() grouped into lists of batch_size for save_meetings_batch."""
+        batch = []
+        for meeting in self.meetings():
+            batch.append(meeting)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def questions(self, n: int) -> list[str]:
+        """Distinct natural-language questions for /query."""
+        templates = [
+            "What is {owner} working on?",
+            "Who owns {object}?",
+            "What is the status of {object}?",
+            "What did {owner} commit to about {object}?",
+        ]
+        questions = set()
+        while len(questions) < n:
+            questions.add(self.rng.choice(templates).format(
+                owner=self.rng.choice(self.owners),
+                object=self.rng.choice(OBJECTS)
+            ))
+        return sorted(questions)
+
+    def filter_questions(self, n: int) -> list[str]:
+        """Filterable questions the /query planner answers from SQL."""
+        templates = [
+            "What has {owner} committed to?",
+            "Which commitments have no owner?",
+            "What are the high priority tasks?",
+            "Which open tasks for {owner} have no deadline?",
+        ]
+        return [
+            self.rng.choice(templates).format(owner=self.rng.choice(self.owners))
+            for _ in range(n)
+        ]
+
+
+def to_transcript(commitments: list[Commitment]) -> str:
+    """
+    Renders commitments as transcript lines the fake extraction
+    chain parses back: "<owner>: I will <task> by <deadline>."
+    """
+    lines = []
+    for c in commitments:
+        speaker = c.owner or "Someone"
+        line = f"{speaker}: I will {c.task[0].lower()}{c.task[1:]}"
+        if c.deadline:
+            line += f" by {c.deadline}"
+        lines.append(line + ".")
+    return "\n".join(lines)
+
+
+# What real transcript exports wrap commitments in
+GREETINGS = ["Hi everyone, good morning!", "Morning all.", "Can everyone hear me?", "Hello, hello."]
+CHATTER = [
+    "Um, so the numbers look, uh, pretty stable this month.",
+    "Yeah, I saw that too, you know, in the last report.",
+    "The demo went well yesterday, people seemed happy.",
+    "Sorry, I was on mute.",
+    "[crosstalk] okay go ahead.",
+    "Right, right, makes sense.",
+    "I think the new office is nice, by the way.",
+]
+FILLERS = ["um, ", "uh, ", "", "", ""]
+SIGNOFF = ["Thanks all, bye!", "--", "Sent from my iPhone"]
+
+
+def noisy_transcript(commitments: list[Commitment], rng: random.Random) -> str:
+    """
+    to_transcript's lines as a raw meeting export: timestamped turns,
+    filler words, greetings, chatter between commitments and a sign-off.
+    Preprocessing should strip all of it and keep every commitment.
+    """
+    speakers = [c.owner for c in commitments if c.owner] or ["Priya"]
+    lines = [rng.choice(GREETINGS) for _ in range(2)]
+    for line in to_transcript(commitments).splitlines():
+        speaker, text = line.split(": ", 1)
+        lines.extend(f"{rng.choice(speakers)}: {rng.choice(CHATTER)}" for _ in range(rng.randint(0, 3)))
+        lines.append(f"{speaker}: {rng.choice(FILLERS)}{text}")
+    lines.extend(SIGNOFF)
+    return "\n".join(
+        f"[00:{i // 6:02d}:{i * 10 % 60:02d}] {line}" if i < len(lines) - len(SIGNOFF) else line
+        for i, line in enumerate(lines)
+    )
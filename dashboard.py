@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 
@@ -9,8 +10,57 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_session():
+    """One keep-alive connection pool for every rerun of the script."""
+    return requests.Session()
+
+
+@st.cache_resource
+def etag_store():
+    """(workspace, path, params) -> (ETag, body) of the last full response."""
+    return {}
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_json(path, params=(), workspace="default"):
+    """
+    Conditional GET: sends the last ETag for this URL and reuses the
+    stored body on 304. Results are also cached for a few seconds so
+    reruns don't hit the API at all. Call get_json.clear() after writes.
+    """
+    key = (workspace, path, params)
+    cached = etag_store().get(key)
+    headers = {"X-Workspace-ID": workspace}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    response = get_session().get(f"{API_URL}{path}", params=dict(params), headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+
+    data = response.json()
+    if "ETag" in response.headers:
+        etag_store()[key] = (response.headers["ETag"], data)
+    return data
+
+
+def stream_events(path, payload):
+    """Yields (event, data) from one of the API's NDJSON streaming endpoints."""
+    headers = {"X-Workspace-ID": workspace}
+    with get_session().post(f"{API_URL}{path}", json=payload, headers=headers, stream=True) as response:
+        for line in response.iter_lines():
+            if line:
+                message = json.loads(line)
+                yield message["event"], message["data"]
+
+
 st.title("🧠 CommitIQ")
 st.caption("Cross-Meeting Execution Intelligence Engine")
+
+# Each team's commitments, risks and scores live in their own workspace
+workspace = st.sidebar.text_input("Workspace", value="default").strip().lower() or "default"
 st.divider()
 
 # ─── Tabs ─────────────────────────────────────────────────────
@@ -29,8 +79,8 @@ with tab1:
     st.subheader("Execution Health Score")
 
     if st.button("Refresh Score"):
-        response = requests.get(f"{API_URL}/health-score")
-        data = response.json()
+        # Score, counts and flags from one call
+        data = get_json("/dashboard/summary", workspace=workspace)
 
         score = data["health_score"]
         label = data["health_label"]
@@ -61,13 +111,11 @@ with tab1:
         # Show risks
         st.divider()
         st.subheader("Active Risk Flags")
-        risks_response = requests.get(f"{API_URL}/risks")
-        risks_data = risks_response.json()
 
-        if risks_data["total_risks"] == 0:
+        if data["total_risks"] == 0:
             st.success("No risks detected.")
         else:
-            for risk in risks_data["risks"]:
+            for risk in data["risks"]:
                 if risk["severity"] == "high":
                     st.error(f"🔴 {risk['type'].upper()} — {risk['insight']}")
                 else:
@@ -94,53 +142,69 @@ with tab2:
         if not meeting_title or not transcript:
             st.warning("Please enter both meeting title and transcript.")
         else:
-            with st.spinner("Extracting commitments..."):
-                response = requests.post(
-                    f"{API_URL}/ingest",
-                    json={
-                        "meeting_title": meeting_title,
-                        "content": transcript
-                    }
+            data = None
+            # Stream progress instead of blocking on the full pipeline
+            with st.status("Extracting commitments...") as status:
+                events = stream_events(
+                    "/ingest/stream",
+                    {"meeting_title": meeting_title, "content": transcript}
                 )
-                data = response.json()
-
-            # Health Score
-            score = data["health_score"]
-            label = data["health_label"]
-
-            if label == "Healthy":
-                color = "green"
-            elif label == "At Risk":
-                color = "orange"
-            else:
-                color = "red"
-
-            st.markdown(
-                f"<h2 style='color:{color}'>Health Score: {score} — {label}</h2>",
-                unsafe_allow_html=True
-            )
-
-            st.success(f"Extracted {data['commitments_extracted']} commitments")
-
-            # Commitments
-            st.subheader("Extracted Commitments")
-            for c in data["commitments"]:
-                with st.expander(f"📌 {c['task']}"):
-                    col1, col2, col3 = st.columns(3)
-                    col1.write(f"**Owner:** {c['owner'] or '⚠️ Unassigned'}")
-                    col2.write(f"**Deadline:** {c['deadline'] or '⚠️ Not set'}")
-                    col3.write(f"**Priority:** {c['priority']}")
-                    if c["is_vague"]:
-                        st.warning("⚠️ This commitment is vague")
-
-            # Risk Flags
-            if data["risk_flags"]:
-                st.subheader("Risk Flags")
-                for flag in data["risk_flags"]:
-                    if flag["severity"] == "high":
-                        st.error(f"🔴 {flag['insight']}")
-                    else:
-                        st.warning(f"🟡 {flag['insight']}")
+                for event, payload in events:
+                    if event == "commitments":
+                        for c in payload["commitments"]:
+                            st.write(f"📌 {c['task']}")
+                    elif event == "meeting_saved":
+                        status.update(label="Checking risks...")
+                    elif event == "risk_flags" and payload["risk_flags"]:
+                        st.write(f"⚠️ {payload['check']}: {len(payload['risk_flags'])} flag(s)")
+                    elif event == "error":
+                        status.update(label="Ingest failed", state="error")
+                        st.error(payload["detail"])
+                    elif event == "done":
+                        data = payload
+                        status.update(label="Done", state="complete")
+
+            # New commitments — cached reads must revalidate
+            get_json.clear()
+
+            if data:
+                # Health Score
+                score = data["health_score"]
+                label = data["health_label"]
+
+                if label == "Healthy":
+                    color = "green"
+                elif label == "At Risk":
+                    color = "orange"
+                else:
+                    color = "red"
+
+                st.markdown(
+                    f"<h2 style='color:{color}'>Health Score: {score} — {label}</h2>",
+                    unsafe_allow_html=True
+                )
+
+                st.success(f"Extracted {data['commitments_extracted']} commitments")
+
+                # Commitments
+                st.subheader("Extracted Commitments")
+                for c in data["commitments"]:
+                    with st.expander(f"📌 {c['task']}"):
+                        col1, col2, col3 = st.columns(3)
+                        col1.write(f"**Owner:** {c['owner'] or '⚠️ Unassigned'}")
+                        col2.write(f"**Deadline:** {c['deadline'] or '⚠️ Not set'}")
+                        col3.write(f"**Priority:** {c['priority']}")
+                        if c["is_vague"]:
+                            st.warning("⚠️ This commitment is vague")
+
+                # Risk Flags
+                if data["risk_flags"]:
+                    st.subheader("Risk Flags")
+                    for flag in data["risk_flags"]:
+                        if flag["severity"] == "high":
+                            st.error(f"🔴 {flag['insight']}")
+                        else:
+                            st.warning(f"🟡 {flag['insight']}")
 
 
 # ─── Tab 3: Commitments ───────────────────────────────────────
@@ -153,17 +217,32 @@ with tab3:
         placeholder="e.g. Abhishek (leave empty for all)"
     )
 
-    if st.button("Load Commitments"):
-        url = f"{API_URL}/commitments"
+    def load_commitments_page(cursor=None):
+        params = {}
         if owner_filter:
-            url += f"?owner={owner_filter}"
+            params["owner"] = owner_filter
+        if cursor:
+            params["cursor"] = cursor
+
+        # Unchanged pages come back as 304 (or straight from the cache)
+        data = get_json("/commitments", tuple(sorted(params.items())), workspace)
+        st.session_state.commitments = st.session_state.get("commitments", []) + data["commitments"]
+        st.session_state.commitments_cursor = data["next_cursor"]
 
-        response = requests.get(url)
-        data = response.json()
+    if st.button("Load Commitments"):
+        st.session_state.commitments = []
+        load_commitments_page()
 
-        st.write(f"**Total:** {data['total']} commitments")
+    # API returns one page at a time — fetch the next one on demand
+    if st.session_state.get("commitments_cursor") and st.button("Load More"):
+        load_commitments_page(st.session_state.commitments_cursor)
 
-        for c in data["commitments"]:
+    if "commitments" in st.session_state:
+        loaded = st.session_state.commitments
+        more = " (more available)" if st.session_state.get("commitments_cursor") else ""
+        st.write(f"**Showing:** {len(loaded)} commitments{more}")
+
+        for c in loaded:
             with st.expander(f"📌 {c['task']}"):
                 col1, col2, col3 = st.columns(3)
                 col1.write(f"**Owner:** {c['owner'] or '⚠️ Unassigned'}")
@@ -188,12 +267,14 @@ with tab4:
         if not question:
             st.warning("Please enter a question.")
         else:
-            with st.spinner("Thinking..."):
-                response = requests.post(
-                    f"{API_URL}/query",
-                    json={"question": question}
-                )
-                data = response.json()
-
             st.markdown("### Answer")
-            st.success(data["answer"])
+
+            # Show tokens as they arrive
+            def answer_tokens():
+                for event, payload in stream_events("/query/stream", {"question": question}):
+                    if event == "token":
+                        yield payload["text"]
+                    elif event == "error":
+                        yield f"\n\n⚠️ {payload['detail']}"
+
+            st.write_stream(answer_tokens())
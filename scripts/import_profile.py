@@ -0,0 +1,80 @@
+"""
+Import-time profile of the API process.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+reports the slowest modules and top-level packages (cumulative time).
+
+Usage:
+    python scripts/import_profile.py [--top 15] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(target: str = "app.main") -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every import of `target`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize(rows: list[tuple[str, int, int]], top: int) -> dict:
+    # Self time summed per top-level package — where the seconds actually go
+    packages: dict[str, int] = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    total_us = sum(self_us for _, self_us, _ in rows)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1)}
+            for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+        ],
+        "packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    summary = summarize(profile(args.target), args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"import {args.target}: {summary['total_ms']} ms\n")
+    print("Slowest modules (cumulative):")
+    for m in summary["modules"]:
+        print(f"  {m['cumulative_ms']:>9.1f} ms  {m['module']}")
+    print("\nBy package (self time):")
+    for p in summary["packages"]:
+        print(f"  {p['self_ms']:>9.1f} ms  {p['package']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import uuid
+import pytest
+
+# Offline: the hashing embedder needs no model download or API key,
+# and no embedding cache file is written next to the code
+os.environ.setdefault("EMBEDDING_BACKEND", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from fastapi.testclient import TestClient
+from app import memory
+from app.workspaces import open_workspace
+
+
+# ─── Workspaces ───────────────────────────────────────────────
+# Offline tests get their own workspace databases under tmp_path, so
+# they never touch commitiq.db or each other's data. Their Chroma
+# collections live in one store for the session, outside the repo.
+
+@pytest.fixture(scope="session", autouse=True)
+def chroma_store(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(memory, "CHROMA_PATH", str(tmp_path_factory.mktemp("chroma")))
+        patch.setattr(memory, "_chroma_client", None)
+        yield
+
+
+@pytest.fixture
+def new_workspace_id(tmp_path, monkeypatch):
+    """Returns a function making unused workspace ids, with workspace files under tmp_path."""
+    monkeypatch.setattr(memory, "WORKSPACES_DIR", str(tmp_path))
+    return lambda: f"test-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def workspace(new_workspace_id):
+    """A fresh workspace, opened like the app opens one and current for the test. Yields its id."""
+    workspace_id = new_workspace_id()
+    open_workspace(workspace_id)
+    with memory.use_workspace(workspace_id):
+        yield workspace_id
+
+
+# ─── API ──────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(workspace):
+    """The API without its lifespan (no indexer, compactor or workers), scoped to the test's workspace."""
+    from app.main import app
+    return TestClient(app, headers={"X-Workspace-ID": workspace})
@@ -0,0 +1,37 @@
+import pytest
+from app import memory
+from app.archive import compact_workspace
+from app.schemas import Commitment
+
+
+@pytest.fixture
+def seeded(workspace):
+    """The workspace with two open commitments and one closed one."""
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", [
+        Commitment(task=task, owner="Priya", deadline=None, priority="medium", is_vague=False)
+        for task in ("Send the deck", "Review the contract", "Book the venue")
+    ])
+    with memory.get_db_connection() as conn:
+        done = conn.execute("SELECT id FROM commitments WHERE task = 'Book the venue'").fetchone()[0]
+    memory.update_commitment_statuses({done: "done"})
+    return workspace
+
+
+def test_none_disables_archiving(seeded):
+    result = compact_workspace(closed_after_days=None, open_after_days=None)
+    assert result["archived"] == 0
+    assert result["live_commitments"] == 3
+
+
+def test_recent_commitments_stay_live(seeded):
+    assert compact_workspace(closed_after_days=30, open_after_days=30)["archived"] == 0
+
+
+def test_zero_days_archives_now(seeded):
+    result = compact_workspace(closed_after_days=0, open_after_days=None)
+    assert (result["archived_closed"], result["archived_open"]) == (1, 0)
+    result = compact_workspace(closed_after_days=None, open_after_days=0)
+    assert (result["archived_closed"], result["archived_open"]) == (0, 2)
+    assert result["live_commitments"] == 0
+    assert result["archived_commitments"] == 3
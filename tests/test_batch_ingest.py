@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from app import ingest, memory
+from app.ingest import run_batch_ingest_async
+from app.schemas import BatchIngestRequest, Commitment, IngestRequest
+
+
+def counts() -> dict[str, int]:
+    """Rows per table the batch writes to."""
+    with memory.get_db_connection() as conn:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("meetings", "commitments", "minhash_signatures", "vector_outbox")
+        }
+
+
+@pytest.fixture
+def extracted(workspace, monkeypatch):
+    """Extraction without a model: one commitment per transcript line; "fail" raises."""
+    async def extract_commitments_async(content, use_cache=True, report=None):
+        if content == "fail":
+            raise RuntimeError("model unavailable")
+        return [
+            Commitment(task=line, owner="Priya", deadline=None, priority="medium", is_vague=False)
+            for line in content.splitlines()
+        ]
+
+    monkeypatch.setattr(ingest, "extract_commitments_async", extract_commitments_async)
+    return workspace
+
+
+def batch(*contents: str) -> BatchIngestRequest:
+    return BatchIngestRequest(items=[
+        IngestRequest(meeting_title=f"Meeting {n}", content=content)
+        for n, content in enumerate(contents)
+    ])
+
+
+# ─── Batch Ingest ─────────────────────────────────────────────
+
+def test_failed_extraction_only_fails_its_item(extracted):
+    result = asyncio.run(run_batch_ingest_async(batch("Send the deck\nBook the venue", "fail", "Hire a designer")))
+    assert (result.succeeded, result.failed, result.commitments_extracted) == (2, 1, 3)
+    assert [item.status for item in result.results] == ["ok", "failed", "ok"]
+    assert result.results[1].error == "model unavailable"
+    assert counts()["commitments"] == 3
+
+
+def test_failing_write_rolls_back_the_whole_batch(extracted, monkeypatch):
+    before, version = counts(), memory.get_data_version()
+
+    def enqueue_vectors(conn, ids, documents, metadatas, op="upsert"):
+        raise RuntimeError("disk full")
+
+    # Fails after every meeting and commitment row is already inserted
+    monkeypatch.setattr(memory, "enqueue_vectors", enqueue_vectors)
+    with pytest.raises(RuntimeError, match="disk full"):
+        asyncio.run(run_batch_ingest_async(batch("Send the deck\nBook the venue", "Hire a designer")))
+
+    assert counts() == before
+    assert memory.get_data_version() == version
+    assert memory.get_risk_flags() == []
@@ -0,0 +1,88 @@
+from datetime import datetime
+from app.deadlines import resolve_due_date
+
+# Wednesday 2026-10-14
+WEDNESDAY = datetime(2026, 10, 14, 9, 0)
+
+
+def due(deadline: str | None, reference: datetime | str = WEDNESDAY) -> str | None:
+    return resolve_due_date(deadline, reference)
+
+
+def test_days():
+    assert due("today") == "2026-10-14"
+    assert due("EOD") == "2026-10-14"
+    assert due("tomorrow") == "2026-10-15"
+    assert due("in 2 weeks") == "2026-10-28"
+    assert due("in a month") == "2026-11-13"
+
+
+def test_weekdays():
+    assert due("by Friday") == "2026-10-16"
+    assert due("this Friday") == "2026-10-16"
+    assert due("Friday morning") == "2026-10-16"
+    # "next Friday" is the Friday of next week
+    assert due("next Friday") == "2026-10-23"
+    assert due("by Monday") == "2026-10-19"
+
+
+def test_same_weekday():
+    assert due("Wednesday") == "2026-10-14"
+    assert due("next Wednesday") == "2026-10-21"
+
+
+def test_weeks_end_on_friday():
+    assert due("end of the week") == "2026-10-16"
+    assert due("this week") == "2026-10-16"
+    assert due("next week") == "2026-10-23"
+
+
+def test_this_week_on_a_weekend_is_today():
+    saturday = datetime(2026, 10, 17, 10, 0)
+    assert due("this week", saturday) == "2026-10-17"
+    assert due("next week", saturday) == "2026-10-23"
+
+
+def test_periods():
+    assert due("end of month") == "2026-10-31"
+    assert due("EOM") == "2026-10-31"
+    assert due("end of year") == "2026-12-31"
+    assert due("next quarter") == "2027-03-31"
+
+
+def test_year_rollover():
+    december = datetime(2026, 12, 20)
+    assert due("end of month", december) == "2026-12-31"
+    assert due("next month", december) == "2027-01-31"
+    assert due("next week", datetime(2026, 12, 30)) == "2027-01-08"
+    assert due("in 2 weeks", december) == "2027-01-03"
+
+
+def test_quarters():
+    assert due("Q4") == "2026-12-31"
+    # Q3 has passed — the next one
+    assert due("Q3") == "2027-09-30"
+    assert due("Q3 2026") == "2026-09-30"
+
+
+def test_calendar_dates():
+    assert due("Dec 31") == "2026-12-31"
+    # Already passed this year — next year's
+    assert due("Jan 5") == "2027-01-05"
+    assert due("5th of January") == "2027-01-05"
+    assert due("12/1") == "2026-12-01"
+    assert due("1/2/27") == "2027-01-02"
+
+
+def test_iso_dates_are_kept_as_given():
+    assert due("2026-11-03") == "2026-11-03"
+    assert due("2025-01-01") == "2025-01-01"
+
+
+def test_reference_as_iso_string():
+    assert due("tomorrow", "2026-10-14T09:00:00") == "2026-10-15"
+
+
+def test_unresolvable():
+    for deadline in (None, "", "when legal signs off", "next sprint", "Feb 30", "soonish"):
+        assert due(deadline) is None, deadline
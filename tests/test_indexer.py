@@ -0,0 +1,34 @@
+import logging
+import os
+import sqlite3
+from app import indexer, memory
+from app.indexer import VectorIndexer
+
+
+def test_old_schema_workspace_is_migrated_before_draining(new_workspace_id, caplog):
+    workspace_id = new_workspace_id()
+    # A workspace file from before the vector outbox existed
+    conn = sqlite3.connect(os.path.join(memory.WORKSPACES_DIR, f"{workspace_id}.db"))
+    conn.execute("CREATE TABLE meetings (id TEXT PRIMARY KEY, title TEXT NOT NULL, created_at TEXT NOT NULL)")
+    conn.close()
+
+    active = {workspace_id}
+    with caplog.at_level(logging.ERROR):
+        assert VectorIndexer()._serve(active) is False
+    assert active == set()
+    assert caplog.records == []
+    with memory.use_workspace(workspace_id):
+        assert memory.outbox_stats()["depth"] == 0
+
+
+def test_failing_workspace_leaves_the_active_set(new_workspace_id, monkeypatch, caplog):
+    workspace_id = new_workspace_id()
+
+    def open_workspace(workspace_id):
+        raise sqlite3.DatabaseError("file is not a database")
+
+    monkeypatch.setattr(indexer, "open_workspace", open_workspace)
+    active = {workspace_id}
+    VectorIndexer()._serve(active)
+    assert active == set()
+    assert len(caplog.records) == 1
@@ -0,0 +1,55 @@
+import pytest
+from app import memory
+from app.schemas import Commitment
+
+
+@pytest.fixture
+def tied(workspace):
+    """Eleven commitments, most sharing a created_at with others. Returns them in expected page order."""
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", [
+        Commitment(task=f"Task {n}", owner="Priya" if n % 2 else "Alex", deadline=None, priority="medium", is_vague=False)
+        for n in range(11)
+    ])
+    with memory.get_db_connection() as conn:
+        ids = [row["id"] for row in conn.execute("SELECT id FROM commitments ORDER BY rowid")]
+        # Three timestamps, ties inside each — only the id tiebreak orders them
+        conn.executemany(
+            "UPDATE commitments SET created_at = ? WHERE id = ?",
+            [(f"2026-10-0{1 + n % 3}T09:00:00", i) for n, i in enumerate(ids)]
+        )
+        conn.commit()
+        rows = conn.execute("SELECT id, created_at, owner FROM commitments").fetchall()
+    return sorted((dict(row) for row in rows), key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+
+def pages(limit: int, **filters) -> list[dict]:
+    """Every row, following next_cursor until it runs out."""
+    rows, cursor = [], None
+    while True:
+        page, cursor = memory.list_commitments(cursor=cursor, limit=limit, fields=["id", "created_at"], **filters)
+        assert len(page) <= limit
+        rows.extend(page)
+        if cursor is None:
+            return rows
+
+
+# ─── Keyset Pages ─────────────────────────────────────────────
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 10, 11, 100])
+def test_pages_return_each_row_once_in_order(tied, limit):
+    rows = pages(limit)
+    assert [row["id"] for row in rows] == [row["id"] for row in tied]
+    assert len({row["id"] for row in rows}) == len(tied)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_filtered_pages_keep_the_order(tied, limit):
+    expected = [row["id"] for row in tied if row["owner"] == "Priya"]
+    assert [row["id"] for row in pages(limit, owner="Priya")] == expected
+
+
+def test_last_full_page_has_no_cursor(tied):
+    page, cursor = memory.list_commitments(limit=len(tied))
+    assert len(page) == len(tied)
+    assert cursor is None
@@ -0,0 +1,278 @@
+import asyncio
+import threading
+import time
+import pytest
+from app import llm_scheduler as scheduler_module
+from app.llm_scheduler import LLMScheduler, LLMRateLimitedError
+from benchmarks.fakes import FakeRateLimitedModel, FakeRateLimitError
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", clock)
+    return clock
+
+
+def scheduler(**kwargs) -> LLMScheduler:
+    return LLMScheduler(**{
+        "requests_per_minute": 0, "tokens_per_minute": 0, "max_queue_wait_s": 30,
+        "rate_limit_retries": 2, "backoff_base_s": 1, "max_backoff_s": 30, "single_flight": True,
+        **kwargs
+    })
+
+
+def wait_until(condition, timeout_s: float = 2.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+# ─── Single Flight ────────────────────────────────────────────
+
+def test_identical_calls_are_coalesced():
+    llm = scheduler()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "answer"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(llm.call("query", "k", fn, 1)))
+    leader.start()
+    wait_until(lambda: llm.status()["in_flight"] == 1)
+    follower = threading.Thread(target=lambda: results.append(llm.call("query", "k", fn, 1)))
+    follower.start()
+    wait_until(lambda: llm.coalesced == 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ["answer", "answer"]
+    assert len(calls) == 1
+    assert llm.status()["flights"] == 0
+
+
+def test_different_or_missing_keys_are_not_coalesced():
+    llm = scheduler()
+    assert llm.call("query", "a", lambda: 1, 1) == 1
+    assert llm.call("query", "b", lambda: 2, 1) == 2
+    assert llm.call("query", None, lambda: 3, 1) == 3
+    assert llm.coalesced == 0
+    assert llm.calls == 3
+
+
+def test_followers_get_the_leaders_error():
+    llm = scheduler()
+    release = threading.Event()
+
+    def fn():
+        release.wait(2)
+        raise ValueError("bad output")
+
+    errors = []
+
+    def run():
+        try:
+            llm.call("query", "k", fn, 1)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    threads[0].start()
+    wait_until(lambda: llm.status()["in_flight"] == 1)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: llm.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    assert llm.status()["flights"] == 0
+
+
+def test_cancelled_leader_hands_the_call_to_a_follower():
+    llm = scheduler()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(llm.acall("query", "k", fn, 1))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(llm.acall("query", "k", fn, 1))
+        await asyncio.sleep(0.01)
+        # The client behind the leader disconnects
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(follower, 2)
+
+    assert asyncio.run(main()) == "answer"
+    assert len(calls) == 2
+    assert llm.status()["flights"] == 0
+
+
+def test_cancelled_follower_leaves_the_flight_alone():
+    llm = scheduler()
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(llm.acall("query", "k", fn, 1))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(llm.acall("query", "k", fn, 1)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        followers[0].cancel()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(leader, followers[1]), 2)
+
+    assert asyncio.run(main()) == ["answer", "answer"]
+
+
+# ─── Token Buckets ────────────────────────────────────────────
+
+def test_requests_are_paced(clock):
+    llm = scheduler(requests_per_minute=60)
+    for i in range(60):
+        llm.call("query", None, lambda: "ok", 1)
+    assert clock.sleeps == []
+    # A minute's worth spent — the next call waits for one request to refill
+    llm.call("query", None, lambda: "ok", 1)
+    assert clock.sleeps == [1.0]
+
+
+def test_tokens_are_paced(clock):
+    llm = scheduler(tokens_per_minute=1200)
+    llm.call("extraction", None, lambda: "ok", 1200)
+    llm.call("extraction", None, lambda: "ok", 100)
+    assert clock.sleeps == [5.0]
+
+
+def test_call_waiting_too_long_is_rejected(clock):
+    llm = scheduler(tokens_per_minute=600, max_queue_wait_s=2)
+    llm.call("extraction", None, lambda: "ok", 600)
+    calls = []
+    with pytest.raises(LLMRateLimitedError) as error:
+        llm.call("extraction", None, lambda: calls.append(1), 30)
+    assert error.value.retry_after == pytest.approx(3)
+    assert calls == []
+    assert llm.rejected == 1
+    assert clock.sleeps == []
+    # The rejected call doesn't hold up later ones
+    bucket, _ = llm.buckets[0]
+    assert bucket.waiting == 0
+    llm.call("extraction", None, lambda: "ok", 10)
+    assert clock.sleeps == [1.0]
+
+
+def test_cancelled_queued_call_gives_up_its_place():
+    llm = scheduler(requests_per_minute=60)
+    bucket, _ = llm.buckets[0]
+    bucket.level = 0
+
+    async def main():
+        task = asyncio.create_task(llm.acall("query", None, asyncio.sleep, 1))
+        await asyncio.sleep(0.01)
+        assert bucket.waiting == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert bucket.waiting == 0
+    assert llm.status()["queued"] == 0
+
+
+# ─── Provider 429s ────────────────────────────────────────────
+
+def test_429_pauses_and_halves_the_rate(clock):
+    llm = scheduler()
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FakeRateLimitError("Rate limit reached for requests")
+        return "ok"
+
+    assert llm.call("query", None, fn, 1) == "ok"
+    assert clock.sleeps == [1.0]
+    assert llm.rate_limited == 1
+    # Halved, then 5% back for the success
+    assert llm.rate_factor == pytest.approx(0.55)
+
+
+def test_repeated_429s_back_off_exponentially(clock):
+    model = FakeRateLimitedModel(limit=0)
+    llm = scheduler()
+    with pytest.raises(LLMRateLimitedError) as error:
+        llm.call("query", None, lambda: model("hi"), 1)
+    assert model.rejected == 3
+    assert clock.sleeps == [1.0, 2.0]
+    assert error.value.retry_after == 4
+    assert llm.rate_factor == pytest.approx(0.125)
+
+
+def test_429s_from_one_event_back_off_once(clock):
+    llm = scheduler()
+    error = FakeRateLimitError("Rate limit reached for requests")
+    # Calls already in flight when the first 429 landed
+    assert llm._rate_limited("query", error) == 1
+    assert llm._rate_limited("query", error) == 1
+    assert llm.rate_factor == 0.5
+
+
+def test_retry_after_header_is_respected(clock):
+    class Response:
+        status_code = 429
+        headers = {"retry-after": "7"}
+
+    class ProviderError(Exception):
+        response = Response()
+
+    llm = scheduler(rate_limit_retries=0)
+    with pytest.raises(LLMRateLimitedError) as error:
+        llm.call("query", None, lambda: (_ for _ in ()).throw(ProviderError()), 1)
+    assert error.value.retry_after == 7
+    assert llm.status()["paused_s"] == 7
+
+
+def test_non_rate_limit_errors_are_not_retried(clock):
+    llm = scheduler()
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        raise ValueError("bad output")
+
+    with pytest.raises(ValueError):
+        llm.call("query", None, fn, 1)
+    assert attempts == [1]
+    assert llm.rate_factor == 1.0
@@ -0,0 +1,102 @@
+import re
+from app import metrics, routes
+from app.metrics import Counter, Histogram, render, server_timing_header, timed
+
+# name{labels} value — one Prometheus sample line
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"(?:,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+
+def assert_exposition(text: str):
+    """Every sample parses and belongs to a metric declared by # HELP and # TYPE before it."""
+    assert text.endswith("\n")
+    helped, typed = set(), {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            helped.add(line.split()[2])
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert kind in ("counter", "gauge", "histogram")
+            typed[name] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            name = match.group(1)
+            base = re.sub(r"_(bucket|sum|count)$", "", name) if name not in typed else name
+            assert base in typed and base in helped, line
+
+
+# ─── Exposition Format ────────────────────────────────────────
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, stage="save")
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="save",le="0.1"} 1',
+        'test_seconds_bucket{stage="save",le="1.0"} 3',
+        'test_seconds_bucket{stage="save",le="+Inf"} 4',
+        'test_seconds_sum{stage="save"} 6.05',
+        'test_seconds_count{stage="save"} 4',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("test_total", "Test calls")
+    counter.inc(caller='say "hi"\\\n')
+    assert counter.render()[-1] == 'test_total{caller="say \\"hi\\"\\\\\\n"} 1'
+
+
+def test_gauges_are_declared_once_per_name():
+    text = render([
+        ("test_queued", "Queued calls", {"caller": "query"}, 2),
+        ("test_queued", "Queued calls", {"caller": "extraction"}, 0),
+    ])
+    assert text.count("# TYPE test_queued gauge") == 1
+    assert 'test_queued{caller="extraction"} 0' in text
+    assert_exposition(text)
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/v1/commitments")
+    response = client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert_exposition(response.text)
+    assert 'commitiq_http_request_seconds_count{method="GET",route="/commitments"}' in response.text
+    assert "# TYPE commitiq_vector_outbox_depth gauge" in response.text
+
+
+# ─── Server-Timing ────────────────────────────────────────────
+
+def test_server_timing_lists_request_stages(client):
+    response = client.post("/api/v1/commitments/status:batch", json={"updates": [{"id": "missing", "status": "done"}]})
+    assert response.status_code == 200
+    entries = response.headers["Server-Timing"].split(", ")
+    assert re.fullmatch(r"total;dur=\d+\.\d{2}", entries[-1])
+    stages = {entry.split(";")[0] for entry in entries}
+    assert {"update_statuses", "refresh_status_risks", "total"} <= stages
+
+
+def test_server_timing_sanitizes_stage_names():
+    assert server_timing_header({"risk check:overdue": 1.234}, 5) == "risk_check_overdue;dur=1.23, total;dur=5.00"
+
+
+# ─── Disabled ─────────────────────────────────────────────────
+
+def test_disabled_metrics_are_a_shared_no_op(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    monkeypatch.setattr(routes, "METRICS_ENABLED", False)
+
+    assert timed("save_commitments") is timed("detect_risks") is metrics._NOOP
+    before = metrics.stage_seconds.render()
+    with timed("save_commitments"):
+        pass
+    assert metrics.stage_seconds.render() == before
+
+    token = metrics.start_request_timings()
+    assert token is None
+    assert metrics.finish_request_timings(token) == {}
+    assert client.get("/api/v1/metrics").status_code == 404
@@ -0,0 +1,92 @@
+import pytest
+from app import memory, minhash
+from app.schemas import Commitment
+
+SIMILAR = [
+    ("Finalize the Q3 budget for the board meeting", "Finalize Q3 budget for board meeting"),
+    ("Update the API docs", "Update the API documentation"),
+    ("Migrate the billing service to the new region", "Migrate billing service to new region"),
+]
+DIFFERENT = [
+    ("Finalize the Q3 budget for the board meeting", "Schedule the design review with the client"),
+    ("Update the API docs", "Hire a second data engineer"),
+    ("Migrate the billing service to the new region", "Prepare the onboarding flow mockups"),
+]
+
+
+def shared_bands(a: str, b: str) -> int:
+    return len(set(minhash.band_keys(minhash.signature(a))) & set(minhash.band_keys(minhash.signature(b))))
+
+
+# ─── Signatures + LSH ─────────────────────────────────────────
+
+def test_signature_is_deterministic():
+    assert (minhash.signature("Update the API docs") == minhash.signature("update the api docs!")).all()
+    assert minhash.from_blob(minhash.to_blob(minhash.signature("Update the API docs"))).tolist() == (
+        minhash.signature("Update the API docs").tolist()
+    )
+
+
+def test_near_duplicates_share_bands():
+    for a, b in SIMILAR:
+        assert shared_bands(a, b) > 0, (a, b)
+        assert minhash.estimate_jaccard(minhash.signature(a), minhash.signature(b)) >= 0.5, (a, b)
+
+
+def test_different_tasks_share_no_bands():
+    for a, b in DIFFERENT:
+        assert shared_bands(a, b) == 0, (a, b)
+        assert minhash.estimate_jaccard(minhash.signature(a), minhash.signature(b)) < 0.2, (a, b)
+
+
+def test_estimate_jaccard_many_matches_single():
+    sig = minhash.signature(SIMILAR[0][0])
+    others = [minhash.signature(b) for _, b in SIMILAR + DIFFERENT]
+    assert minhash.estimate_jaccard_many(sig, [minhash.to_blob(o) for o in others]) == pytest.approx(
+        [minhash.estimate_jaccard(sig, o) for o in others]
+    )
+
+
+# ─── SQLite Index ─────────────────────────────────────────────
+
+@pytest.fixture
+def indexed(workspace):
+    """The workspace with the first task of each SIMILAR pair stored."""
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", [
+        Commitment(task=a, owner="Priya", deadline=None, priority="medium", is_vague=False)
+        for a, _ in SIMILAR
+    ])
+    return workspace
+
+
+def test_near_duplicates_are_found(indexed):
+    found = memory.find_near_duplicates([b for _, b in SIMILAR], threshold=0.5)
+    for a, b in SIMILAR:
+        assert [match["task"] for match in found[b]][:1] == [a], b
+
+
+def test_different_tasks_are_not_candidates(indexed):
+    found = memory.find_near_duplicates([b for _, b in DIFFERENT], threshold=0.0)
+    assert all(found[b] == [] for _, b in DIFFERENT)
+
+
+def index_rows() -> int:
+    with memory.get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM minhash_signatures").fetchone()[0]
+
+
+def test_fingerprint_change_rebuilds_index(indexed, monkeypatch):
+    with memory.get_db_connection() as conn:
+        conn.execute("DELETE FROM minhash_signatures")
+        conn.execute("DELETE FROM minhash_bands")
+        conn.commit()
+
+    # Same fingerprint: nothing to do
+    memory.ensure_near_duplicate_index()
+    assert index_rows() == 0
+
+    monkeypatch.setattr(minhash, "index_fingerprint", lambda: "v2:test")
+    memory.ensure_near_duplicate_index()
+    assert index_rows() == len(SIMILAR)
+    assert memory.get_meta("minhash_index") == "v2:test"
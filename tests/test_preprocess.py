@@ -0,0 +1,141 @@
+from app.preprocess import clean_turn, preprocess_transcript, count_tokens
+
+
+def preprocess(transcript: str, **kwargs):
+    return preprocess_transcript(transcript, **{"token_budget": 0, **kwargs})
+
+
+# ─── Cleaning ─────────────────────────────────────────────────
+
+def test_strips_timestamps():
+    assert clean_turn("[00:12:34] Priya: I'll send the deck.") == "Priya: I'll send the deck."
+    assert clean_turn("(10:32 AM) Priya: I'll send the deck.") == "Priya: I'll send the deck."
+    assert clean_turn("00:01:02,500 --> 00:01:05,000 Priya: ok") == "Priya: ok"
+    assert clean_turn("Priya (00:01:23): I'll send the deck.") == "Priya: I'll send the deck."
+    assert clean_turn("Priya [10:32 AM]: I'll send the deck.") == "Priya: I'll send the deck."
+
+
+def test_drops_caption_lines():
+    assert clean_turn("WEBVTT") == ""
+    assert clean_turn("42") == ""
+    assert clean_turn("00:01:02.000 --> 00:01:04.000") == ""
+
+
+def test_strips_noise_and_filler():
+    assert clean_turn("Raj: Um, I'll, uh, fix the build [crosstalk] by Friday.") == "Raj: I'll fix the build by Friday."
+    assert clean_turn("Raj: So, you know, I'll take it.") == "Raj: So, I'll take it."
+    assert clean_turn("Raj:   I'll    take   it  ") == "Raj: I'll take it"
+
+
+def test_keeps_meaningful_phrases():
+    # "like" and "you know" are only filler when set off by commas
+    assert clean_turn("Raj: I'd like to ship it.") == "Raj: I'd like to ship it."
+    assert clean_turn("Raj: You know the plan.") == "Raj: You know the plan."
+
+
+# ─── Filtering ────────────────────────────────────────────────
+
+def test_drops_boilerplate():
+    result = preprocess("\n".join([
+        "Priya: Hi everyone!",
+        "Raj: Morning. Sorry, can you all hear me?",
+        "Priya: You're on mute.",
+        "Raj: I'll send the deck by Friday.",
+        "Priya: Thanks, bye!",
+        "Best regards",
+        "priya@example.com",
+    ]), context_turns=0)
+    assert result.text == "Raj: I'll send the deck by Friday."
+
+
+def test_drops_repeated_turns():
+    result = preprocess("Raj: I'll send the deck.\nRaj: I'll send the deck.", context_turns=0)
+    assert result.text == "Raj: I'll send the deck."
+
+
+def test_keeps_repeated_replies_to_different_asks():
+    lines = [
+        "Priya: Raj, can you take the deck?",
+        "Raj: Sure.",
+        "Anna: The client liked the demo.",
+        "Priya: Raj, can you also send the notes?",
+        "Raj: Sure.",
+    ]
+    assert preprocess("\n".join(lines), context_turns=1).text.splitlines() == lines
+
+
+def test_action_language_filter():
+    result = preprocess("\n".join([
+        "Priya: The weather was great last weekend.",
+        "Raj: I'll update the pricing page by Monday.",
+        "Anna: The quarterly numbers looked fine.",
+        "Priya: Can you review the contract?",
+        "Anna: Our old office had better coffee.",
+    ]), context_turns=0)
+    assert result.text.splitlines() == [
+        "Raj: I'll update the pricing page by Monday.",
+        "Priya: Can you review the contract?",
+    ]
+    assert result.turns_total == 5
+    assert result.turns_dropped == 3
+
+
+def test_keeps_context_turns():
+    lines = [
+        "Anna: Our old office had better coffee.",
+        "Priya: The client liked the demo.",
+        "Priya: Can you take the deck?",
+        "Raj: Sure.",
+        "Anna: The weather was great last weekend.",
+    ]
+    assert preprocess("\n".join(lines), context_turns=1).text.splitlines() == lines[1:4]
+    assert preprocess("\n".join(lines), context_turns=2).text.splitlines() == lines
+
+
+# ─── Token Budget ─────────────────────────────────────────────
+
+ACTION = [f"Raj: I'll fix bug number {i} by Friday." for i in range(4)]
+CONTEXT = [f"Priya: The thing about item {i} is complicated." for i in range(4)]
+# Each action turn between two context turns
+INTERLEAVED = "\n".join(
+    turn for i in range(4) for turn in (CONTEXT[i], ACTION[i])
+)
+
+
+def _tokens(lines: list[str]) -> int:
+    return sum(count_tokens(line + "\n") for line in lines)
+
+
+def test_no_budget_keeps_everything():
+    result = preprocess(INTERLEAVED, context_turns=1)
+    assert result.text.splitlines() == INTERLEAVED.splitlines()
+    assert not result.budget_truncated
+
+
+def test_budget_drops_context_turns_last_first():
+    budget = _tokens(ACTION + CONTEXT[:2])
+    result = preprocess(INTERLEAVED, token_budget=budget, context_turns=1)
+    assert result.text.splitlines() == [CONTEXT[0], ACTION[0], CONTEXT[1], ACTION[1], ACTION[2], ACTION[3]]
+    assert not result.budget_truncated
+
+
+def test_budget_keeps_action_turns_by_default():
+    result = preprocess(INTERLEAVED, token_budget=_tokens(ACTION[:2]), context_turns=1)
+    assert result.text.splitlines() == ACTION
+    assert not result.budget_truncated
+
+
+def test_budget_drops_action_turns_last_first_when_allowed(caplog):
+    result = preprocess(
+        INTERLEAVED, token_budget=_tokens(ACTION[:2]), context_turns=1, drop_action_turns=True
+    )
+    assert result.text.splitlines() == ACTION[:2]
+    assert result.budget_truncated
+    assert "dropped 2 action turns" in caplog.text
+
+
+def test_token_counts():
+    result = preprocess("[00:00:01] Priya: Hi everyone!\n[00:00:05] Raj: I'll ship the build.")
+    assert result.tokens_raw == count_tokens("[00:00:01] Priya: Hi everyone!\n[00:00:05] Raj: I'll ship the build.")
+    assert result.tokens == count_tokens("Raj: I'll ship the build.")
+    assert result.tokens < result.tokens_raw
@@ -0,0 +1,157 @@
+from datetime import datetime
+from app.query_planner import OwnerIndex, plan_query, describe, format_answer
+
+# Friday 2026-10-16, mid-morning
+NOW = datetime(2026, 10, 16, 10, 30)
+OWNERS = ["Priya", "Priya Shah", "Abhishek", "Will", "May", "Jean-Luc"]
+
+
+def plan(question: str):
+    return plan_query(question, OWNERS, now=NOW)
+
+
+# ─── Routing ──────────────────────────────────────────────────
+
+def test_no_filters_is_rag():
+    result = plan("what did we decide about the launch?")
+    assert result.route == "rag"
+    assert result.filters == {}
+
+
+def test_unassigned_is_sql():
+    for question in ("which commitments have no owner?", "list unassigned tasks", "list tasks no one owns"):
+        result = plan(question)
+        assert result.route == "sql", question
+        assert result.filters == {"unassigned": True}
+
+
+def test_deadline_filters():
+    assert plan("which tasks have no deadline?").filters == {"has_deadline": False}
+    assert plan("show commitments with a due date").filters == {"has_deadline": True}
+
+
+def test_priority():
+    assert plan("what are the high priority tasks?").filters == {"priority": "high"}
+    assert plan("list low-priority items").filters == {"priority": "low"}
+    assert plan("anything urgent?").filters == {"priority": "high"}
+
+
+def test_status():
+    assert plan("what is still open?").filters == {"status": "open"}
+    assert plan("which tasks are not done yet?").filters == {"status": "open"}
+    assert plan("what got cancelled?").filters == {"status": "cancelled"}
+    assert plan("list completed commitments").filters == {"status": "done"}
+
+
+def test_two_statuses_fall_back_to_rag():
+    assert plan("which tasks are open or done?").route == "rag"
+
+
+def test_overdue():
+    result = plan("what is overdue?")
+    assert result.route == "sql"
+    assert result.filters == {"status": "open", "due_before_excl": "2026-10-16"}
+
+
+def test_overdue_and_done_is_rag():
+    assert plan("which overdue tasks are done?").route == "rag"
+
+
+def test_due_ranges():
+    assert plan("what is due today?").filters == {"due_after": "2026-10-16", "due_before": "2026-10-16"}
+    assert plan("what is due tomorrow?").filters == {"due_after": "2026-10-17", "due_before": "2026-10-17"}
+    assert plan("what is due this week?").filters == {"due_after": "2026-10-12", "due_before": "2026-10-18"}
+    assert plan("what is due next week?").filters == {"due_after": "2026-10-19", "due_before": "2026-10-25"}
+    assert plan("what is due next month?").filters == {"due_after": "2026-11-01", "due_before": "2026-11-30"}
+
+
+def test_created_windows():
+    assert plan("what was committed this week?").filters == {"created_after": "2026-10-12T00:00:00"}
+    assert plan("what was committed in the last 3 days?").filters == {"created_after": "2026-10-13T10:30:00"}
+
+
+def test_topic_with_filters_is_filtered_rag():
+    result = plan("which open tasks are about the billing migration?")
+    assert result.route == "filtered_rag"
+    assert result.filters == {"status": "open"}
+    assert result.topic == ["billing", "migration"]
+
+
+def test_topic_in_yes_no_question_is_rag():
+    assert plan("is the budget report done?").route == "rag"
+
+
+def test_topic_with_date_range_is_rag():
+    # Chroma can't range-filter dates
+    assert plan("which overdue tasks are about billing?").route == "rag"
+
+
+def test_where_conditions():
+    assert plan("list Priya's open tasks about billing").where() == {"owner": "Priya", "status": "open"}
+    assert plan("list unassigned tasks about billing").where() == {"owner": "unassigned"}
+    assert plan("which tasks without a deadline mention billing?").where() == {"deadline": "none"}
+
+
+# ─── Owners ───────────────────────────────────────────────────
+
+def test_owner():
+    result = plan("what has Abhishek committed to?")
+    assert result.route == "sql"
+    assert result.filters == {"owner": "Abhishek"}
+
+
+def test_owner_any_case_and_possessive():
+    assert plan("what is on abhishek's plate?").filters == {"owner": "Abhishek"}
+    assert plan("what did jean-luc promise?").filters == {"owner": "Jean-Luc"}
+
+
+def test_longest_owner_wins():
+    assert plan("what has Priya Shah committed to?").filters == {"owner": "Priya Shah"}
+    assert plan("what has Priya committed to?").filters == {"owner": "Priya"}
+
+
+def test_word_names_need_capitals():
+    assert plan("what has Will committed to?").filters == {"owner": "Will"}
+    assert plan("what will be done?").filters == {"status": "done"}
+    assert plan("what may slip?").route == "rag"
+    assert plan("what did May promise?").filters == {"owner": "May"}
+
+
+def test_two_owners_is_not_an_owner_filter():
+    assert "owner" not in plan("what did Priya and Abhishek agree?").filters
+
+
+def test_unknown_capitalised_word_is_not_an_owner():
+    assert plan("what is Marketing doing?").route == "rag"
+
+
+def test_owner_index_accepts_large_owner_lists():
+    index = OwnerIndex([f"Person{i} Surname{i}" for i in range(20000)] + OWNERS)
+    assert index.max_words == 2
+    assert plan_query("what has Person123 Surname123 committed to?", index, now=NOW).filters == {
+        "owner": "Person123 Surname123"
+    }
+
+
+# ─── Answers ──────────────────────────────────────────────────
+
+def test_describe():
+    assert describe({"status": "open", "priority": "high", "owner": "Priya"}) == (
+        "open high-priority commitments owned by Priya"
+    )
+    assert describe({"status": "open", "due_before_excl": "2026-10-16"}) == "overdue commitments"
+
+
+def test_format_answer():
+    assert format_answer({"unassigned": True}, [], 0) == "There are no commitments with no owner."
+    row = {
+        "task": "Ship the build", "owner": "Priya", "deadline": "Friday", "due_date": "2026-10-16",
+        "priority": "high", "status": "open", "meeting_title": "Sync"
+    }
+    answer = format_answer({"owner": "Priya"}, [row], 3)
+    assert answer.splitlines() == [
+        "There are 3 commitments owned by Priya:",
+        "- Ship the build | Owner: Priya | Deadline: Friday (2026-10-16) | Priority: high | "
+        "Status: open | Meeting: Sync",
+        "...and 2 more. Page through GET /commitments for the rest.",
+    ]
@@ -0,0 +1,67 @@
+import pytest
+from app import memory, risk_engine
+from app.risk_engine import (
+    RiskContext, check_no_owner, check_no_deadline, check_vague_commitment,
+    check_overloaded_owner, check_repeated_topic, detect_risks, evaluate_commitment
+)
+from app.schemas import Commitment
+
+
+def commitment(task: str, owner: str | None = "Priya", deadline: str | None = "next Friday", **kwargs) -> Commitment:
+    return Commitment(task=task, owner=owner, deadline=deadline, priority="medium", is_vague=False, **kwargs)
+
+
+@pytest.fixture
+def batch(workspace):
+    """A new meeting's commitments, some repeating or overloading stored ones. Returns (meeting_id, commitments)."""
+    for title, tasks in [
+        ("Planning", ["Send the deck to the board", "Review the vendor contract", "Book the offsite venue"]),
+        ("Follow-up", ["Prepare the quarterly budget", "Review the vendor contract again"]),
+    ]:
+        meeting_id = memory.save_meeting(title)
+        memory.save_commitments(meeting_id, title, [commitment(task) for task in tasks])
+
+    commitments = [
+        commitment("Send the deck to the board"),
+        commitment("Review the vendor contract", owner="Alex"),
+        commitment("Review the vendor contract", owner=None),
+        commitment("Hire a designer", deadline=None),
+        Commitment(task="Look into it", owner="Alex", deadline=None, priority="low", is_vague=True),
+    ]
+    meeting_id = memory.save_meeting("Retro")
+    memory.save_commitments(meeting_id, "Retro", commitments)
+    return meeting_id, commitments
+
+
+# ─── Batched vs Per-Commitment ────────────────────────────────
+
+@pytest.mark.parametrize("source", ["minhash", "chroma"])
+def test_batch_context_matches_one_context_per_commitment(batch, monkeypatch, source):
+    monkeypatch.setattr(risk_engine, "REPEATED_TOPIC_SOURCE", source)
+    meeting_id, commitments = batch
+
+    batched = detect_risks(commitments, meeting_id=meeting_id)
+    one_by_one = [
+        flag for c in commitments
+        for flag in evaluate_commitment(c, RiskContext.load([c]), meeting_id=meeting_id)
+    ]
+    assert batched == one_by_one
+    assert {flag.type for flag in batched} == set(risk_engine.PENALTIES) - {"overdue"}
+
+
+def test_batch_context_matches_the_per_commitment_queries(batch, monkeypatch):
+    # Without a context each check queries SQLite and Chroma itself
+    monkeypatch.setattr(risk_engine, "REPEATED_TOPIC_SOURCE", "chroma")
+    meeting_id, commitments = batch
+
+    unbatched = []
+    for c in commitments:
+        unbatched.extend(flag for flag in [
+            check_no_owner(c),
+            check_no_deadline(c),
+            check_vague_commitment(c),
+            check_overloaded_owner(c),
+            check_repeated_topic(c, current_meeting_id=meeting_id),
+        ] if flag is not None)
+
+    assert detect_risks(commitments, meeting_id=meeting_id) == unbatched
@@ -0,0 +1,96 @@
+import pytest
+from app import memory
+from app.archive import compact_workspace
+from app.risk_engine import assess_meeting, get_current_risks, get_risk_page, rebuild_risk_flags
+from app.schemas import Commitment
+from app.status import apply_status_updates
+
+
+def commitment(task: str, owner: str | None = "Priya", deadline: str | None = "next Friday", **kwargs) -> Commitment:
+    return Commitment(task=task, owner=owner, deadline=deadline, priority="medium", is_vague=False, **kwargs)
+
+
+def ingest(title: str, commitments: list[Commitment]) -> str:
+    """Saves a meeting and assesses it, like /ingest does."""
+    meeting_id = memory.save_meeting(title)
+    memory.save_commitments(meeting_id, title, commitments)
+    assess_meeting(meeting_id, commitments)
+    return meeting_id
+
+
+@pytest.fixture
+def flagged(workspace):
+    """Overdue, unowned, undated and overloaded commitments across two meetings."""
+    ingest("Planning", [
+        commitment("Send the deck", deadline="2020-01-05"),
+        commitment("Review the contract", deadline="2020-01-05"),
+        commitment("Book the venue", owner=None, deadline=None),
+        commitment("Hire a designer", deadline=None),
+    ])
+    ingest("Follow-up", [
+        commitment("Prepare the budget", deadline="2021-03-01"),
+        commitment("Draft the press release", owner=None),
+        commitment("Update the roadmap"),
+    ])
+    return workspace
+
+
+# ─── /risks Pages ─────────────────────────────────────────────
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 100])
+def test_pages_cover_every_flag_once_in_order(flagged, limit):
+    everything = get_current_risks("2026-10-14")
+    assert any(flag.type == "overdue" for flag in everything)
+    assert len(everything) > 3
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = get_risk_page(cursor, limit=limit, today="2026-10-14")
+        assert 0 < len(page) <= limit
+        pages.extend(page)
+        if cursor is None:
+            break
+    assert pages == everything
+
+
+def test_route_pages_and_total(flagged, client):
+    first = client.get("/api/v1/risks?limit=2").json()
+    assert len(first["risks"]) == 2
+    assert first["total_risks"] == len(get_current_risks())
+    second = client.get(f"/api/v1/risks?limit=2&cursor={first['next_cursor']}").json()
+    assert second["risks"] != first["risks"]
+
+
+def test_route_rejects_a_foreign_cursor(flagged, client):
+    cursor = memory.encode_cursor("2026-01-01", "abc")
+    for bad in ("nonsense", cursor):
+        assert client.get(f"/api/v1/risks?cursor={bad}", headers={"If-None-Match": "*"}).status_code == 400
+
+
+# ─── Incremental Maintenance ──────────────────────────────────
+
+def snapshot() -> tuple[list[dict], dict]:
+    return memory.get_risk_flags(), memory.get_risk_totals()
+
+
+def test_incremental_flags_match_a_full_rebuild(flagged):
+    ingest("Retro", [
+        commitment("Send the deck to the board"),
+        commitment("Review the contract", owner="Alex"),
+        commitment("Draft the press release", owner="Alex", deadline=None),
+    ])
+    rows = {row["task"]: row["id"] for row in memory.get_all_commitments()}
+    apply_status_updates({
+        rows["Hire a designer"]: "done",
+        rows["Update the roadmap"]: "dropped",
+    })
+    apply_status_updates({rows["Update the roadmap"]: "open"})
+    assert compact_workspace(closed_after_days=0, open_after_days=None)["archived"] == 1
+    ingest("Planning again", [commitment("Book the venue"), commitment("Hire a designer")])
+
+    incremental = snapshot()
+    assert any(flag["type"] == "overloaded_owner" for flag in incremental[0])
+    assert any(flag["type"] == "repeated_topic" for flag in incremental[0])
+
+    rebuild_risk_flags()
+    assert snapshot() == incremental
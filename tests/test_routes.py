@@ -0,0 +1,52 @@
+import pytest
+from app import memory
+from app.schemas import Commitment
+
+
+@pytest.fixture
+def seeded(client):
+    """The client, with two commitments in its workspace."""
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", [
+        Commitment(task=task, owner="Priya", deadline=None, priority="medium", is_vague=False)
+        for task in ("Send the deck", "Review the contract")
+    ])
+    return client
+
+
+# ─── Conditional GETs ─────────────────────────────────────────
+
+@pytest.mark.parametrize("path", ["/api/v1/commitments", "/api/v1/health-score", "/api/v1/risks"])
+def test_unchanged_version_is_not_modified(seeded, path):
+    first = seeded.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = seeded.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_write_changes_the_etag(seeded):
+    first = seeded.get("/api/v1/commitments")
+    commitment_id = first.json()["commitments"][0]["id"]
+
+    assert seeded.patch(f"/api/v1/commitments/{commitment_id}", json={"status": "done"}).status_code == 200
+
+    after = seeded.get("/api/v1/commitments", headers={"If-None-Match": first.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert {c["status"] for c in after.json()["commitments"]} == {"open", "done"}
+
+
+def test_etag_depends_on_the_query(seeded):
+    etag = seeded.get("/api/v1/commitments").headers["ETag"]
+    filtered = seeded.get("/api/v1/commitments?status=open", headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
+
+
+@pytest.mark.parametrize("query", ["cursor=not-a-cursor", "fields=task,salary", "due_before=next-week"])
+def test_invalid_parameters_are_rejected_before_the_etag_check(seeded, query):
+    response = seeded.get(f"/api/v1/commitments?{query}", headers={"If-None-Match": "*"})
+    assert response.status_code == 400
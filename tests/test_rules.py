@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from app import extractor
+from app.rules import match_sentence, extract_explicit, split_sentences
+from app.schemas import ExtractionReport
+
+
+# ─── Explicit Commitments ─────────────────────────────────────
+
+def test_named_owner_with_deadline():
+    commitment = match_sentence("Priya will schedule the design review by Wednesday.")
+    assert commitment.owner == "Priya"
+    assert commitment.task == "Schedule the design review"
+    assert commitment.deadline == "Wednesday"
+    assert commitment.priority == "medium"
+    assert not commitment.is_vague
+
+
+def test_lead_ins_and_verbs():
+    assert match_sentence("Rishabh Singh confirmed that he will migrate the billing service.").owner == "Rishabh Singh"
+    assert match_sentence("Anna agreed to update the onboarding flow by end of month.").deadline == "end of month"
+    assert match_sentence("Raj is taking the security review by next Friday.").deadline == "next Friday"
+
+
+def test_first_person_resolved_to_speaker():
+    commitment = match_sentence("I'll send the pricing deck by Friday.", speaker="Priya")
+    assert commitment.owner == "Priya"
+    assert commitment.task == "Send the pricing deck"
+    assert commitment.deadline == "Friday"
+
+
+def test_first_person_without_speaker_is_left_for_the_model():
+    assert match_sentence("I'll send the pricing deck by Friday.") is None
+
+
+def test_priority_cues():
+    assert match_sentence("Priya will fix the login bug urgently.").priority == "high"
+    assert match_sentence("Priya will fix the login bug urgently.").task == "Fix the login bug"
+    assert match_sentence("Priya will tidy the wiki, low priority.").priority == "low"
+
+
+# ─── Left for the Model ───────────────────────────────────────
+
+def test_hedged_and_hypothetical_sentences():
+    for sentence in (
+        "Priya might send the deck by Friday.",
+        "Priya will maybe send the deck.",
+        "If we get budget, Priya will hire a designer.",
+        "Priya will try to send the deck.",
+        "Priya should send the deck by Friday.",
+        "Priya will not send the deck.",
+        "Priya will look into the outage.",
+    ):
+        assert match_sentence(sentence) is None, sentence
+
+
+def test_questions():
+    assert match_sentence("Will Priya send the deck by Friday?") is None
+    assert match_sentence("Priya will send the deck by Friday?") is None
+
+
+def test_non_name_owners():
+    for sentence in (
+        "Someone will send the deck.",
+        "The team will ship the release.",
+        "We will migrate the database.",
+        "Everyone will review the doc.",
+    ):
+        assert match_sentence(sentence) is None, sentence
+
+
+def test_vague_tasks():
+    assert match_sentence("Priya will handle it.") is None
+    assert match_sentence("Priya will do that.") is None
+
+
+def test_unparsed_deadline_is_left_for_the_model():
+    assert match_sentence("Priya will send the deck by the time legal signs off.") is None
+
+
+# ─── Transcripts ──────────────────────────────────────────────
+
+def test_split_sentences_keeps_speakers():
+    assert split_sentences("Priya: Sounds good. I'll send the deck.\nThe team agreed.") == [
+        ("Priya", "Sounds good."),
+        ("Priya", "I'll send the deck."),
+        (None, "The team agreed."),
+    ]
+
+
+def test_extract_explicit_leftover():
+    commitments, leftover = extract_explicit(
+        "Priya: I'll send the deck by Friday.\n"
+        "Raj: Someone needs to look at the flaky tests.\n"
+        "Anna: Great meeting."
+    )
+    assert [(c.owner, c.task) for c in commitments] == [("Priya", "Send the deck")]
+    assert leftover == "Raj: Someone needs to look at the flaky tests.\nAnna: Great meeting."
+
+
+def test_extract_explicit_no_leftover_without_cues():
+    commitments, leftover = extract_explicit("Priya: I'll send the deck by Friday.\nAnna: Great meeting.")
+    assert len(commitments) == 1
+    assert leftover == ""
+
+
+def test_rule_pass_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    rule_pass = extractor._rule_pass
+
+    def spy(transcript, report):
+        threads.append(threading.current_thread())
+        return rule_pass(transcript, report)
+
+    monkeypatch.setattr(extractor, "_rule_pass", spy)
+    monkeypatch.setattr(extractor, "EXTRACTION_MODE", "rules")
+    monkeypatch.setattr(extractor, "_cache_store", lambda key, commitments: None)
+    report = ExtractionReport()
+    commitments = asyncio.run(extractor.extract_commitments_async(
+        "Priya: I'll send the deck by Friday.", use_cache=False, report=report
+    ))
+    assert [c.owner for c in commitments] == ["Priya"]
+    assert report.llm_calls == 0
+    assert threads and threads[0] is not threading.main_thread()
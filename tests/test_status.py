@@ -0,0 +1,78 @@
+import pytest
+from app import memory, routes
+from app.risk_engine import assess_meeting
+from app.schemas import Commitment
+from app.status import apply_status_updates
+
+
+def outbox_updates() -> dict[str, int]:
+    """Queued "update" outbox rows per commitment id."""
+    with memory.get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT commitment_id, COUNT(*) AS n FROM vector_outbox WHERE op = 'update' GROUP BY commitment_id"
+        ).fetchall()
+    return {row["commitment_id"]: row["n"] for row in rows}
+
+
+@pytest.fixture
+def overloaded(workspace):
+    """Five open commitments for Priya, so each carries an overloaded_owner flag. Returns their ids."""
+    tasks = ["Send the deck", "Review the contract", "Book the venue", "Hire a designer", "Update the roadmap"]
+    commitments = [
+        Commitment(task=task, owner="Priya", deadline="next Friday", priority="medium", is_vague=False)
+        for task in tasks
+    ]
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", commitments)
+    assess_meeting(meeting_id, commitments)
+    return [row["id"] for row in memory.get_commitments_by_meetings([meeting_id])]
+
+
+# ─── Batch Status Updates ─────────────────────────────────────
+
+def test_batch_update_sets_statuses_and_refreshes_flags(overloaded):
+    assert memory.get_risk_totals() == {"overloaded_owner": 5}
+    first, second, *others = overloaded
+
+    result = apply_status_updates({first: "done", second: "cancelled", others[0]: "open"})
+    assert (result.updated, result.unchanged, result.not_found) == (2, 1, [])
+    assert result.owners_refreshed == ["Priya"]
+
+    statuses = {row["id"]: row["status"] for row in memory.get_commitments_by_ids(overloaded)}
+    assert statuses == {first: "done", second: "cancelled", **{i: "open" for i in others}}
+    # Three open commitments left: nobody is overloaded any more
+    assert memory.get_risk_flags() == []
+    assert memory.get_risk_totals() == {}
+    assert result.health_score == 100
+
+
+def test_batch_update_queues_one_outbox_update_per_changed_row(overloaded):
+    first, second, third, *_ = overloaded
+    apply_status_updates({first: "done", second: "done", third: "open"})
+    assert outbox_updates() == {first: 1, second: 1}
+
+
+def test_unknown_ids_are_reported(overloaded):
+    result = apply_status_updates({overloaded[0]: "done", "missing-1": "done", "missing-2": "open"})
+    assert result.updated == 1
+    assert result.not_found == ["missing-1", "missing-2"]
+
+
+def test_reopening_restores_flags(overloaded):
+    apply_status_updates({overloaded[0]: "done"})
+    assert memory.get_risk_totals() == {}
+    apply_status_updates({overloaded[0]: "open"})
+    assert memory.get_risk_totals() == {"overloaded_owner": 5}
+
+
+def test_batch_route(overloaded, client, monkeypatch):
+    updates = [{"id": overloaded[0], "status": "done"}, {"id": "missing", "status": "done"}]
+    response = client.post("/api/v1/commitments/status:batch", json={"updates": updates})
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+    assert response.json()["not_found"] == ["missing"]
+
+    assert client.post("/api/v1/commitments/status:batch", json={"updates": []}).status_code == 400
+    monkeypatch.setattr(routes, "STATUS_BATCH_MAX_ITEMS", 2)
+    updates = [{"id": i, "status": "done"} for i in overloaded[:3]]
+    assert client.post("/api/v1/commitments/status:batch", json={"updates": updates}).status_code == 413
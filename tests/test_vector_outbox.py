@@ -0,0 +1,34 @@
+import pytest
+from app import memory
+from app.schemas import Commitment
+
+
+@pytest.fixture
+def embedded(workspace, monkeypatch):
+    """The batches a fresh workspace sends to the embedder."""
+    batches = []
+
+    def embed_texts(texts):
+        batches.append(list(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(memory, "embed_texts", embed_texts)
+    return batches
+
+
+def test_empty_outbox_skips_read_through(embedded):
+    pending = memory.pending_vectors()
+    assert pending["ids"] == []
+    assert pending["deleted"] == set()
+    assert embedded == []
+
+
+def test_queued_commitments_are_read_through(embedded):
+    meeting_id = memory.save_meeting("Planning")
+    memory.save_commitments(meeting_id, "Planning", [
+        Commitment(task="Send the deck", owner="Priya", deadline=None, priority="medium", is_vague=False)
+    ])
+    pending = memory.pending_vectors()
+    assert len(pending["ids"]) == 1
+    assert pending["metadatas"][0]["owner"] == "Priya"
+    assert len(embedded) == 1
@@ -0,0 +1,38 @@
+import pytest
+from app import memory, workspaces
+
+
+@pytest.fixture
+def stores(new_workspace_id, monkeypatch):
+    """A store cache that keeps one workspace open, with init_db calls counted."""
+    monkeypatch.setattr(memory, "_stores", memory.StoreCache(max_open=1))
+    inits = []
+    init_db = workspaces.init_db
+    monkeypatch.setattr(workspaces, "init_db", lambda: (inits.append(memory.current_workspace()), init_db()))
+    yield inits
+    memory._stores.close_all()
+
+
+def test_reopened_workspace_skips_schema_init(stores, new_workspace_id):
+    a, b = new_workspace_id(), new_workspace_id()
+    first = workspaces.open_workspace(a)
+    workspaces.open_workspace(b)
+    reopened = workspaces.open_workspace(a)
+
+    assert reopened is not first
+    assert reopened.ready
+    assert memory.store_cache_stats()["evictions"] == 2
+    assert stores == [a, b]
+
+
+def test_reopened_workspace_keeps_its_caches(stores, new_workspace_id):
+    a, b = new_workspace_id(), new_workspace_id()
+    first = workspaces.open_workspace(a)
+    with memory.use_workspace(a):
+        owner_index = memory.get_owner_index()
+    workspaces.open_workspace(b)
+    reopened = workspaces.open_workspace(a)
+
+    assert reopened.query_cache is first.query_cache
+    with memory.use_workspace(a):
+        assert memory.get_owner_index() is owner_index